@@ -3,6 +3,9 @@ const path = require('path');
 const { parse } = require('csv-parse/sync');
 const { execSync } = require('child_process');
 
+// allNames is read by allNames, namePages and names; load the JSON once per build
+let allNamesCache = null;
+
 module.exports = function(eleventyConfig) {
   // Determine which data files to use based on git branch
   // Use full dataset on main branch, dev dataset on all other branches
@@ -33,6 +36,8 @@ module.exports = function(eleventyConfig) {
   // Note: CSS is processed separately with PostCSS/Tailwind
   eleventyConfig.addPassthroughCopy('src/scripts');
   eleventyConfig.addPassthroughCopy('src/assets');
+  // Sharded search index built by scripts/build_search_index.py (if present)
+  eleventyConfig.addPassthroughCopy({ 'data/search': 'search' });
 
   // Helper function to create URL-safe slugs
   function createSlug(name) {
@@ -47,8 +52,16 @@ module.exports = function(eleventyConfig) {
     return array.filter(item => item.gender === gender);
   });
 
+  // The cache lasts one build: under --serve every rebuild re-reads the JSON
+  eleventyConfig.on('eleventy.before', () => {
+    allNamesCache = null;
+  });
+
   // Load JSON data for all names (boys + girls)
   eleventyConfig.addGlobalData('allNames', () => {
+    if (allNamesCache) {
+      return allNamesCache;
+    }
     const boysPath = path.join(__dirname, 'data', `boys${dataSuffix}`);
     const girlsPath = path.join(__dirname, 'data', `girls${dataSuffix}`);
 
@@ -97,9 +110,27 @@ module.exports = function(eleventyConfig) {
     });
 
     console.log(`Total names loaded: ${allNames.length}`);
+    allNamesCache = allNames;
     return allNames;
   });
 
+  // Names to render individual pages for. With CHANGED_PAGES set to a file
+  // written by scripts/run_diff.py, only the names listed there are rendered;
+  // pages from the previous build stay in _site untouched.
+  eleventyConfig.addGlobalData('namePages', () => {
+    const allNames = eleventyConfig.globalData.allNames();
+    const changedPath = process.env.CHANGED_PAGES;
+    if (!changedPath) {
+      return allNames;
+    }
+
+    const changed = JSON.parse(fs.readFileSync(path.resolve(__dirname, changedPath), 'utf-8'));
+    const keys = new Set(changed.keys);
+    const namePages = allNames.filter(name => keys.has(`${name.name}|${name.gender}`));
+    console.log(`Rendering ${namePages.length} changed name pages (${changedPath})`);
+    return namePages;
+  });
+
   // Load sample CSV data for homepage featured names
   eleventyConfig.addGlobalData('names', () => {
     const csvPath = path.join(__dirname, 'data', 'names.csv');
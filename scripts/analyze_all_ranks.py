@@ -9,9 +9,15 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, os.path.dirname(__file__))
+from columnar_outputs import start_run, write_columnar
+from name_matrices import lean_frame, load_rank_frame
+
 # For clustering
 from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import KMeans
@@ -20,20 +26,30 @@ try:
     HDBSCAN_AVAILABLE = True
 except ImportError:
     HDBSCAN_AVAILABLE = False
-    print("Warning: HDBSCAN not available. Install with: pip install hdbscan")
 
 # Set up paths
 DATA_PATH = Path(__file__).parent.parent / 'data' / 'all_ranks.csv'
 OUTPUT_DIR = Path(__file__).parent.parent / 'analysis_output' / 'all_ranks'
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 # Matplotlib settings
 plt.style.use('seaborn-v0_8-darkgrid')
 sns.set_palette("husl")
 
 
-def load_and_prepare_data():
-    """Load the CSV and convert ranks to numeric (x -> NaN)."""
+def load_and_prepare_data(data_paths=None):
+    """
+    Load the CSV and convert ranks to numeric (x -> NaN).
+
+    If data_paths lists .npz sidecars (see name_matrices.py), the typed rank
+    matrices are loaded directly instead.
+    """
+    if data_paths:
+        print(f"Loading data from {', '.join(str(p) for p in data_paths)}...")
+        df = load_rank_frame(data_paths)
+        year_cols = [col for col in df.columns if col != 'name']
+        print(f"Loaded {len(df)} names with {len(year_cols)} time periods")
+        return df, year_cols
+
     print("Loading data from all_ranks.csv...")
     df = pd.read_csv(DATA_PATH)
 
@@ -169,13 +185,23 @@ def extract_features(df, year_cols):
     return features
 
 
-def prepare_for_clustering(features):
-    """Prepare features for clustering by handling missing values and scaling."""
+def prepare_for_clustering(features, lean=False):
+    """
+    Prepare features for clustering by handling missing values and scaling.
+
+    lean=True fills and scales one float32 matrix in place instead of
+    copying the frame for each step.
+    """
     print("\nPreparing features for clustering...")
 
     # Select numeric features for clustering (exclude name and year identifiers)
     cluster_features = features.drop(['name', 'peak_year', 'first_year', 'last_year'], axis=1)
 
+    if lean:
+        X = cluster_features.to_numpy(dtype=np.float32, na_value=-1)
+        features_scaled = StandardScaler(copy=False).fit_transform(X)
+        return features_scaled, cluster_features.columns.tolist()
+
     # Fill NaN values with -1 (to distinguish from 0)
     cluster_features_filled = cluster_features.fillna(-1)
 
@@ -187,7 +213,10 @@ def prepare_for_clustering(features):
 
 
 def perform_clustering(features_scaled, features, n_clusters=8):
-    """Perform both k-means and HDBSCAN clustering."""
+    """Perform both k-means and HDBSCAN clustering (n_clusters='auto' selects k, see select_k.py)."""
+    if n_clusters == 'auto':
+        from select_k import choose_k
+        n_clusters = choose_k(features_scaled)
     print(f"\nPerforming clustering with k={n_clusters}...")
 
     # K-Means clustering
@@ -200,6 +229,7 @@ def perform_clustering(features_scaled, features, n_clusters=8):
         features['hdbscan_cluster'] = clusterer.fit_predict(features_scaled)
         print(f"HDBSCAN found {features['hdbscan_cluster'].max() + 1} clusters")
     else:
+        print("Warning: HDBSCAN not available. Install with: pip install hdbscan")
         features['hdbscan_cluster'] = -1
 
     print(f"K-Means created {n_clusters} clusters")
@@ -427,6 +457,7 @@ def save_results(features):
 
     # Save full features with clusters
     features.to_csv(OUTPUT_DIR / 'features_with_clusters.csv', index=False)
+    write_columnar(features, OUTPUT_DIR / 'features_with_clusters.csv')
     print(f"Saved: features_with_clusters.csv ({len(features)} rows)")
 
     # Save cluster summaries
@@ -443,6 +474,7 @@ def save_results(features):
                                 'avg_peak_rank', 'avg_volatility', 'avg_longest_run',
                                 'avg_recency']
     cluster_summary.to_csv(OUTPUT_DIR / 'cluster_summary.csv')
+    write_columnar(cluster_summary, OUTPUT_DIR / 'cluster_summary.csv', index=True)
     print("Saved: cluster_summary.csv")
 
     # Save archetype summary
@@ -456,6 +488,7 @@ def save_results(features):
     archetype_summary.columns = ['count', 'avg_years_top100', 'avg_peak_rank',
                                   'avg_first_year', 'avg_last_year']
     archetype_summary.to_csv(OUTPUT_DIR / 'archetype_summary.csv')
+    write_columnar(archetype_summary, OUTPUT_DIR / 'archetype_summary.csv', index=True)
     print("Saved: archetype_summary.csv")
 
     # Save example names per archetype
@@ -469,23 +502,41 @@ def save_results(features):
     print("Saved: archetype_examples.txt")
 
 
-def main():
-    """Main execution function."""
+def main(data_paths=None, n_shape_clusters=0, n_clusters=8, lean=False):
+    """
+    Main execution function.
+
+    n_shape_clusters > 0 also adds a shape_cluster column from gap-aware DTW
+    clustering of the rank series (see gap_dtw.py). lean=True keeps ranks
+    and features as float32 with a categorical name column.
+    """
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    start_run(__file__, {'n_shape_clusters': n_shape_clusters, 'n_clusters': n_clusters, 'lean': lean}, data_paths or [DATA_PATH])
+
     print("="*60)
     print("BABY NAME TIME SERIES ANALYSIS")
     print("="*60)
 
     # Load data
-    df, year_cols = load_and_prepare_data()
+    df, year_cols = load_and_prepare_data(data_paths)
+    if lean:
+        lean_frame(df, category_columns=('name',))
 
     # Extract features
     features = extract_features(df, year_cols)
+    if lean:
+        lean_frame(features, category_columns=('name',))
 
     # Prepare for clustering
-    features_scaled, feature_names = prepare_for_clustering(features)
+    features_scaled, feature_names = prepare_for_clustering(features, lean=lean)
 
     # Perform clustering
-    features = perform_clustering(features_scaled, features, n_clusters=8)
+    features = perform_clustering(features_scaled, features, n_clusters=n_clusters)
+
+    if n_shape_clusters:
+        from gap_dtw import frame_shape_clusters
+        print(f"\nGap-aware DTW shape clustering (k={n_shape_clusters})...")
+        features['shape_cluster'], _ = frame_shape_clusters(df, year_cols, n_clusters=n_shape_clusters)
 
     # Identify archetypes
     features = identify_archetypes(features)
@@ -503,4 +554,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    main(sys.argv[1:])
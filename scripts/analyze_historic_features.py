@@ -12,6 +12,7 @@ import seaborn as sns
 from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import KMeans
 from sklearn.decomposition import PCA
+from columnar_outputs import start_run, write_columnar
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -21,22 +22,32 @@ try:
     HAS_HDBSCAN = True
 except ImportError:
     HAS_HDBSCAN = False
-    print("HDBSCAN not available, will use k-means only")
-    print("Install with: pip3 install hdbscan")
 
 # Configuration
 INPUT_FILE = 'data/rankHistoricTimeSeries.csv'
-OUTPUT_DIR = 'analysis_output'
+DEFAULT_OUTPUT_DIR = 'analysis_output'
+# Decade-statistic runs are exploratory: they keep out of the site's inputs
+DECADE_STAT_OUTPUT_DIR = 'analysis_output/historic_{stat}'
+OUTPUT_DIR = DEFAULT_OUTPUT_DIR
 DECADES = ['1900s', '1910s', '1920s', '1930s', '1940s', '1950s', '1960s', '1970s',
            '1980s', '1990s', '2000s', '2010s', '2020s']
 
 import os
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def load_data():
-    """Load and preprocess the time series data."""
-    print("Loading data...")
-    df = pd.read_csv(INPUT_FILE, sep=',')
+def load_data(input_file=INPUT_FILE, decade_stat=None):
+    """
+    Load and preprocess the time series data.
+
+    With decade_stat ('mean', 'best' or 'last'), input_file is a
+    rankDecadeAggregates.csv from decade_aggregates.py and that statistic's
+    columns are used as the decade ranks.
+    """
+    print(f"Loading data from {input_file}...")
+    df = pd.read_csv(input_file, sep=',')
+
+    if decade_stat:
+        df = df[['name|gender'] + [f'{decade}_{decade_stat}' for decade in DECADES]]
+        df.columns = ['name|gender'] + DECADES
 
     # Split name|gender column
     split_cols = df['name|gender'].str.split('|', expand=True)
@@ -167,8 +178,8 @@ def engineer_features(df):
 
     return features, df
 
-def perform_clustering(features):
-    """Perform clustering analysis."""
+def perform_clustering(features, n_clusters=6):
+    """Perform clustering analysis (n_clusters='auto' selects k, see select_k.py)."""
     print("\nPerforming clustering analysis...")
 
     # Select numeric features for clustering
@@ -188,9 +199,14 @@ def perform_clustering(features):
 
     results = {}
 
+    if n_clusters == 'auto':
+        from select_k import choose_k
+        n_clusters = choose_k(X_scaled)
+    results['n_clusters'] = n_clusters
+
     # K-means clustering
-    print("\nRunning k-means (k=6)...")
-    kmeans = KMeans(n_clusters=6, random_state=42, n_init=10)
+    print(f"\nRunning k-means (k={n_clusters})...")
+    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
     kmeans_labels = kmeans.fit_predict(X_scaled)
     results['kmeans'] = {
         'labels': kmeans_labels,
@@ -210,6 +226,9 @@ def perform_clustering(features):
         }
         print(f"HDBSCAN found {len(set(hdbscan_labels)) - (1 if -1 in hdbscan_labels else 0)} clusters")
         print(f"Noise points: {sum(hdbscan_labels == -1)}")
+    else:
+        print("HDBSCAN not available, will use k-means only")
+        print("Install with: pip3 install hdbscan")
 
     # PCA for visualization
     pca = PCA(n_components=2)
@@ -229,6 +248,7 @@ def visualize_clusters(features, df, results):
 
     X = results['X']
     X_pca = results['pca']
+    n_clusters = results['n_clusters']
     valid_indices = results['kmeans']['valid_indices']
 
     # Get valid features
@@ -248,7 +268,7 @@ def visualize_clusters(features, df, results):
     plt.colorbar(scatter, label='Cluster')
     plt.xlabel('First Principal Component')
     plt.ylabel('Second Principal Component')
-    plt.title('K-means Clusters (k=6) in PCA Space')
+    plt.title(f'K-means Clusters (k={n_clusters}) in PCA Space')
     plt.tight_layout()
     plt.savefig(f'{OUTPUT_DIR}/clusters_pca_kmeans.png', dpi=150)
     print(f"Saved: {OUTPUT_DIR}/clusters_pca_kmeans.png")
@@ -264,7 +284,7 @@ def visualize_clusters(features, df, results):
 
     for idx, feature in enumerate(key_features):
         if idx < len(axes):
-            for cluster in range(6):
+            for cluster in range(n_clusters):
                 cluster_data = valid_features[valid_features['kmeans_cluster'] == cluster][feature]
                 axes[idx].hist(cluster_data, alpha=0.5, label=f'C{cluster}', bins=20)
             axes[idx].set_title(feature, fontsize=10)
@@ -277,10 +297,11 @@ def visualize_clusters(features, df, results):
     print(f"Saved: {OUTPUT_DIR}/feature_distributions.png")
 
     # 3. Example trajectories per cluster
-    fig, axes = plt.subplots(2, 3, figsize=(18, 10))
+    n_rows = -(-n_clusters // 3)
+    fig, axes = plt.subplots(n_rows, 3, figsize=(18, 5 * n_rows))
     axes = axes.flatten()
 
-    for cluster in range(6):
+    for cluster in range(n_clusters):
         cluster_names = valid_features[valid_features['kmeans_cluster'] == cluster]
         # Sample 10 random names from cluster
         sample_size = min(10, len(cluster_names))
@@ -317,7 +338,7 @@ def visualize_clusters(features, df, results):
 
     # 4. Cluster summary statistics
     summary_stats = []
-    for cluster in range(6):
+    for cluster in range(n_clusters):
         cluster_data = valid_features[valid_features['kmeans_cluster'] == cluster]
         stats = {
             'Cluster': cluster,
@@ -337,6 +358,7 @@ def visualize_clusters(features, df, results):
     print(summary_df.to_string(index=False))
 
     summary_df.to_csv(f'{OUTPUT_DIR}/cluster_summary.csv', index=False)
+    write_columnar(summary_df, f'{OUTPUT_DIR}/cluster_summary.csv')
     print(f"\nSaved: {OUTPUT_DIR}/cluster_summary.csv")
 
     return valid_features
@@ -347,7 +369,7 @@ def identify_archetypes(valid_features, df):
 
     archetypes = {}
 
-    for cluster in range(6):
+    for cluster in sorted(valid_features['kmeans_cluster'].unique()):
         cluster_data = valid_features[valid_features['kmeans_cluster'] == cluster]
 
         # Calculate key statistics
@@ -442,6 +464,7 @@ def identify_archetypes(valid_features, df):
     ])
 
     archetype_df.to_csv(f'{OUTPUT_DIR}/archetypes.csv', index=False)
+    write_columnar(archetype_df, f'{OUTPUT_DIR}/archetypes.csv')
     print(f"\nSaved: {OUTPUT_DIR}/archetypes.csv")
 
     # Create name-to-archetype mapping
@@ -451,16 +474,17 @@ def identify_archetypes(valid_features, df):
     # Save name assignments
     name_assignments = valid_features[['name', 'gender', 'archetype']].copy()
     name_assignments.to_csv(f'{OUTPUT_DIR}/name_archetypes.csv', index=False)
+    write_columnar(name_assignments, f'{OUTPUT_DIR}/name_archetypes.csv')
     print(f"Saved: {OUTPUT_DIR}/name_archetypes.csv")
 
     return archetypes, valid_features
 
-def update_csv_with_archetypes(valid_features):
+def update_csv_with_archetypes(valid_features, input_file=INPUT_FILE):
     """Update the CSV file with archetype labels."""
     print("\nUpdating CSV with archetype labels...")
 
     # Read the original CSV
-    df = pd.read_csv(INPUT_FILE)
+    df = pd.read_csv(input_file)
 
     # Create a mapping from name|gender to archetype
     archetype_map = {}
@@ -474,27 +498,53 @@ def update_csv_with_archetypes(valid_features):
     # Fill NaN with empty string for names not clustered
     df['Archetype'] = df['Archetype'].fillna('')
 
-    # Save updated CSV
-    df.to_csv(INPUT_FILE, index=False)
+    # Keep the previous run for run_diff.py, then save updated CSV
+    from run_diff import snapshot
+    snapshot(input_file)
+    df.to_csv(input_file, index=False)
 
     clustered_count = df['Archetype'].ne('').sum()
     print(f"  Added archetypes for {clustered_count} names")
     print(f"  {len(df) - clustered_count} names left uncategorized (insufficient data)")
 
-def main():
-    """Main execution."""
+def main(input_file=INPUT_FILE, decade_stat=None, n_shape_clusters=0, n_clusters=6):
+    """
+    Main execution.
+
+    n_shape_clusters > 0 also clusters the decade series with gap-aware DTW
+    (see gap_dtw.py) and saves historic_shape_clusters.csv.
+
+    With decade_stat the outputs go to DECADE_STAT_OUTPUT_DIR and input_file
+    is left unchanged, so the name_archetypes.csv read by
+    update-historic-classifications-from-archetypes.js is not replaced.
+    """
+    global OUTPUT_DIR
+    OUTPUT_DIR = DECADE_STAT_OUTPUT_DIR.format(stat=decade_stat) if decade_stat else DEFAULT_OUTPUT_DIR
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    start_run(__file__, {'decade_stat': decade_stat, 'n_shape_clusters': n_shape_clusters,
+                         'n_clusters': n_clusters}, [input_file])
+
     print("="*80)
     print("HISTORIC RANK TIME SERIES FEATURE ANALYSIS")
     print("="*80)
 
     # Load data
-    df = load_data()
+    df = load_data(input_file, decade_stat)
 
     # Engineer features
     features, df = engineer_features(df)
 
     # Perform clustering
-    results = perform_clustering(features)
+    results = perform_clustering(features, n_clusters=n_clusters)
+
+    if n_shape_clusters:
+        from gap_dtw import frame_shape_clusters
+        print(f"\nGap-aware DTW shape clustering (k={n_shape_clusters})...")
+        decade_years = [1904 + 10 * i for i in range(len(DECADES))]
+        features['shape_cluster'], _ = frame_shape_clusters(df, DECADES, times=decade_years,
+                                                            n_clusters=n_shape_clusters)
+        features[['name', 'gender', 'shape_cluster']].to_csv(
+            f'{OUTPUT_DIR}/historic_shape_clusters.csv', index=False)
 
     # Visualize clusters
     valid_features = visualize_clusters(features, df, results)
@@ -502,8 +552,9 @@ def main():
     # Identify archetypes
     archetypes, valid_features = identify_archetypes(valid_features, df)
 
-    # Update CSV with archetypes
-    update_csv_with_archetypes(valid_features)
+    # Update CSV with archetypes (not the decade aggregates, another stage's output)
+    if not decade_stat:
+        update_csv_with_archetypes(valid_features, input_file)
 
     print("\n" + "="*80)
     print("ANALYSIS COMPLETE")
@@ -515,7 +566,8 @@ def main():
     print("  - cluster_summary.csv")
     print("  - archetypes.csv")
     print("  - name_archetypes.csv")
-    print(f"\nUpdated: {INPUT_FILE} (added Archetype column)")
+    if not decade_stat:
+        print(f"\nUpdated: {input_file} (added Archetype column)")
 
 if __name__ == '__main__':
     main()
@@ -12,18 +12,39 @@ import seaborn as sns
 from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA
 from sklearn.cluster import KMeans
-import hdbscan
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, os.path.dirname(__file__))
+from name_matrices import lean_frame, load_count_frame
+from run_diff import snapshot
+from columnar_outputs import start_run, write_columnar
+
+# Features the archetype rules compare with birth-count thresholds; with a
+# normalize option the clusters are named from these levels of the raw counts
+COUNT_LEVEL_FEATURES = ['peak_count', 'trajectory', 'recent_mean', 'early_mean']
+
 # Set style for visualizations
 sns.set_style("whitegrid")
 plt.rcParams['figure.figsize'] = (15, 10)
 
 
-def load_data(filepath):
-    """Load the time series data from CSV."""
-    df = pd.read_csv(filepath)
+def load_data(filepath, lean=False):
+    """
+    Load the time series data from CSV.
+
+    filepath may also be a list of .npz sidecars (see name_matrices.py),
+    which are loaded directly as typed matrices without CSV parsing.
+    lean=True returns float32 counts and categorical name/gender columns.
+    """
+    paths = filepath if isinstance(filepath, (list, tuple)) else [filepath]
+    if all(str(p).endswith('.npz') for p in paths):
+        df, year_cols = load_count_frame(paths)
+        return (lean_frame(df) if lean else df), year_cols
+
+    df = pd.read_csv(paths[0])
 
     # Split the first column into name and gender
     first_col = df.columns[0]
@@ -35,17 +56,21 @@ def load_data(filepath):
     for col in year_cols:
         df[col] = pd.to_numeric(df[col], errors='coerce')
 
-    return df, year_cols
+    return (lean_frame(df) if lean else df), year_cols
+
 
+def extract_features(df, year_cols, lean=False):
+    """
+    Extract meaningful features from time series data.
 
-def extract_features(df, year_cols):
-    """Extract meaningful features from time series data."""
+    lean=True writes each row's features straight into a float32 matrix
+    (with categorical name/gender) instead of collecting one dict per name.
+    """
     features = []
+    matrix = None
+    rows = zip(df['name'], df['gender'], df[year_cols].to_numpy(dtype=float))
 
-    for idx, row in df.iterrows():
-        name = row['name']
-        gender = row['gender']
-        values = row[year_cols].values.astype(float)
+    for idx, (name, gender, values) in enumerate(rows):
 
         # Handle missing/null values
         valid_mask = ~np.isnan(values)
@@ -144,32 +169,62 @@ def extract_features(df, year_cols):
                        'early_presence', 'early_mean']:
                 feature_dict[key] = 0
 
-        features.append(feature_dict)
+        if not lean:
+            features.append(feature_dict)
+            continue
+        if matrix is None:
+            feature_cols = [key for key in feature_dict if key not in ('name', 'gender')]
+            matrix = np.zeros((len(df), len(feature_cols)), dtype=np.float32)
+        matrix[idx] = [feature_dict[key] for key in feature_cols]
+
+    if not lean:
+        return pd.DataFrame(features)
 
-    return pd.DataFrame(features)
+    features_df = pd.DataFrame(matrix, columns=feature_cols, copy=False)
+    features_df.insert(0, 'gender', pd.Categorical(df['gender']))
+    features_df.insert(0, 'name', pd.Categorical(df['name']))
+    return features_df
 
 
-def perform_clustering(features_df, n_clusters=8):
-    """Perform both k-means and HDBSCAN clustering."""
+def perform_clustering(features_df, n_clusters=8, lean=False):
+    """
+    Perform both k-means and HDBSCAN clustering (HDBSCAN only if installed).
+
+    n_clusters='auto' selects k with select_k.py. lean=True builds one
+    float32 matrix and scales it in place instead of copying the frame.
+    """
     # Select features for clustering (exclude name and gender)
     feature_cols = [col for col in features_df.columns if col not in ['name', 'gender']]
-    X = features_df[feature_cols].fillna(0)
+    if lean:
+        X = features_df[feature_cols].to_numpy(dtype=np.float32, na_value=0)
+    else:
+        X = features_df[feature_cols].fillna(0)
 
     # Standardize features
-    scaler = StandardScaler()
+    scaler = StandardScaler(copy=not lean)
     X_scaled = scaler.fit_transform(X)
 
     # PCA for visualization
     pca = PCA(n_components=2)
     X_pca = pca.fit_transform(X_scaled)
 
+    if n_clusters == 'auto':
+        from select_k import choose_k
+        n_clusters = choose_k(X_scaled)
+
     # K-means clustering
     kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
     features_df['cluster_kmeans'] = kmeans.fit_predict(X_scaled)
 
-    # HDBSCAN clustering
-    clusterer = hdbscan.HDBSCAN(min_cluster_size=50, min_samples=10)
-    features_df['cluster_hdbscan'] = clusterer.fit_predict(X_scaled)
+    # HDBSCAN clustering (imported here so loading this module stays light)
+    try:
+        import hdbscan
+    except ImportError:
+        print("Warning: HDBSCAN not available. Install with: pip install hdbscan")
+        features_df['cluster_hdbscan'] = -1
+    else:
+        clusterer = hdbscan.HDBSCAN(min_cluster_size=50, min_samples=10)
+        features_df['cluster_hdbscan'] = clusterer.fit_predict(X_scaled)
 
     return features_df, X_pca, pca, scaler
 
@@ -268,23 +323,62 @@ def plot_trajectory_examples(df, features_df, year_cols, output_dir='analysis_ou
     plt.close()
 
 
-def identify_archetypes(features_df):
-    """Identify and label archetypes based on cluster characteristics."""
+def count_levels(counts_df, year_cols):
+    """
+    The COUNT_LEVEL_FEATURES of each row of a raw count frame, computed as
+    in extract_features.
+    """
+    years = np.array([int(y) for y in year_cols])
+    recent_mask = (years >= 2020) & (years <= 2024)
+    early_mask = (years >= 1996) & (years <= 2000)
+    levels = np.zeros((len(counts_df), len(COUNT_LEVEL_FEATURES)))
+
+    for i, values in enumerate(counts_df[year_cols].to_numpy(dtype=float)):
+        valid_values = values[~np.isnan(values)]
+        if len(valid_values) == 0:
+            continue
+        trajectory = 0
+        if len(valid_values) >= 3:
+            first_third_mean = np.mean(valid_values[:len(valid_values)//3])
+            last_third_mean = np.mean(valid_values[-len(valid_values)//3:])
+            trajectory = (last_third_mean - first_third_mean) / (first_third_mean + 1)
+        recent_valid = values[recent_mask][~np.isnan(values[recent_mask])]
+        early_valid = values[early_mask][~np.isnan(values[early_mask])]
+        levels[i] = [np.max(valid_values), trajectory,
+                     np.mean(recent_valid) if len(recent_valid) > 0 else 0,
+                     np.mean(early_valid) if len(early_valid) > 0 else 0]
+
+    return pd.DataFrame(levels, columns=COUNT_LEVEL_FEATURES, index=counts_df.index)
+
+
+def identify_archetypes(features_df, counts_df=None, year_cols=None):
+    """
+    Identify and label archetypes based on cluster characteristics.
+
+    When the features were extracted from normalized counts, pass the raw
+    counts_df (rows in features_df order): the count-level statistics the
+    rules compare with birth-count thresholds are then taken from it.
+    """
     archetypes = []
+    levels = features_df[COUNT_LEVEL_FEATURES]
+    if counts_df is not None:
+        levels = count_levels(counts_df, year_cols).set_index(features_df.index)
 
     for cluster in sorted(features_df['cluster_kmeans'].unique()):
-        cluster_data = features_df[features_df['cluster_kmeans'] == cluster]
+        in_cluster = (features_df['cluster_kmeans'] == cluster).to_numpy()
+        cluster_data = features_df[in_cluster]
+        cluster_levels = levels[in_cluster]
 
         # Calculate cluster statistics
         stats = {
             'cluster': cluster,
             'count': len(cluster_data),
             'avg_years_present': cluster_data['years_present'].mean(),
-            'avg_peak_count': cluster_data['peak_count'].mean(),
-            'avg_trajectory': cluster_data['trajectory'].mean(),
+            'avg_peak_count': cluster_levels['peak_count'].mean(),
+            'avg_trajectory': cluster_levels['trajectory'].mean(),
             'avg_volatility': cluster_data['volatility'].mean(),
-            'avg_recent_mean': cluster_data['recent_mean'].mean(),
-            'avg_early_mean': cluster_data['early_mean'].mean(),
+            'avg_recent_mean': cluster_levels['recent_mean'].mean(),
+            'avg_early_mean': cluster_levels['early_mean'].mean(),
             'avg_longest_run': cluster_data['longest_run'].mean(),
         }
 
@@ -349,7 +443,7 @@ def identify_archetypes(features_df):
         stats['archetype'] = archetype_name
 
         # Get example names
-        examples = cluster_data.nlargest(5, 'peak_count')['name'].tolist()
+        examples = cluster_data['name'][cluster_levels['peak_count'].nlargest(5).index].tolist()
         stats['examples'] = ', '.join(examples[:3])
 
         archetypes.append(stats)
@@ -357,14 +451,47 @@ def identify_archetypes(features_df):
     return pd.DataFrame(archetypes)
 
 
-def main(min_avg_count=0, output_dir='analysis_output'):
-    """Main analysis pipeline."""
+def main(min_avg_count=0, output_dir='analysis_output', data_path='data/countTimeSeries.csv',
+         variant_groups=False, n_clusters=8, lean=False, unisex=False, normalize='raw'):
+    """
+    Main analysis pipeline (lean=True: float32/categorical frames, fewer copies).
+
+    normalize='share' or 'log_share' extracts features from births per
+    million (or its log1p) instead of raw counts, using the cached yearly
+    totals of data_path (normalize_counts.py); all clustering features are
+    then normalized. The min_avg_count filter, the cluster statistics used
+    to name archetypes (COUNT_LEVEL_FEATURES) and the trajectory plots still
+    use raw counts.
+
+    unisex=True clusters only the unisex segment: names given to both
+    genders (MIN_TOTAL births each) with a unisex score of at least
+    UNISEX_MIN_SCORE (cross_gender.py).
+    """
+    start_run(__file__, {'min_avg_count': min_avg_count, 'variant_groups': variant_groups, 'n_clusters': n_clusters,
+                         'lean': lean, 'unisex': unisex, 'normalize': normalize},
+              [data_path] if isinstance(data_path, (str, os.PathLike)) else data_path)
     print("Loading data...")
-    df, year_cols = load_data('data/countTimeSeries.csv')
+    df, year_cols = load_data(data_path, lean=lean)
     print(f"Loaded {len(df)} names with {len(year_cols)} years of data")
 
+    if unisex:
+        from cross_gender import UNISEX_MIN_SCORE, frame_unisex_scores
+        df = df[frame_unisex_scores(df, year_cols) >= UNISEX_MIN_SCORE].reset_index(drop=True)
+        print(f"Kept {len(df)} unisex names (score >= {UNISEX_MIN_SCORE}, both genders)")
+
+    # Optionally cluster spelling-variant groups (Isla/Islah) instead of names
+    if variant_groups:
+        from name_variants import group_count_frame
+        df = group_count_frame(df, year_cols).drop('variants', axis=1)
+        print(f"Combined into {len(df)} spelling-variant groups")
+
     # Filter by minimum average count if specified
-    if min_avg_count > 0:
+    if min_avg_count > 0 and lean:
+        print(f"\nFiltering names with average count >= {min_avg_count}...")
+        keep = df[year_cols].mean(axis=1).to_numpy() >= min_avg_count
+        print(f"Filtered to {keep.sum()} names ({len(df) - keep.sum()} excluded)")
+        df = df[keep].reset_index(drop=True)
+    elif min_avg_count > 0:
         print(f"\nFiltering names with average count >= {min_avg_count}...")
         df['avg_count'] = df[year_cols].apply(lambda row: row.astype(float).mean(), axis=1)
         df_filtered = df[df['avg_count'] >= min_avg_count].copy()
@@ -372,19 +499,25 @@ def main(min_avg_count=0, output_dir='analysis_output'):
         print(f"Filtered to {len(df_filtered)} names ({len(df) - len(df_filtered)} excluded)")
         df = df_filtered
 
+    counts_df = df
+    if normalize != 'raw':
+        from normalize_counts import normalize_frame
+        df = normalize_frame(df.copy(), year_cols, normalize, source=data_path)
+        print(f"Normalized counts to {normalize} (per million births of the same gender)")
+
     print("\nExtracting features...")
-    features_df = extract_features(df, year_cols)
+    features_df = extract_features(df, year_cols, lean=lean)
     print(f"Extracted {len(features_df.columns)} features")
 
     print("\nPerforming clustering...")
-    features_df, X_pca, pca, scaler = perform_clustering(features_df, n_clusters=8)
+    features_df, X_pca, pca, scaler = perform_clustering(features_df, n_clusters=n_clusters, lean=lean)
 
     print("\nCreating visualizations...")
     visualize_clusters(features_df, X_pca, output_dir=output_dir)
-    plot_trajectory_examples(df, features_df, year_cols, output_dir=output_dir)
+    plot_trajectory_examples(counts_df, features_df, year_cols, output_dir=output_dir)
 
     print("\nIdentifying archetypes...")
-    archetypes_df = identify_archetypes(features_df)
+    archetypes_df = identify_archetypes(features_df, counts_df if normalize != 'raw' else None, year_cols)
 
     # Print archetype summary
     print("\n" + "="*80)
@@ -400,8 +533,11 @@ def main(min_avg_count=0, output_dir='analysis_output'):
 
     # Save outputs
     print("\nSaving outputs...")
+    snapshot(f'{output_dir}/name_features.csv')
     features_df.to_csv(f'{output_dir}/name_features.csv', index=False)
+    write_columnar(features_df, f'{output_dir}/name_features.csv')
     archetypes_df.to_csv(f'{output_dir}/archetypes.csv', index=False)
+    write_columnar(archetypes_df, f'{output_dir}/archetypes.csv')
 
     # Create cluster summary
     cluster_summary = features_df.groupby('cluster_kmeans').agg({
@@ -413,6 +549,7 @@ def main(min_avg_count=0, output_dir='analysis_output'):
         'recent_mean': 'mean'
     }).round(2)
     cluster_summary.to_csv(f'{output_dir}/cluster_summary.csv')
+    write_columnar(cluster_summary, f'{output_dir}/cluster_summary.csv', index=True)
 
     print(f"\nAnalysis complete! Check the '{output_dir}' directory for results.")
     print("- clusters_pca_kmeans.png: PCA visualization of clusters")
@@ -421,10 +558,11 @@ def main(min_avg_count=0, output_dir='analysis_output'):
     print("- name_features.csv: Full feature dataset with cluster assignments")
     print("- archetypes.csv: Archetype descriptions and statistics")
     print("- cluster_summary.csv: Summary statistics per cluster")
+    print("- *.parquet, *.arrow: typed copies of the tables (columnar_outputs.py)")
 
 
 if __name__ == '__main__':
-    import sys
     min_avg = int(sys.argv[1]) if len(sys.argv) > 1 else 0
     output = sys.argv[2] if len(sys.argv) > 2 else 'analysis_output'
-    main(min_avg_count=min_avg, output_dir=output)
+    data = sys.argv[3:] or 'data/countTimeSeries.csv'
+    main(min_avg_count=min_avg, output_dir=output, data_path=data)
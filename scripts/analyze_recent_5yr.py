@@ -9,9 +9,15 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, os.path.dirname(__file__))
+from columnar_outputs import start_run, write_columnar
+from name_matrices import lean_frame, load_rank_frame
+
 # For clustering
 from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import KMeans
@@ -20,12 +26,10 @@ try:
     HDBSCAN_AVAILABLE = True
 except ImportError:
     HDBSCAN_AVAILABLE = False
-    print("Warning: HDBSCAN not available. Install with: pip install hdbscan")
 
 # Set up paths
 DATA_PATH = Path(__file__).parent.parent / 'data' / 'all_ranks.csv'
 OUTPUT_DIR = Path(__file__).parent.parent / 'analysis_output' / 'since_2020'
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 # Matplotlib settings
 plt.style.use('seaborn-v0_8-darkgrid')
@@ -35,8 +39,19 @@ sns.set_palette("husl")
 RECENT_YEARS = ['2020', '2021', '2022', '2023', '2024']
 
 
-def load_and_prepare_data():
-    """Load the CSV and extract only the last 5 years of data."""
+def load_and_prepare_data(data_paths=None):
+    """
+    Load the CSV and extract only the last 5 years of data.
+
+    If data_paths lists .npz sidecars (see name_matrices.py), the typed rank
+    matrices are loaded directly instead.
+    """
+    if data_paths:
+        print(f"Loading data from {', '.join(str(p) for p in data_paths)}...")
+        df_recent = load_rank_frame(data_paths)[['name'] + RECENT_YEARS]
+        print(f"Loaded {len(df_recent)} names with {len(RECENT_YEARS)} years (2020-2024)")
+        return df_recent
+
     print("Loading data from all_ranks.csv...")
     df = pd.read_csv(DATA_PATH)
 
@@ -181,14 +196,24 @@ def extract_features(df):
     return features
 
 
-def prepare_for_clustering(features):
-    """Prepare features for clustering by handling missing values and scaling."""
+def prepare_for_clustering(features, lean=False):
+    """
+    Prepare features for clustering by handling missing values and scaling.
+
+    lean=True fills and scales one float32 matrix in place instead of
+    copying the frame for each step.
+    """
     print("\nPreparing features for clustering...")
 
     # Select numeric features for clustering
     cluster_features = features.drop(['name', 'peak_year', 'first_year', 'last_year',
                                        'rank_2024', 'rank_2020', 'trajectory'], axis=1)
 
+    if lean:
+        X = cluster_features.to_numpy(dtype=np.float32, na_value=-1)
+        features_scaled = StandardScaler(copy=False).fit_transform(X)
+        return features_scaled, cluster_features.columns.tolist()
+
     # Fill NaN values with -1
     cluster_features_filled = cluster_features.fillna(-1)
 
@@ -200,7 +225,10 @@ def prepare_for_clustering(features):
 
 
 def perform_clustering(features_scaled, features, n_clusters=6):
-    """Perform both k-means and HDBSCAN clustering."""
+    """Perform both k-means and HDBSCAN clustering (n_clusters='auto' selects k, see select_k.py)."""
+    if n_clusters == 'auto':
+        from select_k import choose_k
+        n_clusters = choose_k(features_scaled)
     print(f"\nPerforming clustering with k={n_clusters}...")
 
     # K-Means clustering
@@ -213,6 +241,7 @@ def perform_clustering(features_scaled, features, n_clusters=6):
         features['hdbscan_cluster'] = clusterer.fit_predict(features_scaled)
         print(f"HDBSCAN found {features['hdbscan_cluster'].max() + 1} clusters")
     else:
+        print("Warning: HDBSCAN not available. Install with: pip install hdbscan")
         features['hdbscan_cluster'] = -1
 
     print(f"K-Means created {n_clusters} clusters")
@@ -325,6 +354,7 @@ def create_visualizations(features, df):
     fig, axes = plt.subplots(len(clusters), 1, figsize=(10, 3 * len(clusters)))
     if len(clusters) == 1:
         axes = [axes]
+    years = [int(year) for year in RECENT_YEARS]
 
     for cluster_idx, cluster in enumerate(clusters):
         ax = axes[cluster_idx]
@@ -334,7 +364,6 @@ def create_visualizations(features, df):
 
         for name in complete_names:
             name_data = df[df['name'] == name].iloc[0]
-            years = [int(year) for year in RECENT_YEARS]
             ranks = [name_data[year_str] if pd.notna(name_data[year_str]) else None for year_str in RECENT_YEARS]
 
             x_plot = []
@@ -447,6 +476,7 @@ def save_results(features):
 
     # Save full features with clusters
     features.to_csv(OUTPUT_DIR / 'features_with_clusters.csv', index=False)
+    write_columnar(features, OUTPUT_DIR / 'features_with_clusters.csv')
     print(f"Saved: features_with_clusters.csv ({len(features)} rows)")
 
     # Save cluster summaries
@@ -463,6 +493,7 @@ def save_results(features):
                                 'avg_peak_rank', 'avg_volatility', 'avg_trend_slope',
                                 'avg_rank']
     cluster_summary.to_csv(OUTPUT_DIR / 'cluster_summary.csv')
+    write_columnar(cluster_summary, OUTPUT_DIR / 'cluster_summary.csv', index=True)
     print("Saved: cluster_summary.csv")
 
     # Save archetype summary
@@ -476,6 +507,7 @@ def save_results(features):
     archetype_summary.columns = ['count', 'avg_years_present', 'avg_peak_rank',
                                   'avg_trend_slope', 'avg_rank']
     archetype_summary.to_csv(OUTPUT_DIR / 'archetype_summary.csv')
+    write_columnar(archetype_summary, OUTPUT_DIR / 'archetype_summary.csv', index=True)
     print("Saved: archetype_summary.csv")
 
     # Save trajectory summary
@@ -486,6 +518,7 @@ def save_results(features):
         'trend_slope': 'mean'
     }).round(2)
     trajectory_summary.to_csv(OUTPUT_DIR / 'trajectory_summary.csv')
+    write_columnar(trajectory_summary, OUTPUT_DIR / 'trajectory_summary.csv', index=True)
     print("Saved: trajectory_summary.csv")
 
     # Save example names per archetype
@@ -520,23 +553,30 @@ def save_results(features):
     print("Saved: notable_names.txt")
 
 
-def main():
-    """Main execution function."""
+def main(data_paths=None, n_clusters=6, lean=False):
+    """Main execution function (lean=True: float32 frames, categorical names)."""
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    start_run(__file__, {'n_clusters': n_clusters, 'lean': lean}, data_paths or [DATA_PATH])
+
     print("="*60)
     print("BABY NAME RECENT TRENDS ANALYSIS (2020-2024)")
     print("="*60)
 
     # Load data
-    df = load_and_prepare_data()
+    df = load_and_prepare_data(data_paths)
+    if lean:
+        lean_frame(df, category_columns=('name',))
 
     # Extract features
     features = extract_features(df)
+    if lean:
+        lean_frame(features, category_columns=('name',))
 
     # Prepare for clustering
-    features_scaled, feature_names = prepare_for_clustering(features)
+    features_scaled, feature_names = prepare_for_clustering(features, lean=lean)
 
     # Perform clustering
-    features = perform_clustering(features_scaled, features, n_clusters=6)
+    features = perform_clustering(features_scaled, features, n_clusters=n_clusters)
 
     # Identify archetypes
     features = identify_archetypes(features)
@@ -554,4 +594,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    main(sys.argv[1:])
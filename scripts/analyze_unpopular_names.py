@@ -10,9 +10,11 @@ import os
 # Import the main analysis functions
 sys.path.insert(0, os.path.dirname(__file__))
 from analyze_name_features import load_data, extract_features, perform_clustering, visualize_clusters, plot_trajectory_examples, identify_archetypes
+from columnar_outputs import start_run, write_columnar
 
 def main_unpopular(max_avg_count=500, output_dir='analysis_output/unpopular_names'):
     """Analyze names with average count BELOW threshold."""
+    start_run(__file__, {'max_avg_count': max_avg_count, 'n_clusters': 8}, ['data/countTimeSeries.csv'])
     print("Loading data...")
     df, year_cols = load_data('data/countTimeSeries.csv')
     print(f"Loaded {len(df)} names with {len(year_cols)} years of data")
@@ -59,7 +61,9 @@ def main_unpopular(max_avg_count=500, output_dir='analysis_output/unpopular_name
     # Save outputs
     print("\nSaving outputs...")
     features_df.to_csv(f'{output_dir}/name_features.csv', index=False)
+    write_columnar(features_df, f'{output_dir}/name_features.csv')
     archetypes_df.to_csv(f'{output_dir}/archetypes.csv', index=False)
+    write_columnar(archetypes_df, f'{output_dir}/archetypes.csv')
 
     # Create cluster summary
     cluster_summary = features_df.groupby('cluster_kmeans').agg({
@@ -71,6 +75,7 @@ def main_unpopular(max_avg_count=500, output_dir='analysis_output/unpopular_name
         'recent_mean': 'mean'
     }).round(2)
     cluster_summary.to_csv(f'{output_dir}/cluster_summary.csv')
+    write_columnar(cluster_summary, f'{output_dir}/cluster_summary.csv', index=True)
 
     print(f"\nAnalysis complete! Check the '{output_dir}' directory for results.")
     print("- clusters_pca_kmeans.png: PCA visualization of clusters")
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Build an embedded SQLite database of the name data.
+
+Every consumer currently re-reads whole JSON or CSV files. This stage loads
+the same records into one SQLite file (data/names.db) so point lookups and
+"top N in year Y" queries hit an index instead, and analysis scripts can
+pull just the subset they need.
+
+Tables:
+- names(id, name, gender, rank, count): one row per name and gender, with
+  the 2024 rank and count; unique on (name, gender)
+- yearly(name_id, year, rank, count): one row per name and year with a
+  count, keyed on (name_id, year); indexed on (year, rank)
+- historic(name_id, year, rank): historic top-100 ranks, indexed on
+  (year, rank)
+- features(name_id, ...): numeric columns of a features CSV from the
+  analysis scripts (e.g. analysis_output/name_features.csv)
+- clusters(name_id, source, cluster): one row per name and cluster_*
+  column of that CSV
+
+Rows are bulk-inserted in one transaction with journaling off, and the
+secondary indexes are built after the load.
+
+Usage:
+    python scripts/build_names_db.py [--features analysis_output/name_features.csv] [data/boys.npz data/girls.npz]
+    python scripts/generate_names_json.py --db data/names.db
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+DB_PATH = DATA_DIR / 'names.db'
+
+YEARS = list(range(1996, 2025))
+HISTORIC_YEARS = list(range(1904, 2025, 10))
+
+GENDER_LABELS = {
+    'boys': 'Boy',
+    'girls': 'Girl',
+}
+
+SCHEMA = """
+CREATE TABLE names (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    gender TEXT NOT NULL,
+    rank INTEGER,
+    count INTEGER,
+    UNIQUE (name, gender)
+);
+CREATE TABLE yearly (
+    name_id INTEGER NOT NULL REFERENCES names(id),
+    year INTEGER NOT NULL,
+    rank INTEGER,
+    count INTEGER,
+    PRIMARY KEY (name_id, year)
+) WITHOUT ROWID;
+CREATE TABLE historic (
+    name_id INTEGER NOT NULL REFERENCES names(id),
+    year INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    PRIMARY KEY (name_id, year)
+) WITHOUT ROWID;
+CREATE TABLE clusters (
+    name_id INTEGER NOT NULL REFERENCES names(id),
+    source TEXT NOT NULL,
+    cluster INTEGER NOT NULL,
+    PRIMARY KEY (name_id, source)
+) WITHOUT ROWID;
+"""
+
+INDEXES = """
+CREATE INDEX yearly_year_rank ON yearly (year, rank);
+CREATE INDEX historic_year_rank ON historic (year, rank);
+CREATE INDEX clusters_source ON clusters (source, cluster);
+"""
+
+
+def write_database(results, db_path=DB_PATH):
+    """
+    Write typed generator records to a fresh database.
+
+    results maps a gender key ('boys', 'girls') to its list of records (as
+    returned by generate_names_json.build_all). Returns the row counts.
+    """
+    db_path = Path(db_path)
+    db_path.unlink(missing_ok=True)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.executescript(SCHEMA)
+
+    names, yearly, historic = [], [], []
+    for gender, records in results.items():
+        label = GENDER_LABELS[gender]
+        for record in records:
+            name_id = len(names) + 1
+            names.append((name_id, record['name'], label, record['rank'], record['count']))
+            for year, rank, count in zip(YEARS, record['rankFrom1996'], record['countFrom1996']):
+                if rank is not None or count is not None:
+                    yearly.append((name_id, year, rank, count))
+            for year, rank in zip(HISTORIC_YEARS, record['rankHistoric']):
+                if rank is not None:
+                    historic.append((name_id, year, rank))
+
+    with conn:
+        conn.executemany('INSERT INTO names VALUES (?, ?, ?, ?, ?)', names)
+        conn.executemany('INSERT INTO yearly VALUES (?, ?, ?, ?)', yearly)
+        conn.executemany('INSERT INTO historic VALUES (?, ?, ?)', historic)
+    conn.executescript(INDEXES)
+    conn.execute('ANALYZE')
+    conn.close()
+
+    return {'names': len(names), 'yearly': len(yearly), 'historic': len(historic)}
+
+
+def records_from_npz(paths):
+    """Rebuild typed records per gender from .npz sidecars (see name_matrices.py)."""
+    from name_matrices import MISSING, gender_from_path, load_npz
+
+    results = {}
+    labels = {label: gender for gender, label in GENDER_LABELS.items()}
+    for path in paths:
+        data = load_npz(path)
+        records = []
+        for name, ranks, counts, historic in zip(data['names'], data['rank'].tolist(),
+                                                 data['count'].tolist(), data['historic'].tolist()):
+            ranks = [None if v == MISSING else v for v in ranks]
+            counts = [None if v == MISSING else v for v in counts]
+            records.append({
+                'name': str(name),
+                'rank': ranks[-1],
+                'count': counts[-1],
+                'rankFrom1996': ranks,
+                'countFrom1996': counts,
+                'rankHistoric': [None if v == MISSING else v for v in historic],
+            })
+        results[labels[gender_from_path(path)]] = records
+    return results
+
+
+def load_features(db_path, csv_path):
+    """
+    Add a features CSV (name, gender, feature columns, cluster_* columns)
+    as the features and clusters tables. Returns the number of rows matched.
+    """
+    conn = sqlite3.connect(db_path)
+    ids = {(name, gender): name_id for name_id, name, gender in conn.execute('SELECT id, name, gender FROM names')}
+
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        cluster_cols = [col for col in reader.fieldnames if col.startswith('cluster_')]
+        feature_cols = [col for col in reader.fieldnames
+                        if col not in ('name', 'gender') and col not in cluster_cols]
+        features, clusters = [], []
+        for row in reader:
+            name_id = ids.get((row['name'], row['gender']))
+            if name_id is None:
+                continue
+            features.append([name_id] + [float(row[col]) if row[col] else None for col in feature_cols])
+            clusters.extend((name_id, col[len('cluster_'):], int(float(row[col])))
+                            for col in cluster_cols if row[col])
+
+    columns = ', '.join(f'"{col}" REAL' for col in feature_cols)
+    with conn:
+        conn.execute('DROP TABLE IF EXISTS features')
+        conn.execute(f'CREATE TABLE features (name_id INTEGER PRIMARY KEY REFERENCES names(id), {columns})')
+        conn.executemany(f'INSERT INTO features VALUES ({", ".join("?" * (len(feature_cols) + 1))})', features)
+        conn.execute('DELETE FROM clusters')
+        conn.executemany('INSERT OR REPLACE INTO clusters VALUES (?, ?, ?)', clusters)
+    conn.close()
+    return len(features)
+
+
+def connect(db_path=DB_PATH):
+    """Open the database read-only."""
+    return sqlite3.connect(f'file:{Path(db_path).resolve()}?mode=ro', uri=True)
+
+
+def lookup(conn, name, gender=None):
+    """(name, gender, rank, count) rows for a name, optionally for one gender."""
+    if gender:
+        return conn.execute('SELECT name, gender, rank, count FROM names WHERE name = ? AND gender = ?',
+                            (name, gender)).fetchall()
+    return conn.execute('SELECT name, gender, rank, count FROM names WHERE name = ?', (name,)).fetchall()
+
+
+def top_n(conn, year, gender, n=10):
+    """(rank, name, count) for the top n names of one gender in a year (1996 onwards)."""
+    return conn.execute(
+        'SELECT y.rank, n.name, y.count FROM yearly y JOIN names n ON n.id = y.name_id '
+        'WHERE y.year = ? AND y.rank IS NOT NULL AND n.gender = ? ORDER BY y.rank LIMIT ?',
+        (year, gender, n),
+    ).fetchall()
+
+
+def trajectory(conn, name, gender):
+    """(year, rank, count) rows for one name, in year order."""
+    return conn.execute(
+        'SELECT y.year, y.rank, y.count FROM yearly y JOIN names n ON n.id = y.name_id '
+        'WHERE n.name = ? AND n.gender = ? ORDER BY y.year',
+        (name, gender),
+    ).fetchall()
+
+
+def query_frame(sql, params=(), db_path=DB_PATH):
+    """Run a query and return a pandas DataFrame, for analysis scripts that need a subset."""
+    import pandas as pd
+
+    with connect(db_path) as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+def benchmark(conn, repeats=2000):
+    """Mean time in microseconds of a point lookup and a top-20 query."""
+    timings = {}
+    for label, query in (('lookup', lambda: lookup(conn, 'Arthur', 'Boy')),
+                         ('top 20', lambda: top_n(conn, 2024, 'Girl', 20)),
+                         ('trajectory', lambda: trajectory(conn, 'Olivia', 'Girl'))):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            query()
+        timings[label] = (time.perf_counter() - start) / repeats * 1e6
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the SQLite name database.')
+    parser.add_argument('--output', type=Path, default=DB_PATH)
+    parser.add_argument('--features', type=Path, default=None,
+                        help='Features CSV with name, gender and cluster_* columns to load as well')
+    parser.add_argument('paths', nargs='*', help='.npz sidecars (default: data/boys.npz data/girls.npz)')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = records_from_npz(args.paths or [DATA_DIR / 'boys.npz', DATA_DIR / 'girls.npz'])
+    counts = write_database(results, args.output)
+    print(f"✓ Built {args.output} in {time.perf_counter() - start:.2f}s "
+          f"({args.output.stat().st_size / 1024 / 1024:.1f} MB)")
+    print(f"  {counts['names']} names, {counts['yearly']} yearly rows, {counts['historic']} historic rows")
+
+    if args.features:
+        print(f"  Loaded features for {load_features(args.output, args.features)} names from {args.features}")
+
+    with connect(args.output) as conn:
+        for label, micros in benchmark(conn).items():
+            print(f"  {label:<11} {micros:7.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
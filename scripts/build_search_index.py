@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Build a precomputed, sharded search index from boys.json and girls.json.
+
+The browser search currently downloads /search-index.json with every name
+and builds a Fuse.js index on the client. This stage does that work at
+build time and writes one small shard per first letter, so a client only
+needs the shard for the first character typed.
+
+Each shard (search/{letter}.json) holds:
+- entries:   [name, slug, gender, rank, count] rows ordered by current
+             (2024) count, most popular first. An entry's position is its
+             id, so lower ids are more popular.
+- prefixes:  a prefix trie flattened by node path: every prefix of up to
+             PREFIX_DEPTH characters maps to the ids of its TOP_K most
+             popular completions. Longer prefixes filter the entries.
+- trigrams:  posting lists of entry ids for every trigram of the folded
+             name, in id order (so already ranked by popularity), for
+             substring and fuzzy matching.
+
+search/index.json lists the shards with their sizes.
+
+Names are matched lowercased with accents folded (fold_name: 'Élodie' is
+filed under 'e' and found by 'elo'), so a client folds the query the same
+way before picking the shard.
+
+Usage:
+    python scripts/build_search_index.py [--output-dir data/search]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(__file__))
+from compact_json import fold_name, load_records
+
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+OUTPUT_DIR = DATA_DIR / 'search'
+
+SEARCH_FORMAT = 'names-search/1'
+PREFIX_DEPTH = 4
+TOP_K = 10
+
+SOURCES = [
+    ('boys.json', 'boy'),
+    ('girls.json', 'girl'),
+]
+
+
+def create_slug(name):
+    """Same slug rule as createSlug in .eleventy.js."""
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def shard_letter(name):
+    """First letter of the accent-folded name ('Élodie' -> 'e'), or '_' for anything else."""
+    folded = re.sub(r'[^a-z0-9]+', '', fold_name(name))
+    return folded[0] if folded[:1].isalpha() else '_'
+
+
+def trigrams(text):
+    """Distinct trigrams of a folded name (the whole name if shorter)."""
+    text = fold_name(text)
+    if len(text) < 3:
+        return {text} if text else set()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def load_entries(data_dir=DATA_DIR):
+    """Load [name, slug, gender, rank, count] entries for both genders."""
+    entries = []
+    for filename, gender in SOURCES:
+        path = Path(data_dir) / filename
+        if not path.exists():
+            print(f"  Skipping {path} (not found)")
+            continue
+        records = load_records(path)
+        for record in records:
+            entries.append([
+                record['name'],
+                record.get('uniqueSlug') or create_slug(record['name']),
+                gender,
+                record.get('rank'),
+                record.get('count') or 0,
+            ])
+        print(f"  Loaded {len(records)} {gender} names from {path}")
+    return entries
+
+
+def build_shard(entries):
+    """Build one shard from its entries (any order)."""
+    entries = sorted(entries, key=lambda e: (-e[4], fold_name(e[0]), e[2]))
+
+    prefixes = {}
+    postings = {}
+    for entry_id, entry in enumerate(entries):
+        folded = fold_name(entry[0])
+        for depth in range(1, min(len(folded), PREFIX_DEPTH) + 1):
+            ids = prefixes.setdefault(folded[:depth], [])
+            if len(ids) < TOP_K:
+                ids.append(entry_id)
+        for gram in trigrams(folded):
+            postings.setdefault(gram, []).append(entry_id)
+
+    return {
+        'format': SEARCH_FORMAT,
+        'prefixDepth': PREFIX_DEPTH,
+        'entries': entries,
+        'prefixes': prefixes,
+        'trigrams': postings,
+    }
+
+
+def build_index(entries, output_dir=OUTPUT_DIR):
+    """Write the shards and index.json; returns the index manifest."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    by_letter = {}
+    for entry in entries:
+        by_letter.setdefault(shard_letter(entry[0]), []).append(entry)
+
+    manifest = {
+        'format': SEARCH_FORMAT,
+        'prefixDepth': PREFIX_DEPTH,
+        'topK': TOP_K,
+        'total': len(entries),
+        'shards': {},
+    }
+    for letter in sorted(by_letter):
+        filename = f'{letter}.json'
+        path = output_dir / filename
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(build_shard(by_letter[letter]), f, separators=(',', ':'), ensure_ascii=False)
+        manifest['shards'][letter] = {
+            'file': filename,
+            'count': len(by_letter[letter]),
+            'bytes': path.stat().st_size,
+        }
+
+    with open(output_dir / 'index.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, separators=(',', ':'), ensure_ascii=False)
+
+    return manifest
+
+
+def search(shard, query, limit=TOP_K):
+    """
+    Reference lookup against a loaded shard: prefix matches first, then
+    trigram matches ranked by shared trigrams and popularity.
+    """
+    query = fold_name(query)
+    entries = shard['entries']
+
+    if len(query) <= shard['prefixDepth'] and query in shard['prefixes']:
+        ids = shard['prefixes'][query]
+    else:
+        ids = [i for i, e in enumerate(entries) if fold_name(e[0]).startswith(query)][:limit]
+
+    if len(ids) < limit:
+        scores = {}
+        for gram in trigrams(query):
+            for entry_id in shard['trigrams'].get(gram, []):
+                scores[entry_id] = scores.get(entry_id, 0) + 1
+        seen = set(ids)
+        ranked = sorted((i for i in scores if i not in seen), key=lambda i: (-scores[i], i))
+        ids = list(ids) + ranked[:limit - len(ids)]
+
+    return [entries[i] for i in ids[:limit]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the sharded search index.')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR)
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    print("Loading names...")
+    entries = load_entries(args.data_dir)
+
+    print(f"Building search index for {len(entries)} names...")
+    manifest = build_index(entries, args.output_dir)
+    elapsed = time.perf_counter() - start
+
+    sizes = [shard['bytes'] for shard in manifest['shards'].values()]
+    largest = max(manifest['shards'].items(), key=lambda item: item[1]['bytes'])
+    print(f"✓ Wrote {len(sizes)} shards to {args.output_dir}")
+    print(f"  Total index size: {sum(sizes) / 1024 / 1024:.2f} MB")
+    print(f"  Largest shard: {largest[0]} ({largest[1]['bytes'] / 1024:.0f} KB, {largest[1]['count']} names)")
+    print(f"  Median shard: {sorted(sizes)[len(sizes) // 2] / 1024:.0f} KB")
+    print(f"  Build time: {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Find the years a name broke out, collapsed or spiked.
+
+Two detectors over the log counts (log1p) of every name at once:
+
+- Changepoints: exact optimal partitioning of each series into straight-line
+  segments (least-squares cost, at least MIN_SEGMENT years each), with a
+  penalty per extra segment of PENALTY * sigma^2 * log(T). A steady rise is
+  one segment; a breakout or collapse is a jump in level or a change of
+  slope. sigma is a robust per-name noise level (MAD of second
+  differences), so a jittery small name needs a bigger shift than a steady
+  large one. With 29 years the full dynamic programme is cheap: segment
+  costs come from cumulative sums and every step is one vector operation
+  over all names.
+- Spikes: years whose log count sits far from the centred SPIKE_WINDOW-year
+  rolling median, scored as a robust z-score (0.6745 * deviation / MAD of
+  the name's deviations); a large |z| with a big enough move marks a
+  one-off surge or dip.
+
+Each changepoint is reported as [year, jump, growth]: year is the first year
+of the new segment, jump the ratio of its fitted count to the old segment's
+trend carried one year on, and growth the ratio of the new yearly growth
+factor to the old one (above 1 is a breakout, below 1 a collapse). Spikes
+are [year, z].
+
+Output: data/name-changepoints.json, keyed by 'Name|Gender', with fields
+changepoints and spikes, ready to merge with `generate_names_json.py
+--merge`. Every name is run (all 41k take a couple of seconds); only
+names with at least one event are written. For rare names (peak count under
+10) the changepoints mostly mark entering or leaving the published table,
+since counts below 3 are not published.
+
+Usage:
+    python scripts/changepoints.py [penalty] [data/boys.npz data/girls.npz]
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+sys.path.insert(0, os.path.dirname(__file__))
+from name_matrices import load_count_matrix
+
+
+OUTPUT_FILE = Path(__file__).parent.parent / 'data' / 'name-changepoints.json'
+
+PENALTY = 10.0
+MIN_SEGMENT = 3
+MIN_SIGMA = 0.05
+SPIKE_WINDOW = 5
+SPIKE_Z = 3.5
+SPIKE_MIN_RATIO = 1.5
+MIN_SPIKE_COUNT = 20
+
+
+def robust_sigma(y):
+    """
+    Per-row noise level from the MAD of second differences, which a steady
+    trend does not inflate (Var of a second difference is 6 sigma^2).
+    """
+    diffs = np.diff(y, n=2, axis=1)
+    mad = np.median(np.abs(diffs - np.median(diffs, axis=1, keepdims=True)), axis=1)
+    return np.maximum(1.4826 * mad / np.sqrt(6), MIN_SIGMA)
+
+
+def _prefix_sums(y):
+    """Cumulative sums of 1, t, t^2, y, t*y and y^2 along each row, with a leading 0."""
+    n, length = y.shape
+    t = np.arange(length, dtype=float)
+    sums = {
+        'n': np.arange(length + 1, dtype=float),
+        't': np.concatenate([[0.0], np.cumsum(t)]),
+        'tt': np.concatenate([[0.0], np.cumsum(t ** 2)]),
+    }
+    for key, values in (('y', y), ('ty', y * t), ('yy', y ** 2)):
+        sums[key] = np.hstack([np.zeros((n, 1)), np.cumsum(values, axis=1)])
+    return sums
+
+
+def segment_cost(sums, begin, end):
+    """Residual sum of squares of a least-squares line through y[:, begin:end], per row."""
+    n = sums['n'][end] - sums['n'][begin]
+    st = sums['t'][end] - sums['t'][begin]
+    stt = sums['tt'][end] - sums['tt'][begin]
+    sy = sums['y'][:, end] - sums['y'][:, begin]
+    sty = sums['ty'][:, end] - sums['ty'][:, begin]
+    syy = sums['yy'][:, end] - sums['yy'][:, begin]
+    sxx = stt - st ** 2 / n
+    sxy = sty - st * sy / n
+    return np.maximum(syy - sy ** 2 / n - sxy ** 2 / sxx, 0.0)
+
+
+def segment_changepoints(y, penalty=PENALTY, min_segment=MIN_SEGMENT):
+    """
+    Optimal partitioning of every row of y into straight-line segments.
+
+    Returns an (N, T) boolean matrix, True at the first index of each segment
+    after the first.
+    """
+    n, length = y.shape
+    sums = _prefix_sums(y)
+    beta = penalty * robust_sigma(y) ** 2 * np.log(length)
+
+    # best[e]: cost of the best segmentation of y[:, :e]; start[e]: where its last segment begins
+    best = np.full((length + 1, n), np.inf)
+    best[0] = -beta
+    start = np.zeros((length + 1, n), dtype=np.int64)
+    for end in range(min_segment, length + 1):
+        for begin in range(0, end - min_segment + 1):
+            if begin and begin < min_segment:
+                continue
+            candidate = best[begin] + segment_cost(sums, begin, end) + beta
+            better = candidate < best[end]
+            best[end][better] = candidate[better]
+            start[end][better] = begin
+
+    breaks = np.zeros((n, length), dtype=bool)
+    rows = np.arange(n)
+    position = np.full(n, length)
+    for _ in range(length // min_segment):
+        begin = start[position, rows]
+        inner = begin > 0
+        breaks[rows[inner], begin[inner]] = True
+        position = np.where(inner, begin, 0)
+    return breaks
+
+
+def segment_fits(y, breaks):
+    """
+    Least-squares line of each row's segments, broadcast back to (N, T).
+
+    Returns (fitted, slope): the fitted value and the segment's slope at
+    every year.
+    """
+    n, length = y.shape
+    segment = np.cumsum(breaks, axis=1)
+    n_segments = segment.max() + 1
+    index = (segment + np.arange(n)[:, None] * n_segments).ravel()
+    t = np.broadcast_to(np.arange(length, dtype=float), y.shape).ravel()
+
+    def total(weights=None):
+        return np.bincount(index, weights=weights, minlength=n * n_segments)
+
+    size = np.maximum(total(), 1)
+    mean_t = total(t) / size
+    mean_y = total(y.ravel()) / size
+    sxx = total(t ** 2) - size * mean_t ** 2
+    sxy = total(t * y.ravel()) - size * mean_t * mean_y
+    slope = np.divide(sxy, sxx, out=np.zeros_like(sxy), where=sxx > 0)
+    fitted = mean_y[index] + slope[index] * (t - mean_t[index])
+    return fitted.reshape(y.shape), slope[index].reshape(y.shape)
+
+
+def spike_scores(y, window=SPIKE_WINDOW):
+    """
+    Robust z-score of each value against its centred rolling median.
+
+    Returns (z, residual), residual being the log distance from the median.
+    """
+    half = window // 2
+    padded = np.pad(y, ((0, 0), (half, half)), mode='edge')
+    residual = y - np.median(sliding_window_view(padded, window, axis=1), axis=2)
+    centre = np.median(residual, axis=1, keepdims=True)
+    mad = np.median(np.abs(residual - centre), axis=1, keepdims=True)
+    return 0.6745 * (residual - centre) / np.maximum(mad, MIN_SIGMA / 1.4826), residual
+
+
+def detect(counts, penalty=PENALTY):
+    """
+    Run both detectors on a count matrix.
+
+    Returns (breaks, jumps, growth, spikes, z): the changepoint mask; at
+    each changepoint the level jump and the change in yearly growth, both as
+    factors (1 elsewhere); the spike mask and the spike z-scores. A spike
+    needs |z| >= SPIKE_Z, a count at least SPIKE_MIN_RATIO times above or
+    below the rolling median, and MIN_SPIKE_COUNT births in the year or
+    around it.
+    """
+    y = np.log1p(counts)
+    breaks = segment_changepoints(y, penalty)
+    fitted, slope = segment_fits(y, breaks)
+    jumps = np.ones_like(y)
+    growth = np.ones_like(y)
+    jumps[:, 1:] = np.exp(fitted[:, 1:] - (fitted[:, :-1] + slope[:, :-1]))
+    growth[:, 1:] = np.exp(slope[:, 1:] - slope[:, :-1])
+    z, residual = spike_scores(y)
+    spikes = ((np.abs(z) >= SPIKE_Z) & (np.abs(residual) >= np.log(SPIKE_MIN_RATIO))
+              & (np.maximum(counts, np.expm1(y - residual)) >= MIN_SPIKE_COUNT))
+    return breaks, jumps, growth, spikes, z
+
+
+def main(penalty=PENALTY, source=None, output_file=OUTPUT_FILE):
+    start = time.perf_counter()
+    print("Loading count matrix...")
+    names, genders, years, counts = load_count_matrix(source)
+    print(f"  {len(names)} names")
+
+    detect_start = time.perf_counter()
+    breaks, jumps, growth, spikes, z = detect(counts, penalty)
+    print(f"Detected {breaks.sum()} changepoints and {spikes.sum()} spikes "
+          f"in {time.perf_counter() - detect_start:.2f}s")
+
+    events = {}
+    for i in np.flatnonzero(breaks.any(axis=1) | spikes.any(axis=1)):
+        events[f'{names[i]}|{genders[i]}'] = {
+            'changepoints': [[int(years[t]), round(float(jumps[i, t]), 2), round(float(growth[i, t]), 2)]
+                             for t in np.flatnonzero(breaks[i])],
+            'spikes': [[int(years[t]), round(float(z[i, t]), 1)] for t in np.flatnonzero(spikes[i])],
+        }
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(events, f, separators=(',', ':'), ensure_ascii=False)
+    print(f"✓ Saved events for {len(events)} names to {output_file}")
+
+    for key in ('Arthur|Boy', 'Isla|Girl', 'Khaleesi|Girl'):
+        if key in events:
+            print(f"  {key}: changepoints {events[key]['changepoints']}, spikes {events[key]['spikes']}")
+
+    print(f"\nDone in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    penalty_arg = float(sys.argv[1]) if len(sys.argv) > 1 else PENALTY
+    main(penalty=penalty_arg, source=sys.argv[2:] or None)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Out-of-core feature extraction and clustering for very large name tables.
+
+analyze_name_features.py loads the whole CSV into one frame before any work
+starts. This module runs the same feature functions over fixed-size row
+blocks instead, so peak memory depends on the block size, not the number of
+names:
+
+1. The CSV is read in blocks and extract_features runs per block.
+2. Each block's features are appended to an on-disk columnar store: one raw
+   float64 file per numeric column, one text file per string column, and a
+   schema.json describing them.
+3. A StandardScaler is fitted by streaming mean/variance (partial_fit) as
+   blocks are written.
+4. MiniBatchKMeans is fitted with partial_fit over memory-mapped blocks of
+   the store, and the labels are appended as another column.
+
+Usage:
+    python scripts/chunked_features.py [input_csv] [output_dir] [block_size]
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, os.path.dirname(__file__))
+from analyze_name_features import extract_features
+
+
+DEFAULT_BLOCK_SIZE = 5000
+STRING_COLUMNS = ['name', 'gender']
+
+
+def iter_blocks(filepath, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Yield (block_df, year_cols) for fixed-size row blocks of a count CSV.
+
+    Each block has the same layout as analyze_name_features.load_data:
+    numeric year columns plus 'name' and 'gender'.
+    """
+    for block in pd.read_csv(filepath, chunksize=block_size):
+        first_col = block.columns[0]
+        block[['name', 'gender']] = block[first_col].str.split('|', expand=True)
+        block = block.drop(first_col, axis=1)
+
+        year_cols = [col for col in block.columns if col not in STRING_COLUMNS]
+        for col in year_cols:
+            block[col] = pd.to_numeric(block[col], errors='coerce')
+
+        yield block, year_cols
+
+
+class ColumnarFeatureWriter:
+    """Append feature blocks to a directory of per-column files."""
+
+    def __init__(self, out_dir):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.numeric_columns = None
+        self.rows = 0
+
+    def append(self, features_df):
+        if self.numeric_columns is None:
+            self.numeric_columns = [col for col in features_df.columns if col not in STRING_COLUMNS]
+            for col in STRING_COLUMNS + self.numeric_columns:
+                self._path(col).unlink(missing_ok=True)
+
+        for col in STRING_COLUMNS:
+            with open(self._path(col), 'a', encoding='utf-8') as f:
+                f.writelines(f'{value}\n' for value in features_df[col])
+
+        for col in self.numeric_columns:
+            values = features_df[col].to_numpy(dtype=np.float64, na_value=0.0)
+            with open(self._path(col), 'ab') as f:
+                f.write(values.tobytes())
+
+        self.rows += len(features_df)
+
+    def append_column(self, col, values):
+        """Append values to a numeric column added after the first pass."""
+        if col not in self.numeric_columns:
+            self.numeric_columns.append(col)
+            self._path(col).unlink(missing_ok=True)
+        with open(self._path(col), 'ab') as f:
+            f.write(np.asarray(values, dtype=np.float64).tobytes())
+
+    def close(self):
+        """Write schema.json; safe to call again after appending columns."""
+        schema = {
+            'rows': self.rows,
+            'string_columns': STRING_COLUMNS,
+            'numeric_columns': self.numeric_columns or [],
+            'dtype': 'float64',
+        }
+        with open(self.out_dir / 'schema.json', 'w') as f:
+            json.dump(schema, f, indent=2)
+
+    def _path(self, col):
+        suffix = '.txt' if col in STRING_COLUMNS else '.f64'
+        return self.out_dir / f'{col}{suffix}'
+
+
+def open_feature_columns(out_dir, columns=None):
+    """
+    Memory-map numeric columns of a columnar feature store.
+
+    Returns (schema, {column: np.memmap}); nothing is read until sliced.
+    """
+    out_dir = Path(out_dir)
+    with open(out_dir / 'schema.json') as f:
+        schema = json.load(f)
+    columns = columns or schema['numeric_columns']
+    return schema, {
+        col: np.memmap(out_dir / f'{col}.f64', dtype=np.float64, mode='r', shape=(schema['rows'],))
+        for col in columns
+    }
+
+
+def iter_feature_blocks(columns, rows, block_size=DEFAULT_BLOCK_SIZE):
+    """Yield (start, X_block) matrices assembled from memory-mapped columns."""
+    names = list(columns)
+    for start in range(0, rows, block_size):
+        stop = min(start + block_size, rows)
+        yield start, np.column_stack([columns[col][start:stop] for col in names])
+
+
+def extract_to_store(filepath, out_dir, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Extract features block by block into a columnar store.
+
+    Returns (writer, scaler, feature_cols) with the scaler already fitted by
+    streaming mean and variance over every block.
+    """
+    writer = ColumnarFeatureWriter(out_dir)
+    scaler = StandardScaler()
+
+    for block_number, (block, year_cols) in enumerate(iter_blocks(filepath, block_size), start=1):
+        features_df = extract_features(block, year_cols)
+        writer.append(features_df)
+        feature_cols = writer.numeric_columns
+        scaler.partial_fit(features_df[feature_cols].fillna(0).to_numpy(dtype=np.float64))
+        print(f"  Block {block_number}: {writer.rows} names processed")
+
+    writer.close()
+    return writer, scaler, list(writer.numeric_columns)
+
+
+def cluster_store(writer, scaler, feature_cols, n_clusters=8, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Fit MiniBatchKMeans over the store and append a cluster_kmeans column.
+
+    Two passes over memory-mapped blocks: one to fit, one to predict.
+    Raises ValueError if the store has fewer rows than n_clusters.
+    """
+    if writer.rows < n_clusters:
+        raise ValueError(f"{writer.rows} names cannot be split into {n_clusters} clusters")
+    _, columns = open_feature_columns(writer.out_dir, feature_cols)
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=42, batch_size=block_size, n_init=3)
+
+    pending = []
+    for _, X in iter_feature_blocks(columns, writer.rows, block_size):
+        # partial_fit needs at least n_clusters samples in its first call:
+        # small leading blocks are held back and fitted together
+        if not hasattr(kmeans, 'cluster_centers_'):
+            pending.append(X)
+            if sum(len(block) for block in pending) < n_clusters:
+                continue
+            X, pending = np.vstack(pending), []
+        kmeans.partial_fit(scaler.transform(X))
+
+    for _, X in iter_feature_blocks(columns, writer.rows, block_size):
+        writer.append_column('cluster_kmeans', kmeans.predict(scaler.transform(X)))
+
+    writer.close()
+    return kmeans
+
+
+def summarize_store(out_dir, block_size=DEFAULT_BLOCK_SIZE):
+    """Per-cluster means of the summary features, accumulated block by block."""
+    summary_cols = ['years_present', 'peak_count', 'trajectory', 'volatility', 'recent_mean']
+    schema, columns = open_feature_columns(out_dir, ['cluster_kmeans'] + summary_cols)
+
+    sums = {}
+    counts = {}
+    for _, X in iter_feature_blocks(columns, schema['rows'], block_size):
+        labels = X[:, 0].astype(int)
+        for label in np.unique(labels):
+            mask = labels == label
+            sums[label] = sums.get(label, 0) + X[mask, 1:].sum(axis=0)
+            counts[label] = counts.get(label, 0) + int(mask.sum())
+
+    summary = pd.DataFrame(
+        [sums[label] / counts[label] for label in sorted(sums)],
+        columns=summary_cols,
+        index=pd.Index(sorted(sums), name='cluster_kmeans'),
+    )
+    summary.insert(0, 'name', [counts[label] for label in sorted(sums)])
+    return summary.round(2)
+
+
+def main(filepath='data/countTimeSeries.csv', output_dir='analysis_output/chunked',
+         block_size=DEFAULT_BLOCK_SIZE, n_clusters=8):
+    """Chunked feature extraction and clustering pipeline."""
+    store_dir = Path(output_dir) / 'features'
+
+    print(f"Extracting features from {filepath} in blocks of {block_size}...")
+    writer, scaler, feature_cols = extract_to_store(filepath, store_dir, block_size)
+    print(f"Extracted {len(feature_cols)} features for {writer.rows} names")
+
+    if writer.rows < n_clusters:
+        sys.exit(f"Only {writer.rows} names in {filepath}: need at least k={n_clusters} to cluster")
+    print(f"\nClustering with MiniBatchKMeans (k={n_clusters})...")
+    cluster_store(writer, scaler, feature_cols, n_clusters=n_clusters, block_size=block_size)
+
+    cluster_summary = summarize_store(store_dir, block_size)
+    cluster_summary.to_csv(Path(output_dir) / 'cluster_summary.csv')
+    print("\nCluster summary:")
+    print(cluster_summary.to_string())
+
+    print(f"\nAnalysis complete! Check the '{output_dir}' directory for results.")
+    print("- features/: columnar feature store (schema.json, *.f64, *.txt)")
+    print("- cluster_summary.csv: Summary statistics per cluster")
+
+
+if __name__ == '__main__':
+    input_csv = sys.argv[1] if len(sys.argv) > 1 else 'data/countTimeSeries.csv'
+    output = sys.argv[2] if len(sys.argv) > 2 else 'analysis_output/chunked'
+    block = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_BLOCK_SIZE
+    main(filepath=input_csv, output_dir=output, block_size=block)
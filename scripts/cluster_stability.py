@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Bootstrap stability of the k-means archetypes.
+
+The feature scripts fit KMeans once with random_state=42 and take the
+clusters as given. This module refits on B bootstrap resamples of the
+(already scaled) feature matrix and measures how often the reference
+clusters come back:
+
+- ARI of each bootstrap labelling against the reference labelling
+- per-cluster stability: mean Jaccard overlap between each reference
+  cluster and its matched bootstrap cluster
+- per-name stability: share of bootstraps that put the name back in its
+  reference cluster
+- a k x k co-assignment matrix: how often members of reference cluster i
+  land in (matched) bootstrap cluster j
+
+Bootstrap labels are matched to the reference clusters with the Hungarian
+algorithm. Workers fit several bootstraps each and return running sums, so
+no label vectors are kept. Each bootstrap has its own seed from one
+SeedSequence, so results do not depend on the number of workers.
+
+Usage:
+    python scripts/cluster_stability.py [n_boot] [min_avg_count] [output_dir]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+from sklearn.cluster import KMeans
+from sklearn.metrics import adjusted_rand_score
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+
+N_BOOT = 200
+N_INIT = 3
+RANDOM_STATE = 42
+BOOTS_PER_TASK = 10
+
+# Per-process copies, set by _init_worker
+_X = None
+_REFERENCE = None
+
+
+def feature_matrix(features_df):
+    """Numeric feature columns as perform_clustering uses them."""
+    feature_cols = [col for col in features_df.columns
+                    if col not in ['name', 'gender'] and not col.startswith('cluster_')]
+    return features_df[feature_cols].fillna(0)
+
+
+def align_labels(labels, reference, n_clusters):
+    """
+    Relabel a clustering so its clusters match the reference clusters.
+
+    Returns (aligned_labels, contingency) where contingency[i, j] counts
+    names in reference cluster i and aligned cluster j.
+    """
+    contingency = np.zeros((n_clusters, n_clusters), dtype=np.int64)
+    np.add.at(contingency, (reference, labels), 1)
+    rows, cols = linear_sum_assignment(-contingency)
+    mapping = np.empty(n_clusters, dtype=np.int64)
+    mapping[cols] = rows
+    aligned = mapping[labels]
+    return aligned, contingency[:, cols][:, np.argsort(rows)]
+
+
+def jaccard(reference, aligned, n_clusters):
+    """Jaccard overlap of each reference cluster with the aligned cluster of the same id."""
+    scores = np.zeros(n_clusters)
+    for c in range(n_clusters):
+        in_ref = reference == c
+        in_boot = aligned == c
+        union = (in_ref | in_boot).sum()
+        scores[c] = (in_ref & in_boot).sum() / union if union else 0.0
+    return scores
+
+
+def _init_worker(X, reference):
+    global _X, _REFERENCE
+    _X, _REFERENCE = X, reference
+
+
+def _bootstrap_task(seeds, n_clusters, n_init):
+    """Fit one bootstrap per seed and return running sums."""
+    n = len(_X)
+    agree = np.zeros(n, dtype=np.int64)
+    coassign = np.zeros((n_clusters, n_clusters), dtype=np.int64)
+    jaccard_sum = np.zeros(n_clusters)
+    aris = []
+
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        sample = rng.integers(0, n, n)
+        model = KMeans(n_clusters=n_clusters, n_init=n_init,
+                       random_state=int(rng.integers(2 ** 31 - 1)))
+        model.fit(_X[sample])
+
+        # Label every name (not only the resampled ones) so each name gets a vote
+        aligned, contingency = align_labels(model.predict(_X), _REFERENCE, n_clusters)
+        agree += aligned == _REFERENCE
+        coassign += contingency
+        jaccard_sum += jaccard(_REFERENCE, aligned, n_clusters)
+        aris.append(adjusted_rand_score(_REFERENCE, aligned))
+
+    return agree, coassign, jaccard_sum, aris
+
+
+def bootstrap_stability(X_scaled, reference, n_clusters, n_boot=N_BOOT, n_init=N_INIT,
+                        random_state=RANDOM_STATE, workers=None):
+    """
+    Run n_boot bootstrap refits across a process pool.
+
+    X_scaled is the feature matrix after the reference scaler; reference the
+    reference KMeans labels. Returns a dict with 'ari' (n_boot,),
+    'name_stability' (n,), 'cluster_stability' (k,) and 'coassignment'
+    (k x k, rows sum to 1).
+    """
+    X_scaled = np.ascontiguousarray(X_scaled, dtype=np.float64)
+    reference = np.asarray(reference, dtype=np.int64)
+    seeds = np.random.SeedSequence(random_state).spawn(n_boot)
+    tasks = [seeds[i:i + BOOTS_PER_TASK] for i in range(0, n_boot, BOOTS_PER_TASK)]
+
+    agree = np.zeros(len(X_scaled), dtype=np.int64)
+    coassign = np.zeros((n_clusters, n_clusters), dtype=np.int64)
+    jaccard_sum = np.zeros(n_clusters)
+    aris = []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(X_scaled, reference)) as pool:
+        futures = [pool.submit(_bootstrap_task, task, n_clusters, n_init) for task in tasks]
+        for done, future in enumerate(futures, start=1):
+            task_agree, task_coassign, task_jaccard, task_aris = future.result()
+            agree += task_agree
+            coassign += task_coassign
+            jaccard_sum += task_jaccard
+            aris.extend(task_aris)
+            print(f"  {len(aris)}/{n_boot} bootstraps", end='\r')
+    print()
+
+    return {
+        'ari': np.array(aris),
+        'name_stability': agree / n_boot,
+        'cluster_stability': jaccard_sum / n_boot,
+        'coassignment': coassign / coassign.sum(axis=1, keepdims=True).clip(min=1),
+    }
+
+
+def main(n_boot=N_BOOT, min_avg_count=0, output_dir='analysis_output', data_path='data/countTimeSeries.csv',
+         n_clusters=8, workers=None):
+    """Stability of the analyze_name_features.py k-means clusters."""
+    from analyze_name_features import extract_features, load_data, perform_clustering
+
+    out_dir = Path(output_dir) / 'stability'
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    print("Loading data...")
+    df, year_cols = load_data(data_path)
+    if min_avg_count > 0:
+        df = df[df[year_cols].astype(float).mean(axis=1) >= min_avg_count].copy()
+    features_df = extract_features(df, year_cols)
+    print(f"Extracted features for {len(features_df)} names")
+
+    features_df, _, _, scaler = perform_clustering(features_df, n_clusters=n_clusters)
+    X_scaled = scaler.transform(feature_matrix(features_df))
+    reference = features_df['cluster_kmeans'].to_numpy()
+
+    print(f"\nBootstrapping k={n_clusters} clusters ({n_boot} resamples)...")
+    start = time.perf_counter()
+    result = bootstrap_stability(X_scaled, reference, n_clusters, n_boot=n_boot, workers=workers)
+    print(f"Done in {time.perf_counter() - start:.1f}s")
+
+    names = features_df[['name', 'gender']].copy()
+    names['cluster_kmeans'] = reference
+    names['stability'] = result['name_stability'].round(3)
+    names.to_csv(out_dir / 'name_stability.csv', index=False)
+
+    clusters = pd.DataFrame({
+        'cluster_kmeans': np.arange(n_clusters),
+        'size': np.bincount(reference, minlength=n_clusters),
+        'jaccard_stability': result['cluster_stability'].round(3),
+        'mean_name_stability': [result['name_stability'][reference == c].mean().round(3)
+                                for c in range(n_clusters)],
+    })
+    clusters.to_csv(out_dir / 'cluster_stability.csv', index=False)
+    pd.DataFrame(result['coassignment'].round(3)).to_csv(out_dir / 'coassignment.csv')
+
+    ari = result['ari']
+    print(f"\nARI vs reference: mean {ari.mean():.3f}, 5th percentile {np.percentile(ari, 5):.3f}")
+    print(clusters.to_string(index=False))
+    print(f"\n✓ Saved name_stability.csv, cluster_stability.csv and coassignment.csv to {out_dir}")
+
+
+if __name__ == '__main__':
+    boots = int(sys.argv[1]) if len(sys.argv) > 1 else N_BOOT
+    min_avg = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    output = sys.argv[3] if len(sys.argv) > 3 else 'analysis_output'
+    main(n_boot=boots, min_avg_count=min_avg, output_dir=output)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Typed columnar copies of the analysis tables.
+
+The analysis scripts write their tables (name_features.csv,
+features_with_clusters.csv, cluster_summary.csv, archetypes.csv, ...) as
+CSV, and every later step parses the text again and guesses the types. Next
+to each CSV this module writes:
+
+- {stem}.parquet: compressed (zstd) Parquet, the smallest copy and the one
+  to hand to other tools
+- {stem}.arrow: an uncompressed Arrow IPC file. read_table memory-maps it,
+  so the columns are used in place without being parsed or copied
+
+Both carry schema metadata: the script that wrote the table, its parameters
+as JSON, the input files and a hash of their contents, so a table can be
+traced back to the run that produced it and checked against its inputs.
+
+A script's main() calls start_run() with its parameters and inputs, and
+write_columnar() after each to_csv(). pyarrow is optional: without it only
+the CSVs are written.
+
+Usage:
+    python scripts/columnar_outputs.py analysis_output/popular_names_500/name_features.csv ...
+        Write columnar copies of existing CSVs and compare size and read time
+    python scripts/columnar_outputs.py --info analysis_output/all_ranks/features_with_clusters.parquet
+"""
+
+import argparse
+import hashlib
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+FORMATS = ['parquet', 'arrow']
+PARQUET_COMPRESSION = 'zstd'
+METADATA_PREFIX = 'names.'
+
+# Set by start_run() and stamped on every table written afterwards
+_run = {'script': '', 'parameters': {}, 'inputs': [], 'input_hash': ''}
+
+
+def input_hash(paths):
+    """Hash of the contents of the input files (sha256, first 16 hex digits)."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(Path(path).name.encode())
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def start_run(script, parameters=None, inputs=()):
+    """Record the script, parameters and inputs for the tables this run writes."""
+    inputs = [str(path) for path in inputs if Path(path).exists()]
+    _run.update(script=Path(script).name, parameters=dict(parameters or {}), inputs=inputs,
+                input_hash=input_hash(inputs) if inputs else '')
+
+
+def run_metadata():
+    """Schema metadata for the current run, as {bytes: bytes}."""
+    values = {
+        'script': _run['script'],
+        'parameters': json.dumps(_run['parameters'], default=str, sort_keys=True),
+        'inputs': json.dumps(_run['inputs']),
+        'input_hash': _run['input_hash'],
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    return {f'{METADATA_PREFIX}{key}'.encode(): value.encode() for key, value in values.items()}
+
+
+def to_table(df, index=False):
+    """Arrow table of a frame with the run metadata added to its schema."""
+    table = pa.Table.from_pandas(df, preserve_index=None if index else False)
+    return table.replace_schema_metadata({**(table.schema.metadata or {}), **run_metadata()})
+
+
+def write_columnar(df, csv_path, index=False, formats=FORMATS):
+    """
+    Write the Parquet and Arrow IPC copies of a table saved at csv_path
+    (index as passed to to_csv). Returns the paths written.
+    """
+    if not HAS_PYARROW:
+        return []
+    table = to_table(df, index=index)
+    csv_path = Path(csv_path)
+    written = []
+    if 'parquet' in formats:
+        path = csv_path.with_suffix('.parquet')
+        pq.write_table(table, path, compression=PARQUET_COMPRESSION)
+        written.append(path)
+    if 'arrow' in formats:
+        path = csv_path.with_suffix('.arrow')
+        with pa.OSFile(str(path), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        written.append(path)
+    return written
+
+
+def read_table(path):
+    """
+    Read a columnar copy as an Arrow table. .arrow files are memory-mapped,
+    so no column data is copied; .parquet files are decoded.
+    """
+    path = Path(path)
+    if path.suffix == '.arrow':
+        return pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+    return pq.read_table(path, memory_map=True)
+
+
+def read_frame(path):
+    """A columnar copy as a pandas frame with its original dtypes."""
+    return read_table(path).to_pandas()
+
+
+def metadata(path):
+    """The run metadata of a columnar copy (parameters and inputs decoded)."""
+    path = Path(path)
+    schema = pa.ipc.open_file(pa.memory_map(str(path), 'r')).schema if path.suffix == '.arrow' \
+        else pq.read_schema(path)
+    values = {key.decode()[len(METADATA_PREFIX):]: value.decode()
+              for key, value in (schema.metadata or {}).items() if key.decode().startswith(METADATA_PREFIX)}
+    for key in ('parameters', 'inputs'):
+        if key in values:
+            values[key] = json.loads(values[key])
+    return values
+
+
+def _median_time(fn, repeats=5):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def compare(csv_path):
+    """Size and read time of a CSV and its columnar copies: [(label, bytes, seconds)]."""
+    csv_path = Path(csv_path)
+    parquet_path, arrow_path = csv_path.with_suffix('.parquet'), csv_path.with_suffix('.arrow')
+    rows = [('CSV (pandas)', csv_path.stat().st_size, _median_time(lambda: pd.read_csv(csv_path)))]
+    if parquet_path.exists():
+        rows.append(('Parquet -> pandas', parquet_path.stat().st_size,
+                     _median_time(lambda: read_frame(parquet_path))))
+    if arrow_path.exists():
+        rows.append(('Arrow IPC -> pandas', arrow_path.stat().st_size,
+                     _median_time(lambda: read_frame(arrow_path))))
+        rows.append(('Arrow IPC mmap (table)', arrow_path.stat().st_size,
+                     _median_time(lambda: read_table(arrow_path))))
+    return rows
+
+
+def print_comparison(label, rows):
+    print(label)
+    print(f"  {'format':<24}{'size':>10}{'read':>10}")
+    for name, size, seconds in rows:
+        print(f"  {name:<24}{size / 1024:>8.0f}KB{seconds * 1000:>8.1f}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Columnar copies of analysis CSVs.')
+    parser.add_argument('--info', action='store_true', help='Print the run metadata of .parquet/.arrow files')
+    parser.add_argument('paths', nargs='+')
+    args = parser.parse_args(argv)
+
+    if not HAS_PYARROW:
+        sys.exit("pyarrow is not installed (pip install pyarrow)")
+
+    if args.info:
+        for path in args.paths:
+            print(f"{path}:")
+            for key, value in metadata(path).items():
+                print(f"  {key}: {value}")
+        return
+
+    for path in args.paths:
+        csv_path = Path(path)
+        start_run(__file__, {'converted': str(csv_path)}, [csv_path])
+        written = write_columnar(pd.read_csv(csv_path), csv_path)
+        print(f"✓ Wrote {', '.join(str(p) for p in written)}")
+
+        # Zero-copy check: reading the memory-mapped file allocates no Arrow memory
+        before = pa.total_allocated_bytes()
+        table = read_table(csv_path.with_suffix('.arrow'))
+        print(f"  Arrow IPC read: {table.num_rows} rows, "
+              f"{pa.total_allocated_bytes() - before} bytes allocated (memory-mapped)")
+        print_comparison(f"  {csv_path.name}", compare(csv_path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Compact JSON format and sharded output for the generated name data.
+
+The site format (boys.json / girls.json) repeats every key for every name,
+is pretty-printed with indent=2 and stores numbers as strings with 'x' for
+missing values. The compact format instead stores:
+
+- one "fields" header and one array row per name
+- real integers, with null for missing values
+- the yearly rank series delta-encoded (first value absolute, then the
+  difference from the previous present value; nulls stay null). Counts are
+  left absolute: their deltas are no shorter than the values themselves.
+
+Records can also be split into shards (one file per first letter, or one
+file per name) plus a small manifest, so consumers only load what they need.
+
+Usage:
+    python scripts/compact_json.py data/boys.json data/girls.json
+        Print a size and parse-time comparison of the current and compact
+        formats for existing JSON files.
+"""
+
+import json
+import re
+import statistics
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+
+COMPACT_FORMAT = 'names-compact/1'
+
+FIELDS = ['name', 'rank', 'count', 'rankFrom1996', 'countFrom1996', 'rankHistoric']
+
+# Series stored as deltas between consecutive present values
+DELTA_FIELDS = ['rankFrom1996']
+
+# Scalar and series fields that hold numbers ('x' or '' means missing)
+NUMERIC_FIELDS = ['rank', 'count']
+SERIES_FIELDS = ['rankFrom1996', 'countFrom1996', 'rankHistoric']
+
+# Letters that NFKD does not split into a base letter and an accent
+FOLDED_LETTERS = str.maketrans({'ø': 'o', 'æ': 'ae', 'œ': 'oe', 'ß': 'ss', 'ł': 'l', 'đ': 'd', 'ð': 'd',
+                                'þ': 'th', 'ı': 'i'})
+
+
+def to_int(value):
+    """Convert a site-format value ('123', 123, 'x', None) to int or None."""
+    if value is None or value == 'x' or value == '':
+        return None
+    if isinstance(value, int):
+        return value
+    return int(str(value).replace(',', ''))
+
+
+def delta_encode(values):
+    """Delta-encode a series of ints/None relative to the previous present value."""
+    encoded = []
+    previous = None
+    for value in values:
+        if value is None:
+            encoded.append(None)
+        elif previous is None:
+            encoded.append(value)
+            previous = value
+        else:
+            encoded.append(value - previous)
+            previous = value
+    return encoded
+
+
+def delta_decode(values):
+    """Invert delta_encode."""
+    decoded = []
+    previous = None
+    for value in values:
+        if value is None:
+            decoded.append(None)
+        elif previous is None:
+            decoded.append(value)
+            previous = value
+        else:
+            previous = previous + value
+            decoded.append(previous)
+    return decoded
+
+
+def typed_record(record):
+    """Return a copy of a site-format record with ints and None for missing."""
+    typed = dict(record)
+    for field in NUMERIC_FIELDS:
+        if field in typed:
+            typed[field] = to_int(typed[field])
+    for field in SERIES_FIELDS:
+        if field in typed:
+            typed[field] = [to_int(v) for v in typed[field]]
+    return typed
+
+
+def encode_records(records, delta=True):
+    """
+    Encode a list of site-format records as a compact document.
+
+    Fields beyond FIELDS (e.g. ones merged from analysis extras) are
+    appended to the header, with null for records that lack them.
+    """
+    fields = list(FIELDS)
+    for record in records:
+        fields.extend(key for key in record if key not in fields)
+
+    rows = []
+    for record in records:
+        typed = typed_record(record)
+        row = []
+        for field in fields:
+            value = typed.get(field)
+            if delta and field in DELTA_FIELDS and value is not None:
+                value = delta_encode(value)
+            row.append(value)
+        rows.append(row)
+
+    return {
+        'format': COMPACT_FORMAT,
+        'fields': fields,
+        'delta': DELTA_FIELDS if delta else [],
+        'rows': rows,
+    }
+
+
+def decode_compact(doc):
+    """Decode a compact document back into a list of typed record dicts."""
+    if doc.get('format') != COMPACT_FORMAT:
+        raise ValueError(f"Unsupported format: {doc.get('format')!r}")
+
+    fields = doc['fields']
+    delta = set(doc.get('delta', []))
+    records = []
+    for row in doc['rows']:
+        record = {}
+        for field, value in zip(fields, row):
+            if field in delta and value is not None:
+                value = delta_decode(value)
+            record[field] = value
+        records.append(record)
+    return records
+
+
+def dump_compact(doc, path):
+    """Write a compact document with no whitespace."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(doc, f, separators=(',', ':'), ensure_ascii=False)
+
+
+def write_compact(records, path, delta=True):
+    """Encode and write records in the compact format."""
+    dump_compact(encode_records(records, delta=delta), path)
+
+
+def load_records(path):
+    """Load either the site format or the compact format as typed records."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return decode_compact(data)
+    return [typed_record(record) for record in data]
+
+
+def fold_name(name):
+    """Lowercase name with accents folded away ('Élodie' -> 'elodie', 'Øyvind' -> 'oyvind')."""
+    decomposed = unicodedata.normalize('NFKD', name.lower().translate(FOLDED_LETTERS))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def shard_key(name, shard_by):
+    """Return the shard key for a name: its (accent-folded) first letter, or a per-name slug."""
+    slug = re.sub(r'[^a-z0-9]+', '-', fold_name(name)).strip('-')
+    if shard_by == 'letter':
+        return slug[:1] if slug[:1].isalpha() else '_'
+    if shard_by == 'name':
+        return slug or '_'
+    raise ValueError(f"Unknown shard mode: {shard_by!r}")
+
+
+def write_shards(records, out_dir, shard_by='letter', delta=True):
+    """
+    Write records as compact shards plus a manifest.json in out_dir.
+
+    The manifest maps each shard key to its file, name count and byte size;
+    with shard_by='name' it also maps every name to its shard key (slugs that
+    collide get a numeric suffix).
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    shards = {}
+    names = {}
+    for record in records:
+        key = shard_key(record['name'], shard_by)
+        if shard_by == 'name':
+            base, suffix = key, 2
+            while key in shards:
+                key = f'{base}-{suffix}'
+                suffix += 1
+            names[record['name']] = key
+        shards.setdefault(key, []).append(record)
+
+    manifest = {
+        'format': COMPACT_FORMAT,
+        'shardBy': shard_by,
+        'total': len(records),
+        'shards': {},
+    }
+    for key in sorted(shards):
+        filename = f'{key}.json'
+        path = out_dir / filename
+        write_compact(shards[key], path, delta=delta)
+        manifest['shards'][key] = {
+            'file': filename,
+            'count': len(shards[key]),
+            'bytes': path.stat().st_size,
+        }
+    if names:
+        manifest['names'] = names
+
+    with open(out_dir / 'manifest.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, separators=(',', ':'), ensure_ascii=False)
+
+    return manifest
+
+
+def _median_time(fn, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def compare_formats(records, repeats=3):
+    """
+    Compare the site format with the compact format for a list of records.
+
+    Returns a dict of serialized sizes (bytes) and median parse times
+    (seconds); 'compact_decode' is the time to turn the compact document back into
+    record dicts after parsing.
+    """
+    legacy_text = json.dumps(records, indent=2, ensure_ascii=False)
+    compact_text = json.dumps(encode_records(records), separators=(',', ':'), ensure_ascii=False)
+    compact_doc = json.loads(compact_text)
+
+    return {
+        'legacy_bytes': len(legacy_text.encode('utf-8')),
+        'compact_bytes': len(compact_text.encode('utf-8')),
+        'legacy_parse': _median_time(lambda: json.loads(legacy_text), repeats),
+        'compact_parse': _median_time(lambda: json.loads(compact_text), repeats),
+        'compact_decode': _median_time(lambda: decode_compact(compact_doc), repeats),
+    }
+
+
+def print_comparison(label, stats):
+    """Print the result of compare_formats."""
+    print(f"{label}:")
+    print(f"  Current format: {stats['legacy_bytes'] / 1024 / 1024:6.2f} MB, "
+          f"parse {stats['legacy_parse'] * 1000:7.1f} ms")
+    print(f"  Compact format: {stats['compact_bytes'] / 1024 / 1024:6.2f} MB, "
+          f"parse {stats['compact_parse'] * 1000:7.1f} ms "
+          f"(+{stats['compact_decode'] * 1000:.1f} ms to decode)")
+    print(f"  Size reduction: {(1 - stats['compact_bytes'] / stats['legacy_bytes']) * 100:.1f}%")
+
+
+def main(paths):
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        print_comparison(path, compare_formats(records))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or ['data/boys.json', 'data/girls.json'])
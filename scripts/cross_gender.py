@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Link each name's Boy and Girl series.
+
+countTimeSeries.csv (and the .npz sidecars) hold 'Name|Boy' and 'Name|Girl'
+as unrelated rows. This module joins them on the name with a hash join (a
+dict of Boy rows probed by the Girl rows) and then, for every name given to
+both genders, in one vectorized pass over the paired count matrices:
+
+- girl share: girls / (boys + girls) per year, null in years with no births
+- crossover years: years where the majority gender flips, counting only
+  years with at least MIN_CROSSOVER_COUNT births
+- unisex score: 1 - |2p - 1| with p the girl share of all births (1 is an
+  even split, 0 one gender only), over all years and the last RECENT_YEARS
+
+Output: data/name-cross-gender.json, keyed by 'Name|Gender' for both rows of
+each pair, with fields girlShare, crossoverYears, unisexScore and
+unisexScoreRecent, ready to merge with `generate_names_json.py --merge`.
+Only pairs where each gender has at least MIN_TOTAL births are included.
+
+The feature pipeline uses frame_unisex_scores for its optional unisex
+segment (`analyze_name_features.py` with unisex=True).
+
+Usage:
+    python scripts/cross_gender.py [data/boys.npz data/girls.npz]
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from name_matrices import load_count_matrix
+
+
+OUTPUT_FILE = Path(__file__).parent.parent / 'data' / 'name-cross-gender.json'
+
+MIN_TOTAL = 10
+MIN_CROSSOVER_COUNT = 10
+RECENT_YEARS = 5
+UNISEX_MIN_SCORE = 0.2
+
+
+def pair_rows(names, genders):
+    """
+    Hash-join Boy and Girl rows on the name.
+
+    Returns (pair_names, boy_rows, girl_rows) for names given to both.
+    """
+    boys = {name: row for row, (name, gender) in enumerate(zip(names, genders)) if gender == 'Boy'}
+    pair_names, boy_rows, girl_rows = [], [], []
+    for row, (name, gender) in enumerate(zip(names, genders)):
+        if gender == 'Girl' and name in boys:
+            pair_names.append(name)
+            boy_rows.append(boys[name])
+            girl_rows.append(row)
+    return np.array(pair_names, dtype=str), np.array(boy_rows, dtype=np.int64), np.array(girl_rows, dtype=np.int64)
+
+
+def girl_share(boy_counts, girl_counts):
+    """Girls' share of each year's births (NaN where neither gender has any)."""
+    total = boy_counts + girl_counts
+    return np.divide(girl_counts, total, out=np.full(total.shape, np.nan), where=total > 0)
+
+
+def crossovers(boy_counts, girl_counts, min_count=MIN_CROSSOVER_COUNT):
+    """
+    (N, T) mask of years where the majority gender differs from the last
+    year that had a clear majority and at least min_count births.
+    """
+    majority = np.sign(girl_counts - boy_counts)
+    majority[(boy_counts + girl_counts) < min_count] = 0
+
+    # Index of the last year with a majority, carried forward
+    length = majority.shape[1]
+    known = np.where(majority != 0, np.arange(length), -1)
+    last = np.maximum.accumulate(known, axis=1)
+    previous = np.hstack([np.full((len(majority), 1), -1), last[:, :-1]])
+    previous_majority = np.take_along_axis(majority, np.maximum(previous, 0), axis=1)
+    return (majority != 0) & (previous >= 0) & (majority != previous_majority)
+
+
+def unisex_score(boy_total, girl_total):
+    """1 - |2p - 1| for the girl share p of the totals (0 where both are 0)."""
+    total = boy_total + girl_total
+    share = np.divide(girl_total, total, out=np.zeros(np.shape(total)), where=total > 0)
+    return np.where(total > 0, 1 - np.abs(2 * share - 1), 0.0)
+
+
+def cross_gender(names, genders, counts, recent_years=RECENT_YEARS):
+    """
+    Join the genders and compute every measure.
+
+    Returns (pair_names, boy_rows, girl_rows, measures) where measures holds
+    (pairs,)- or (pairs, T)-shaped arrays: share, crossovers, score and
+    score_recent.
+    """
+    pair_names, boy_rows, girl_rows = pair_rows(names, genders)
+    boy_counts, girl_counts = counts[boy_rows], counts[girl_rows]
+    measures = {
+        'share': girl_share(boy_counts, girl_counts),
+        'crossovers': crossovers(boy_counts, girl_counts),
+        'score': unisex_score(boy_counts.sum(axis=1), girl_counts.sum(axis=1)),
+        'score_recent': unisex_score(boy_counts[:, -recent_years:].sum(axis=1),
+                                     girl_counts[:, -recent_years:].sum(axis=1)),
+    }
+    return pair_names, boy_rows, girl_rows, measures
+
+
+def frame_unisex_scores(df, year_cols, min_total=MIN_TOTAL):
+    """
+    Unisex score of each row of a count frame with name and gender columns,
+    as a NumPy array in row order. Names given to one gender only, or with
+    fewer than min_total births for either, score 0.
+    """
+    names = df['name'].astype(str).to_numpy()
+    genders = df['gender'].astype(str).to_numpy()
+    totals = df[year_cols].to_numpy(dtype=float, na_value=0).sum(axis=1)
+
+    _, boy_rows, girl_rows = pair_rows(names, genders)
+    scores = np.zeros(len(df))
+    pair_scores = unisex_score(totals[boy_rows], totals[girl_rows])
+    pair_scores[np.minimum(totals[boy_rows], totals[girl_rows]) < min_total] = 0.0
+    scores[boy_rows] = pair_scores
+    scores[girl_rows] = pair_scores
+    return scores
+
+
+def main(source=None, output_file=OUTPUT_FILE):
+    start = time.perf_counter()
+    print("Loading count matrix...")
+    names, genders, years, counts = load_count_matrix(source)
+
+    join_start = time.perf_counter()
+    pair_names, boy_rows, girl_rows, measures = cross_gender(names, genders, counts)
+    print(f"Joined {len(pair_names)} names given to both genders in {time.perf_counter() - join_start:.2f}s")
+
+    keep = (counts[boy_rows].sum(axis=1) >= MIN_TOTAL) & (counts[girl_rows].sum(axis=1) >= MIN_TOTAL)
+    print(f"  {keep.sum()} with at least {MIN_TOTAL} births for each gender")
+
+    result = {}
+    for i in np.flatnonzero(keep):
+        fields = {
+            'girlShare': [None if np.isnan(v) else round(float(v), 3) for v in measures['share'][i]],
+            'crossoverYears': [int(y) for y in years[measures['crossovers'][i]]],
+            'unisexScore': round(float(measures['score'][i]), 3),
+            'unisexScoreRecent': round(float(measures['score_recent'][i]), 3),
+        }
+        result[f'{pair_names[i]}|Boy'] = fields
+        result[f'{pair_names[i]}|Girl'] = fields
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f, separators=(',', ':'), ensure_ascii=False)
+    print(f"✓ Saved {output_file} ({len(result)} records)")
+
+    totals = counts[boy_rows].sum(axis=1) + counts[girl_rows].sum(axis=1)
+    busiest = np.flatnonzero(keep & (measures['score'] >= 0.5))
+    print("\nMost-given names with a unisex score of at least 0.5:")
+    for i in busiest[np.argsort(-totals[busiest])][:10]:
+        crossover = ', '.join(str(y) for y in years[measures['crossovers'][i]]) or '-'
+        print(f"  {pair_names[i]:<12} score {measures['score'][i]:.2f} "
+              f"(recent {measures['score_recent'][i]:.2f}), crossovers: {crossover}")
+
+    print(f"\nDone in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main(source=sys.argv[1:] or None)
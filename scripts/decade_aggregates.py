@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Decade-level rank summaries on one 13-point grid (1900s-2020s).
+
+The rank data mixes two samplings: one top-100 snapshot per decade up to
+1994 (1904, 1914, ..., 1994) and a rank for every year from 1996. The
+analysis scripts each reinterpret that split. This stage aligns both onto
+the decades of rankHistoricTimeSeries.csv in one vectorized pass:
+
+- mean: mean rank over the decade's ranked years
+- best: best (lowest) rank in the decade
+- last: rank in the decade's latest ranked year
+
+A pre-1996 decade has a single snapshot, so all three equal it. The 1990s
+combine the 1994 snapshot with 1996-1999. Ranks worse than max_rank
+(default 100, matching the historic top-100 tables) count as unranked.
+
+Output: data/rankDecadeAggregates.csv with a 'name|gender' column and one
+'{decade}_{stat}' column per decade and statistic ('x' where unranked).
+analyze_historic_features.py can cluster any one statistic in place of the
+historic snapshots.
+
+Usage:
+    python scripts/decade_aggregates.py [--max-rank 100] [data/boys.npz data/girls.npz]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from name_matrices import _as_float, load_matrices
+
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+OUTPUT_FILE = DATA_DIR / 'rankDecadeAggregates.csv'
+DEFAULT_SOURCES = [DATA_DIR / 'boys.npz', DATA_DIR / 'girls.npz']
+
+DECADES = ['1900s', '1910s', '1920s', '1930s', '1940s', '1950s', '1960s', '1970s',
+           '1980s', '1990s', '2000s', '2010s', '2020s']
+FIRST_DECADE = 1900
+STATS = ['mean', 'best', 'last']
+MAX_RANK = 100
+
+
+def decade_index(years):
+    """Index into DECADES for each year."""
+    return (np.asarray(years) - FIRST_DECADE) // 10
+
+
+def combine_sources(years, rank, historic_years, historic):
+    """
+    Put snapshots and yearly ranks side by side as one float matrix.
+
+    Snapshots for years the yearly data already covers (2004, 2014, 2024)
+    are dropped. Returns (years, ranks) with NaN where unranked.
+    """
+    snapshot_mask = ~np.isin(historic_years, years)
+    all_years = np.concatenate([historic_years[snapshot_mask], years])
+    ranks = np.hstack([_as_float(historic[:, snapshot_mask]), _as_float(rank)])
+    order = np.argsort(all_years, kind='stable')
+    return all_years[order], ranks[:, order]
+
+
+def last_valid(values):
+    """Last non-NaN value of each row, NaN for rows with none."""
+    present = ~np.isnan(values)
+    last = values.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+    result = values[np.arange(len(values)), last]
+    result[~present.any(axis=1)] = np.nan
+    return result
+
+
+def aggregate(years, ranks, max_rank=MAX_RANK):
+    """
+    Summarise a (names x years) rank matrix per decade.
+
+    Returns {stat: (names x 13) float matrix} for each of STATS.
+    """
+    ranks = np.array(ranks, dtype=float)
+    if max_rank:
+        ranks[ranks > max_rank] = np.nan
+
+    buckets = decade_index(years)
+    result = {stat: np.full((len(ranks), len(DECADES)), np.nan) for stat in STATS}
+
+    with warnings.catch_warnings():
+        # Empty decades are expected for most names
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        for d in range(len(DECADES)):
+            block = ranks[:, buckets == d]
+            if block.shape[1] == 0:
+                continue
+            result['mean'][:, d] = np.nanmean(block, axis=1)
+            result['best'][:, d] = np.nanmin(block, axis=1)
+            result['last'][:, d] = last_valid(block)
+
+    return result
+
+
+def build_aggregates(paths=None, max_rank=MAX_RANK):
+    """
+    Load .npz sidecars and aggregate them.
+
+    Returns (keys, aggregates) where keys are 'Name|Gender' strings.
+    """
+    names, genders, years, rank, _, historic_years, historic = load_matrices(paths or DEFAULT_SOURCES)
+    all_years, ranks = combine_sources(years, rank, historic_years, historic)
+    keys = [f'{n}|{g}' for n, g in zip(names, genders)]
+    return keys, aggregate(all_years, ranks, max_rank=max_rank)
+
+
+def format_value(value, stat):
+    if np.isnan(value):
+        return 'x'
+    return f'{value:.1f}' if stat == 'mean' else str(int(value))
+
+
+def write_aggregates(keys, aggregates, output_file=OUTPUT_FILE):
+    """Write names ranked in at least one decade to a CSV."""
+    columns = [(decade, stat) for decade in DECADES for stat in STATS]
+    ranked = ~np.all(np.isnan(aggregates['best']), axis=1)
+
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['name|gender'] + [f'{decade}_{stat}' for decade, stat in columns])
+        for i in np.flatnonzero(ranked):
+            writer.writerow([keys[i]] + [
+                format_value(aggregates[stat][i, DECADES.index(decade)], stat)
+                for decade, stat in columns
+            ])
+
+    return int(ranked.sum())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build decade-level rank aggregates.')
+    parser.add_argument('--max-rank', type=int, default=MAX_RANK,
+                        help='Treat worse ranks as unranked (0 keeps every rank)')
+    parser.add_argument('--output', type=Path, default=OUTPUT_FILE)
+    parser.add_argument('paths', nargs='*', help='.npz sidecars (default: data/boys.npz data/girls.npz)')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    keys, aggregates = build_aggregates(args.paths, max_rank=args.max_rank)
+    elapsed = time.perf_counter() - start
+    written = write_aggregates(keys, aggregates, args.output)
+
+    print(f"✓ Saved {args.output}")
+    print(f"  Names ranked in at least one decade: {written} of {len(keys)}")
+    print(f"  Aggregation time: {elapsed:.2f}s")
+    for decade in DECADES[-4:]:
+        column = DECADES.index(decade)
+        print(f"  {decade}: {(~np.isnan(aggregates['best'][:, column])).sum()} names ranked")
+
+
+if __name__ == '__main__':
+    main()
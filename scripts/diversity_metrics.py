@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Yearly diversity and concentration of name choice.
+
+For each year and gender, from the count matrix:
+
+- births and names: total count and number of names given at least once
+- entropy: Shannon entropy of name choice in bits, and effectiveNames
+  (2^entropy, the number of equally common names with the same entropy)
+- gini: Gini coefficient of the counts of the names given that year
+- top10Share, top100Share: share of births going to the top 10 / 100 names
+- namesFor50, namesFor90: fewest names that cover 50% / 90% of births
+
+Each year column is sorted once (descending, all years at once) and every
+metric is read off the sorted counts and their cumulative sums. Years are
+independent, so an update only computes the years missing from the existing
+output: appending a new year costs one column, not the whole table.
+
+Births are summed over the names in the data (the ONS tables list names with
+at least 3 births), so small-name diversity is slightly understated.
+
+Output: data/yearly-diversity.json, one row per year and gender in the
+compact layout (a fields header plus array rows).
+
+Usage:
+    python scripts/diversity_metrics.py [--full] [data/countTimeSeries.csv | data/boys.npz data/girls.npz]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from name_matrices import load_count_matrix
+
+
+OUTPUT_FILE = Path(__file__).parent.parent / 'data' / 'yearly-diversity.json'
+
+DIVERSITY_FORMAT = 'names-diversity/1'
+FIELDS = ['year', 'gender', 'births', 'names', 'entropy', 'effectiveNames', 'gini',
+          'top10Share', 'top100Share', 'namesFor50', 'namesFor90']
+
+TOP_K = [10, 100]
+COVERAGE = [50, 90]
+
+
+def year_metrics(counts):
+    """
+    Metrics for every column of a (names x years) count matrix of one
+    gender. Returns {field: (years,) array} for FIELDS after year and gender.
+    """
+    x = -np.sort(-np.nan_to_num(np.asarray(counts, dtype=float)), axis=0)
+    births = x.sum(axis=0)
+    names = (x > 0).sum(axis=0)
+    share = np.divide(x, births, out=np.zeros_like(x), where=births > 0)
+    cumulative = np.cumsum(share, axis=0)
+
+    logs = np.log2(share, out=np.zeros_like(share), where=share > 0)
+    entropy = -(share * logs).sum(axis=0)
+
+    # Gini from descending order: (n - 1) / n - 2 * sum(j * x_j) / (n * sum(x)), j from 0
+    position = np.arange(len(x))[:, None]
+    n = np.maximum(names, 1)
+    gini = (n - 1) / n - 2 * np.divide((position * x).sum(axis=0), n * births,
+                                       out=np.zeros_like(births), where=births > 0)
+
+    metrics = {
+        'births': births,
+        'names': names,
+        'entropy': entropy,
+        'effectiveNames': 2 ** entropy,
+        'gini': gini,
+    }
+    for k in TOP_K:
+        metrics[f'top{k}Share'] = cumulative[min(k, len(x)) - 1] if len(x) else np.zeros_like(births)
+    for percent in COVERAGE:
+        # Names before the cumulative share reaches the target, plus the one that reaches it
+        metrics[f'namesFor{percent}'] = np.minimum((cumulative < percent / 100 - 1e-12).sum(axis=0) + 1, names)
+    return metrics
+
+
+def metric_rows(genders, years, counts, only_years=None):
+    """Table rows ([value per FIELDS]) for each year (or only_years) and gender."""
+    columns = np.arange(len(years)) if only_years is None else np.flatnonzero(np.isin(years, list(only_years)))
+    rows = []
+    for gender in np.unique(genders):
+        metrics = year_metrics(counts[genders == gender][:, columns])
+        for i, column in enumerate(columns):
+            row = [int(years[column]), str(gender)]
+            for field in FIELDS[2:]:
+                value = metrics[field][i]
+                row.append(int(value) if field in ('births', 'names') or field.startswith('namesFor')
+                           else round(float(value), 4))
+            rows.append(row)
+    return rows
+
+
+def load_table(path):
+    """Rows of an existing output file, or [] if there is none."""
+    if not Path(path).exists():
+        return []
+    with open(path, encoding='utf-8') as f:
+        doc = json.load(f)
+    if doc.get('format') != DIVERSITY_FORMAT or doc.get('fields') != FIELDS:
+        return []
+    return doc['rows']
+
+
+def update_table(rows, genders, years, counts):
+    """
+    Add rows for the years the table lacks (for any gender).
+
+    Returns (rows, computed_years).
+    """
+    have = {(year, gender) for year, gender, *_ in rows}
+    missing = sorted({int(y) for y in years for g in np.unique(genders) if (int(y), str(g)) not in have})
+    if missing:
+        rows = [row for row in rows if row[0] not in missing]
+        rows += metric_rows(genders, years, counts, only_years=missing)
+    rows.sort(key=lambda row: (row[0], row[1]))
+    return rows, missing
+
+
+def write_table(rows, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'format': DIVERSITY_FORMAT, 'fields': FIELDS, 'rows': rows}, f,
+                  separators=(',', ':'), ensure_ascii=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Yearly diversity and concentration metrics.')
+    parser.add_argument('--full', action='store_true', help='Recompute every year instead of only new ones')
+    parser.add_argument('--output', type=Path, default=OUTPUT_FILE)
+    parser.add_argument('data', nargs='*', help='countTimeSeries.csv or .npz sidecars (default: data/countTimeSeries.csv)')
+    args = parser.parse_args(argv)
+
+    _, genders, years, counts = load_count_matrix(args.data or None)
+
+    start = time.perf_counter()
+    existing = [] if args.full else load_table(args.output)
+    rows, computed = update_table(existing, genders, years, counts)
+    elapsed = time.perf_counter() - start
+    if not computed:
+        print(f"{args.output} is up to date ({len(rows)} rows)")
+        return
+    write_table(rows, args.output)
+    span = f"{computed[0]}-{computed[-1]}" if len(computed) > 1 else str(computed[0])
+    print(f"✓ Computed {span} for {len(np.unique(genders))} genders in {elapsed * 1000:.0f} ms; "
+          f"saved {len(rows)} rows to {args.output}")
+
+    index = {field: i for i, field in enumerate(FIELDS)}
+    print(f"\n  {'year':<6}{'gender':<7}{'names':>7}{'entropy':>9}{'gini':>7}{'top10':>7}{'for50%':>8}")
+    for row in rows:
+        if row[0] in (int(years[0]), int(years[len(years) // 2]), int(years[-1])):
+            print(f"  {row[0]:<6}{row[1]:<7}{row[index['names']]:>7}{row[index['entropy']]:>9.2f}"
+                  f"{row[index['gini']]:>7.3f}{row[index['top10Share']]:>7.1%}{row[index['namesFor50']]:>8}")
+
+
+if __name__ == '__main__':
+    main()
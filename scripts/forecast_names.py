@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Project every name's count one year ahead.
+
+Fits an additive damped-trend exponential smoothing model (Holt with a
+damping factor) to log counts, for all names at once: each smoothing step is
+a vectorized update over the whole (names x years) matrix, so one parameter
+setting costs one pass over the years. A small grid of (alpha, beta, phi)
+settings is run and every name keeps the setting with the lowest one-step
+squared error.
+
+Prediction intervals come from the standard deviation of each name's
+one-step errors in log space. Predicted ranks are competition ranks among
+the predicted counts of the same gender.
+
+Output: data/name-forecasts.json, keyed by 'Name|Gender', with a forecast
+field for `generate_names_json.py --merge`. Only names seen in the last
+RECENT_YEARS years are included.
+
+Usage:
+    python scripts/forecast_names.py [--backtest]
+"""
+
+import itertools
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from name_matrices import load_count_matrix
+
+
+OUTPUT_FILE = Path(__file__).parent.parent / 'data' / 'name-forecasts.json'
+
+ALPHAS = [0.2, 0.4, 0.6, 0.8, 1.0]
+BETAS = [0.05, 0.2, 0.5]
+PHIS = [0.8, 0.9, 0.98]
+Z_95 = 1.96
+RECENT_YEARS = 5
+
+
+def damped_trend(y, alpha, beta, phi):
+    """
+    Run damped-trend smoothing over every row of y.
+
+    Returns (level, trend, sse) after the last year, where sse is the sum of
+    squared one-step-ahead errors per row.
+    """
+    level = y[:, 0].copy()
+    trend = y[:, 1] - y[:, 0] if y.shape[1] > 1 else np.zeros(len(y))
+    sse = np.zeros(len(y))
+
+    for t in range(1, y.shape[1]):
+        predicted = level + phi * trend
+        error = y[:, t] - predicted
+        sse += error ** 2
+        new_level = predicted + alpha * error
+        trend = phi * trend + alpha * beta * error
+        level = new_level
+
+    return level, trend, sse
+
+
+def fit(y):
+    """
+    Grid-search the smoothing parameters per row.
+
+    Returns a dict of per-row arrays: forecast (log space, one year ahead),
+    sigma (one-step error std), alpha, beta, phi.
+    """
+    n = len(y)
+    best_sse = np.full(n, np.inf)
+    best = {key: np.zeros(n) for key in ('forecast', 'alpha', 'beta', 'phi')}
+
+    for alpha, beta, phi in itertools.product(ALPHAS, BETAS, PHIS):
+        level, trend, sse = damped_trend(y, alpha, beta, phi)
+        better = sse < best_sse
+        best_sse[better] = sse[better]
+        best['forecast'][better] = (level + phi * trend)[better]
+        best['alpha'][better] = alpha
+        best['beta'][better] = beta
+        best['phi'][better] = phi
+
+    best['sigma'] = np.sqrt(best_sse / max(y.shape[1] - 1, 1))
+    return best
+
+
+def competition_rank(values, reference):
+    """Rank of each value among reference values: 1 + number strictly greater."""
+    ordered = np.sort(reference)
+    return 1 + len(ordered) - np.searchsorted(ordered, values, side='right')
+
+
+def forecast(counts, genders):
+    """
+    One-year-ahead count and rank forecasts with 95% intervals.
+
+    Returns a dict of per-row arrays: count, countLow, countHigh, rank,
+    rankLow, rankHigh (rankLow is the better, i.e. smaller, rank).
+    """
+    model = fit(np.log1p(counts))
+    spread = Z_95 * model['sigma']
+
+    result = {
+        'count': np.expm1(model['forecast']),
+        'countLow': np.expm1(model['forecast'] - spread),
+        'countHigh': np.expm1(model['forecast'] + spread),
+    }
+    for key in result:
+        result[key] = np.clip(np.round(result[key]), 0, None).astype(np.int64)
+
+    for key in ('rank', 'rankLow', 'rankHigh'):
+        result[key] = np.zeros(len(counts), dtype=np.int64)
+    for gender in np.unique(genders):
+        mask = genders == gender
+        point = result['count'][mask]
+        result['rank'][mask] = competition_rank(point, point)
+        result['rankLow'][mask] = competition_rank(result['countHigh'][mask], point)
+        result['rankHigh'][mask] = competition_rank(result['countLow'][mask], point)
+
+    return result
+
+
+def backtest(counts):
+    """Fit on all but the last year and compare with a last-value forecast."""
+    actual = np.log1p(counts[:, -1])
+    history = counts[:, :-1]
+    seen = history[:, -1] > 0
+
+    model = fit(np.log1p(history))
+    model_error = np.abs(model['forecast'] - actual)[seen].mean()
+    naive_error = np.abs(np.log1p(history[:, -1]) - actual)[seen].mean()
+    covered = (np.abs(model['forecast'] - actual) <= Z_95 * model['sigma'])[seen].mean()
+    return model_error, naive_error, covered
+
+
+def main(source=None, output_file=OUTPUT_FILE, run_backtest=False):
+    start = time.perf_counter()
+    print("Loading count matrix...")
+    names, genders, years, counts = load_count_matrix(source)
+    next_year = int(years[-1]) + 1
+
+    if run_backtest:
+        model_error, naive_error, covered = backtest(counts)
+        print(f"Backtest on {years[-1]} (log-count MAE, names seen in {years[-2]}):")
+        print(f"  Damped trend: {model_error:.3f}")
+        print(f"  Last value:   {naive_error:.3f}")
+        print(f"  95% interval coverage: {covered:.1%}")
+
+    fit_start = time.perf_counter()
+    result = forecast(counts, genders)
+    print(f"Fitted {len(names)} names in {time.perf_counter() - fit_start:.2f}s")
+
+    recent = (counts[:, -RECENT_YEARS:] > 0).any(axis=1)
+    forecasts = {}
+    for i in np.flatnonzero(recent):
+        forecasts[f'{names[i]}|{genders[i]}'] = {
+            'forecast': {
+                'year': next_year,
+                **{key: int(values[i]) for key, values in result.items()},
+            }
+        }
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(forecasts, f, separators=(',', ':'), ensure_ascii=False)
+    print(f"✓ Saved {len(forecasts)} forecasts for {next_year} to {output_file}")
+
+    for key in ('Muhammad|Boy', 'Olivia|Girl', 'Arthur|Boy'):
+        if key in forecasts:
+            f = forecasts[key]['forecast']
+            print(f"  {key}: {f['count']} ({f['countLow']}-{f['countHigh']}), "
+                  f"rank {f['rank']} ({f['rankLow']}-{f['rankHigh']})")
+
+    print(f"\nDone in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main(run_backtest='--backtest' in sys.argv[1:])
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Gap-aware dynamic time warping for sparse rank series.
+
+timeseries_clustering.py compares count series with zeros standing in for
+missing years, and the rank scripts skip shape clustering because their
+series are full of NaN. This module compares rank series with the gaps left
+in place:
+
+- Both observed:   squared difference of log ranks, scaled to 0-1 by the
+                   largest rank
+- One observed:    GAP_PENALTY (being ranked vs. not ranked)
+- Both missing:    0, so shared absences do not add distance
+
+Warping is limited to a band of WINDOW_YEARS in real years, so the uneven
+grid of all_ranks.csv (decade snapshots to 1994, then every year) warps by
+time rather than by column position.
+
+Distances are computed for batches of series pairs at once: the DTW table is
+filled cell by cell with every pair in the batch updated as one vector, and
+batches are spread over a process pool. Clustering runs complete-linkage
+agglomerative clustering on the precomputed distances of a sample, then
+assigns every other name to the nearest cluster medoid.
+
+Usage:
+    python scripts/gap_dtw.py [n_clusters] [sample_size] [data/boys.npz data/girls.npz]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import AgglomerativeClustering
+
+sys.path.insert(0, os.path.dirname(__file__))
+from name_matrices import load_rank_frame
+
+
+OUTPUT_DIR = Path(__file__).parent.parent / 'analysis_output' / 'gap_dtw'
+
+GAP_PENALTY = 0.25
+WINDOW_YEARS = 10
+MIN_OBSERVED = 3
+BATCH_SIZE = 20000
+SAMPLE_SIZE = 2000
+N_CLUSTERS = 8
+
+# Per-process copies of the series matrices, set by _init_worker
+_A = None
+_B = None
+_BAND = None
+
+
+def prepare_ranks(ranks):
+    """
+    Log-transform ranks and scale them to 0-1 (NaN stays NaN), so moves near
+    the top weigh more and GAP_PENALTY is on the same scale for any table.
+    """
+    logs = np.log(np.asarray(ranks, dtype=float))
+    top = np.nanmax(logs) if np.isfinite(logs).any() else 0.0
+    return logs / top if top > 0 else logs
+
+
+def band_mask(times, window=WINDOW_YEARS):
+    """(T, T) mask of cells within `window` years of each other."""
+    times = np.asarray(times, dtype=float)
+    return np.abs(times[:, None] - times[None, :]) <= window
+
+
+def masked_dtw_batch(a, b, band, gap_penalty=GAP_PENALTY):
+    """
+    Gap-aware DTW distances between the rows of a and b (both (P, T)).
+
+    Returns a (P,) array of distances.
+    """
+    n_pairs, length = a.shape
+    a_seen = ~np.isnan(a)
+    b_seen = ~np.isnan(b)
+    a = np.nan_to_num(a)
+    b = np.nan_to_num(b)
+
+    previous = np.full((length + 1, n_pairs), np.inf)
+    previous[0] = 0.0
+    for i in range(length):
+        current = np.full((length + 1, n_pairs), np.inf)
+        for j in np.flatnonzero(band[i]):
+            both = a_seen[:, i] & b_seen[:, j]
+            one = a_seen[:, i] ^ b_seen[:, j]
+            cost = np.where(both, (a[:, i] - b[:, j]) ** 2, 0.0) + one * gap_penalty
+            best = np.minimum(np.minimum(previous[j], previous[j + 1]), current[j])
+            current[j + 1] = cost + best
+        previous = current
+
+    return np.sqrt(previous[length])
+
+
+def _init_worker(a, b, band):
+    global _A, _B, _BAND
+    _A, _B, _BAND = a, b, band
+
+
+def _distance_task(left, right, gap_penalty):
+    return masked_dtw_batch(_A[left], _B[right], _BAND, gap_penalty)
+
+
+def paired_distances(a, b, left, right, band, gap_penalty=GAP_PENALTY,
+                     batch_size=BATCH_SIZE, workers=None):
+    """Distances between a[left[k]] and b[right[k]] for every k, in parallel batches."""
+    distances = np.empty(len(left))
+    batches = [(start, min(start + batch_size, len(left))) for start in range(0, len(left), batch_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(a, b, band)) as pool:
+        futures = [pool.submit(_distance_task, left[start:stop], right[start:stop], gap_penalty)
+                   for start, stop in batches]
+        for (start, stop), future in zip(batches, futures):
+            distances[start:stop] = future.result()
+    return distances
+
+
+def pairwise_distances(series, band, gap_penalty=GAP_PENALTY, workers=None):
+    """Symmetric (N, N) distance matrix over the rows of series."""
+    left, right = np.triu_indices(len(series), k=1)
+    distances = paired_distances(series, series, left, right, band, gap_penalty, workers=workers)
+    matrix = np.zeros((len(series), len(series)))
+    matrix[left, right] = distances
+    matrix[right, left] = distances
+    return matrix
+
+
+def medoids(distances, labels):
+    """Index of the member with the smallest total distance in each cluster."""
+    result = []
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        result.append(members[distances[np.ix_(members, members)].sum(axis=1).argmin()])
+    return np.array(result)
+
+
+def shape_clusters(ranks, times, n_clusters=N_CLUSTERS, sample_size=SAMPLE_SIZE,
+                   gap_penalty=GAP_PENALTY, window=WINDOW_YEARS, workers=None, random_state=42):
+    """
+    Cluster rank series by shape without imputing missing ranks.
+
+    ranks is a (names x periods) matrix with NaN where unranked and times the
+    year of each period. Names with fewer than MIN_OBSERVED ranks get -1.
+
+    Returns (labels, medoid_rows): a label per name and, per cluster, the row
+    of its medoid.
+    """
+    series = prepare_ranks(ranks)
+    band = band_mask(times, window)
+    eligible = np.flatnonzero((~np.isnan(series)).sum(axis=1) >= MIN_OBSERVED)
+
+    rng = np.random.default_rng(random_state)
+    sample = np.sort(rng.choice(eligible, min(sample_size, len(eligible)), replace=False))
+
+    start = time.perf_counter()
+    distances = pairwise_distances(series[sample], band, gap_penalty, workers)
+    print(f"  {len(sample) * (len(sample) - 1) // 2} sample distances in {time.perf_counter() - start:.1f}s")
+
+    model = AgglomerativeClustering(n_clusters=n_clusters, metric='precomputed', linkage='complete')
+    sample_labels = model.fit_predict(distances)
+    medoid_rows = sample[medoids(distances, sample_labels)]
+
+    # Every eligible name goes to its nearest medoid
+    start = time.perf_counter()
+    left = np.repeat(eligible, len(medoid_rows))
+    right = np.tile(medoid_rows, len(eligible))
+    to_medoids = paired_distances(series, series, left, right, band, gap_penalty, workers=workers)
+    labels = np.full(len(series), -1)
+    labels[eligible] = to_medoids.reshape(len(eligible), len(medoid_rows)).argmin(axis=1)
+    print(f"  Assigned {len(eligible)} names to {len(medoid_rows)} medoids in {time.perf_counter() - start:.1f}s")
+
+    return labels, medoid_rows
+
+
+def frame_shape_clusters(df, period_cols, times=None, n_clusters=N_CLUSTERS, **kwargs):
+    """
+    shape_clusters over the given columns of a rank frame.
+
+    times defaults to the column names read as years. Returns (labels,
+    medoid_rows) as shape_clusters does.
+    """
+    if times is None:
+        times = [int(col) for col in period_cols]
+    return shape_clusters(df[period_cols].to_numpy(dtype=float), times, n_clusters=n_clusters, **kwargs)
+
+
+def main(n_clusters=N_CLUSTERS, sample_size=SAMPLE_SIZE, data_paths=None):
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    if data_paths:
+        df = load_rank_frame(data_paths, with_gender=True)
+    else:
+        from analyze_all_ranks import load_and_prepare_data
+        df, _ = load_and_prepare_data()
+    year_cols = [col for col in df.columns if col not in ('name', 'gender')]
+
+    print(f"Gap-aware DTW clustering of {len(df)} rank series ({len(year_cols)} periods)...")
+    labels, medoid_rows = frame_shape_clusters(df, year_cols, n_clusters=n_clusters, sample_size=sample_size)
+
+    # all_ranks.csv has no gender column: its rows get an empty gender
+    genders = df['gender'] if 'gender' in df.columns else ''
+    result = pd.DataFrame({'name': df['name'], 'gender': genders, 'shape_cluster': labels})
+    result = result[result['shape_cluster'] >= 0]
+    result.to_csv(OUTPUT_DIR / 'shape_clusters.csv', index=False)
+
+    print("\nClusters (medoid, size):")
+    for label, row in enumerate(medoid_rows):
+        print(f"  {label}: {df['name'].iloc[row]:<12} {(labels == label).sum()} names")
+    print(f"\n✓ Saved {OUTPUT_DIR / 'shape_clusters.csv'}")
+
+
+if __name__ == '__main__':
+    clusters = int(sys.argv[1]) if len(sys.argv) > 1 else N_CLUSTERS
+    sample = int(sys.argv[2]) if len(sys.argv) > 2 else SAMPLE_SIZE
+    main(n_clusters=clusters, sample_size=sample, data_paths=sys.argv[3:])
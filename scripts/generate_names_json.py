@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Generate boys.json and girls.json from CSV data files in one run.
+
+Combines, for each gender:
+- {Gender}-from-1996.csv: Rank and count data from 1996-2024
+- {Gender}-Historic-Top-100.csv: Historic top 100 rankings from 1904-2024
+
+Both genders are processed concurrently in a single process pool. Large
+from-1996 sources are split into row chunks that are parsed in parallel and
+merged back in source order before the final rank sort, so the wall-clock
+time is roughly that of the slowest chunk rather than the sum of all work.
+Each gender's JSON is then serialised and written in a pool worker too.
+
+Output format matches example.json structure.
+
+Usage:
+    python scripts/generate_names_json.py                 # both genders
+    python scripts/generate_names_json.py --gender boys   # one gender
+    python scripts/generate_names_json.py --workers 8 --chunk-size 2000
+    python scripts/generate_names_json.py --format compact --shard letter
+    python scripts/generate_names_json.py --merge data/name-correlations.json
+    python scripts/generate_names_json.py --recompute-ranks ons
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(__file__))
+from compact_json import compare_formats, print_comparison, write_compact, write_shards
+
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+
+GENDERS = {
+    'boys': 'Boys',
+    'girls': 'Girls',
+}
+
+# Gender labels used in 'Name|Gender' keys (countTimeSeries.csv, extras files)
+GENDER_KEYS = {
+    'boys': 'Boy',
+    'girls': 'Girl',
+}
+
+# Years covered by the from-1996 source (29 years)
+YEARS_FROM_1996 = list(range(1996, 2025))
+
+# Historic data has 13 years: 1904, 1914, 1924, ..., 2024
+HISTORIC_YEARS = 13
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Missing rank/count values are held as None in memory (null in compact JSON,
+# -1 in the .npz matrices) and only written as 'x' in the site format.
+MISSING = None
+
+
+def source_paths(gender, data_dir=DATA_DIR, output_format='legacy'):
+    """Return (from_1996_path, historic_path, output_path) for a gender key."""
+    label = GENDERS[gender]
+    suffix = '.compact.json' if output_format == 'compact' else '.json'
+    return (
+        Path(data_dir) / f'{label}-from-1996.csv',
+        Path(data_dir) / f'{label}-Historic-Top-100.csv',
+        Path(data_dir) / f'{gender}{suffix}',
+    )
+
+
+def parse_number(value):
+    """Parse an ONS CSV cell ('1,234', '[x]' or '') into an int, or MISSING."""
+    if not value or value == '[x]':
+        return MISSING
+    return int(value.replace(',', ''))
+
+
+def parse_from_1996_row(row):
+    """
+    Convert one from-1996 CSV row into a name record.
+
+    Ranks and counts are ints, with MISSING (None) where the source has no
+    value. Returns a dict:
+    {
+        "name": name,
+        "rank": 2024_rank,
+        "count": 2024_count,
+        "rankFrom1996": [1996_rank, ..., 2024_rank],
+        "countFrom1996": [1996_count, ..., 2024_count]
+    }
+    """
+    name = row['Name']
+
+    # Build rank and count arrays from 1996 to 2024
+    rank_from_1996 = [parse_number(row.get(f'{year} Rank', '')) for year in YEARS_FROM_1996]
+    count_from_1996 = [parse_number(row.get(f'{year} Count', '')) for year in YEARS_FROM_1996]
+
+    return {
+        'name': name,
+        'rank': rank_from_1996[-1],
+        'count': count_from_1996[-1],
+        'rankFrom1996': rank_from_1996,
+        'countFrom1996': count_from_1996
+    }
+
+
+def read_from_1996(csv_path):
+    """
+    Read a {Gender}-from-1996.csv file and extract name data.
+
+    Returns a dict with name as key and the record from parse_from_1996_row
+    as value.
+    """
+    names_data = {}
+
+    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+
+        for row in reader:
+            record = parse_from_1996_row(row)
+            names_data[record['name']] = record
+
+    return names_data
+
+
+def split_rows(csv_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Split a CSV file into its header fields and chunks of raw data lines.
+
+    The ONS source files have no embedded newlines inside quoted fields, so
+    splitting on line boundaries keeps every row intact.
+    """
+    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+        fieldnames = next(csv.reader([f.readline()]))
+        lines = [line for line in f if line.strip()]
+
+    chunks = [lines[i:i + chunk_size] for i in range(0, len(lines), chunk_size)]
+    return fieldnames, chunks
+
+
+def parse_chunk(fieldnames, lines):
+    """Parse a chunk of raw from-1996 lines into a list of records (in order)."""
+    reader = csv.DictReader(lines, fieldnames=fieldnames)
+    return [parse_from_1996_row(row) for row in reader]
+
+
+def read_historic_top_100(csv_path):
+    """
+    Read a {Gender}-Historic-Top-100.csv file and extract historic rankings.
+
+    Returns a dict with name as key and historic rank array as value
+    (ints, MISSING where the name is not in that year's top 100):
+    {
+        "name": [1904_rank, 1914_rank, ..., 2024_rank]
+    }
+    """
+    historic_data = {}
+
+    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+
+        # Get year columns (all columns except 'Rank')
+        year_columns = [col for col in reader.fieldnames if col != 'Rank']
+
+        for row in reader:
+            rank_position = int(row['Rank'])
+
+            # For each year, get the name at this rank position
+            for year_index, year_col in enumerate(year_columns):
+                name = row[year_col].strip()
+
+                if name:
+                    if name not in historic_data:
+                        # Initialize with MISSING for all years
+                        historic_data[name] = [MISSING] * len(year_columns)
+
+                    # Set the rank for this year
+                    historic_data[name][year_index] = rank_position
+
+    return historic_data
+
+
+def merge_data(names_data, historic_data):
+    """
+    Merge the two data sources.
+
+    Adds rankHistoric array to each name in names_data.
+    """
+    for name, data in names_data.items():
+        # Add historic ranking data if available
+        if name in historic_data:
+            data['rankHistoric'] = historic_data[name]
+        else:
+            # If name not in historic data, create array of MISSING values
+            data['rankHistoric'] = [MISSING] * HISTORIC_YEARS
+
+    return names_data
+
+
+def load_extras(paths):
+    """
+    Load extra per-name fields produced by the analysis stages.
+
+    Each file is a JSON object keyed by 'Name|Gender' whose values are
+    objects of fields to add to that name's record. Later files win.
+    """
+    extras = {}
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for key, fields in json.load(f).items():
+                extras.setdefault(key, {}).update(fields)
+    return extras
+
+
+def merge_extras(names_data, gender, extras):
+    """Add extra fields from load_extras to the records of one gender."""
+    label = GENDER_KEYS[gender]
+    merged = 0
+    for name, data in names_data.items():
+        fields = extras.get(f'{name}|{label}')
+        if fields:
+            data.update(fields)
+            merged += 1
+    return merged
+
+
+def sort_records(names_data):
+    """Sort by 2024 rank (names with rank first, then alphabetically)."""
+    output_list = list(names_data.values())
+    output_list.sort(key=lambda x: (x['rank'] is None, x['rank'] if x['rank'] else 0, x['name']))
+    return output_list
+
+
+def build_all(genders, data_dir=DATA_DIR, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, extras=None,
+              rank_method=None, pool=None):
+    """
+    Build the sorted record lists for several genders in one process pool.
+
+    Every from-1996 chunk and every historic file is submitted as its own
+    task, so all genders share the pool. Chunk results are merged back in
+    source order before merging with the historic ranks and any extras
+    (see load_extras). rank_method ('competition', 'dense' or 'ons')
+    replaces the source ranks with ranks recomputed from the counts (see
+    rank_engine.py). pool is an open ProcessPoolExecutor to use instead of
+    a new pool of worker processes.
+
+    Returns a dict mapping gender key to its sorted list of records.
+    """
+    if pool is None:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            return build_all(genders, data_dir=data_dir, chunk_size=chunk_size, extras=extras,
+                             rank_method=rank_method, pool=pool)
+
+    results = {}
+    pending = {}
+    for gender in genders:
+        from_1996_path, historic_path, _ = source_paths(gender, data_dir)
+        fieldnames, chunks = split_rows(from_1996_path, chunk_size)
+        pending[gender] = {
+            'chunks': [pool.submit(parse_chunk, fieldnames, chunk) for chunk in chunks],
+            'historic': pool.submit(read_historic_top_100, historic_path),
+        }
+        print(f"Queued {GENDERS[gender]}: {len(chunks)} chunk(s) from {from_1996_path.name}")
+
+    for gender, tasks in pending.items():
+        names_data = {}
+        for future in tasks['chunks']:
+            for record in future.result():
+                names_data[record['name']] = record
+        historic_data = tasks['historic'].result()
+
+        print(f"{GENDERS[gender]}: {len(names_data)} names, "
+              f"{len(historic_data)} unique names in historic data")
+        merge_data(names_data, historic_data)
+        if extras:
+            print(f"  Merged extra fields into {merge_extras(names_data, gender, extras)} names")
+        if rank_method:
+            # NumPy is only needed when ranks are recomputed
+            from rank_engine import recompute_record_ranks
+            recompute_record_ranks(list(names_data.values()), method=rank_method)
+            print(f"  Recomputed ranks from counts ({rank_method})")
+        results[gender] = sort_records(names_data)
+
+    return results
+
+
+def site_series(values):
+    """Convert a typed series to the site format: strings, with 'x' for missing."""
+    return ['x' if v is MISSING else str(v) for v in values]
+
+
+def site_record(record):
+    """Convert a typed record to the site's JSON format."""
+    site = dict(record)
+    for field in ('rankFrom1996', 'countFrom1996', 'rankHistoric'):
+        site[field] = site_series(site[field])
+    return site
+
+
+def write_json(output_list, output_path):
+    """Write a record list in the site's JSON format."""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump([site_record(r) for r in output_list], f, indent=2, ensure_ascii=False)
+
+
+def write_output(output_list, output_path, output_format='legacy'):
+    """
+    Serialise and write one gender's records, in the site format or compact.
+
+    Runs in a pool worker, so the genders are written in parallel; returns
+    only the summary stats for report.
+    """
+    if output_format == 'compact':
+        write_compact(output_list, output_path)
+    else:
+        write_json(output_list, output_path)
+    return {
+        'names': len(output_list),
+        'ranked': sum(1 for n in output_list if n['rank'] is not None),
+        'historic': sum(1 for n in output_list if any(r is not MISSING for r in n['rankHistoric'])),
+    }
+
+
+def report(stats, output_path):
+    """Print the summary shown after each file is written."""
+    print(f"✓ Successfully generated {output_path}")
+    print(f"  Total names: {stats['names']}")
+    print(f"  Names with 2024 rank: {stats['ranked']}")
+    print(f"  Names with historic data: {stats['historic']}")
+
+
+def generate(genders, data_dir=DATA_DIR, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+             output_format='legacy', shard_by=None, shard_dir=None, compare=False, npz=False,
+             merge_paths=(), rank_method=None, db_path=None):
+    """
+    Build and write the JSON file for each requested gender.
+
+    output_format='compact' writes {gender}.compact.json (see compact_json.py)
+    instead of the site format. shard_by ('letter' or 'name') additionally
+    writes compact shards and a manifest to shard_dir/{gender}/. npz=True
+    also writes the {gender}.npz rank/count matrices (see name_matrices.py).
+    merge_paths lists extras files whose fields are added to each record.
+    rank_method recomputes ranks from counts instead of using the source's.
+    db_path also writes every gender to one SQLite database (see
+    build_names_db.py).
+    """
+    start = time.perf_counter()
+    output_paths = {}
+    extras = load_extras(merge_paths) if merge_paths else None
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        results = build_all(genders, data_dir=data_dir, chunk_size=chunk_size, extras=extras,
+                            rank_method=rank_method, pool=pool)
+        writes = {}
+        for gender, output_list in results.items():
+            _, _, output_path = source_paths(gender, data_dir, output_format)
+            output_paths[gender] = output_path
+            print(f"Writing to {output_path}...")
+            writes[gender] = pool.submit(write_output, output_list, output_path, output_format)
+
+        # One gender's shards and sidecars are built while the other's file is still being written
+        for gender, output_list in results.items():
+            report(writes[gender].result(), output_paths[gender])
+
+            if shard_by:
+                gender_shard_dir = Path(shard_dir or Path(data_dir) / 'shards') / gender
+                shard_manifest = write_shards(output_list, gender_shard_dir, shard_by=shard_by)
+                print(f"  Wrote {len(shard_manifest['shards'])} shard(s) by {shard_by} to {gender_shard_dir}")
+
+            if npz:
+                # NumPy is only needed for the sidecar
+                from name_matrices import write_npz
+                npz_path = output_paths[gender].with_name(f'{gender}.npz')
+                write_npz(output_list, npz_path)
+                print(f"  Wrote rank/count matrices to {npz_path}")
+
+            if compare:
+                # Measure the site format as written, not the typed records
+                print_comparison(f"  Format comparison ({gender})",
+                                 compare_formats([site_record(r) for r in output_list]))
+
+    if db_path:
+        from build_names_db import write_database
+        counts = write_database(results, db_path)
+        print(f"Wrote {counts['names']} names and {counts['yearly']} yearly rows to {db_path}")
+
+    print(f"\nDone in {time.perf_counter() - start:.2f}s")
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate boys.json and girls.json from the ONS CSV files.')
+    parser.add_argument('--gender', choices=['all'] + list(GENDERS), default='all',
+                        help='Which dataset to build (default: all)')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR,
+                        help='Directory holding the source CSVs and output JSON')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Process pool size (default: number of CPUs)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='Rows per parse task for the from-1996 sources')
+    parser.add_argument('--format', dest='output_format', choices=['legacy', 'compact'], default='legacy',
+                        help='legacy: site format {gender}.json; compact: {gender}.compact.json')
+    parser.add_argument('--shard', dest='shard_by', choices=['letter', 'name'], default=None,
+                        help='Also write compact shards plus a manifest, one file per letter or name')
+    parser.add_argument('--shard-dir', type=Path, default=None,
+                        help='Directory for shards (default: <data-dir>/shards)')
+    parser.add_argument('--compare-formats', action='store_true',
+                        help='Print a size and parse-time comparison of the two formats')
+    parser.add_argument('--npz', action='store_true',
+                        help='Also write {gender}.npz with typed rank/count matrices')
+    parser.add_argument('--merge', dest='merge_paths', action='append', default=[], metavar='PATH',
+                        help="Merge extra fields from a JSON file keyed by 'Name|Gender' (repeatable)")
+    parser.add_argument('--recompute-ranks', dest='rank_method', choices=['competition', 'dense', 'ons'],
+                        default=None, help='Recompute yearly ranks from the counts with this tie rule')
+    parser.add_argument('--db', dest='db_path', type=Path, default=None, metavar='PATH',
+                        help='Also write all genders to a SQLite database at PATH')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    genders = list(GENDERS) if args.gender == 'all' else [args.gender]
+    generate(genders, data_dir=args.data_dir, workers=args.workers, chunk_size=args.chunk_size,
+             output_format=args.output_format, shard_by=args.shard_by, shard_dir=args.shard_dir,
+             compare=args.compare_formats, npz=args.npz, merge_paths=args.merge_paths,
+             rank_method=args.rank_method, db_path=args.db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Load test for name_api.py against a server on localhost.
+
+Opens a number of keep-alive connections and has each send GET requests
+back to back, cycling through a mix of lookup, top-N, rising, trajectory
+and similar-name URLs (built from the server's own /top answers), then
+reports throughput, latency percentiles and status counts. Every fourth
+request repeats the previous URL with If-None-Match to exercise the 304
+path.
+
+Usage:
+    python scripts/load_test_api.py [--port 8321] [--connections 50] [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+
+import numpy as np
+
+
+HOST = '127.0.0.1'
+PORT = 8321
+
+
+async def fetch(reader, writer, host, target, etag=None):
+    """Send one GET on an open connection; return (status, etag, body)."""
+    request = f'GET {target} HTTP/1.1\r\nHost: {host}\r\n'
+    if etag:
+        request += f'If-None-Match: {etag}\r\n'
+    writer.write((request + '\r\n').encode('latin-1'))
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    headers = dict(line.split(': ', 1) for line in lines[1:] if ': ' in line)
+    body = await reader.readexactly(int(headers.get('Content-Length', 0)))
+    return int(lines[0].split(' ')[1]), headers.get('ETag'), body
+
+
+async def build_targets(host, port, per_gender=50):
+    """A URL mix drawn from the server's own top names."""
+    reader, writer = await asyncio.open_connection(host, port)
+    targets = []
+    for gender in ('Boy', 'Girl'):
+        for year in (2024, 2010, 1996):
+            targets.append(f'/top?year={year}&gender={gender}&n=20')
+        targets.append(f'/rising?from=2020&to=2024&gender={gender}&n=20')
+        _, _, body = await fetch(reader, writer, host, f'/top?year=2024&gender={gender}&n={per_gender}')
+        for entry in json.loads(body):
+            name = entry['name']
+            targets.extend([f'/names/{name}', f'/trajectory/{name}?gender={gender}',
+                            f'/similar/{name}?gender={gender}'])
+    writer.close()
+    return targets
+
+
+async def client(host, port, targets, offset, count, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    etag = None
+    for i in range(count):
+        target = targets[(offset + i) % len(targets)]
+        revalidate = i % 4 == 3 and etag is not None
+        if revalidate:
+            target = targets[(offset + i - 1) % len(targets)]
+        start = time.perf_counter()
+        status, new_etag, _ = await fetch(reader, writer, host, target, etag if revalidate else None)
+        latencies.append(time.perf_counter() - start)
+        statuses[status] += 1
+        etag = new_etag
+    writer.close()
+
+
+async def run(host=HOST, port=PORT, connections=50, requests=20000):
+    targets = await build_targets(host, port)
+    latencies, statuses = [], Counter()
+    per_client = requests // connections
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, targets, i * 7, per_client, latencies, statuses)
+                           for i in range(connections)))
+    elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    print(f"{len(ms)} requests over {connections} connections in {elapsed:.2f}s "
+          f"({len(ms) / elapsed:,.0f} req/s, {len(targets)} distinct URLs)")
+    print(f"  latency ms: p50 {np.percentile(ms, 50):.2f}  p90 {np.percentile(ms, 90):.2f}  "
+          f"p99 {np.percentile(ms, 99):.2f}  max {ms.max():.2f}")
+    print(f"  status: {dict(sorted(statuses.items()))}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test a running name_api.py server.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--connections', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args(argv)
+    asyncio.run(run(args.host, args.port, args.connections, args.requests))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Peak memory of the feature pipeline, default vs. lean mode.
+
+Runs load_data -> extract_features -> perform_clustering from
+analyze_name_features.py once per mode, each in a fresh process so the
+peaks do not mix, and reports:
+
+- import RSS: after pandas, scikit-learn and matplotlib are imported
+- peak RSS:   the process high-water mark at the end of the run
+- data peak:  peak minus import, i.e. what the data and features cost
+
+Usage:
+    python scripts/memory_report.py [data/countTimeSeries.csv | data/boys.npz data/girls.npz]
+"""
+
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+
+MODES = ['default', 'lean']
+
+
+def peak_rss_mb():
+    """High-water RSS of this process in MB (ru_maxrss is bytes on macOS, KB elsewhere)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_pipeline(data_path, lean, results):
+    """Child process: run the pipeline and put (import_mb, peak_mb, seconds, rows) on results."""
+    sys.path.insert(0, os.path.dirname(__file__))
+    from analyze_name_features import extract_features, load_data, perform_clustering
+    import_mb = peak_rss_mb()
+
+    start = time.perf_counter()
+    df, year_cols = load_data(data_path, lean=lean)
+    features_df = extract_features(df, year_cols, lean=lean)
+    perform_clustering(features_df, n_clusters=8, lean=lean)
+    results.put((import_mb, peak_rss_mb(), time.perf_counter() - start, len(features_df)))
+
+
+def measure(data_path, lean):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=run_pipeline, args=(data_path, lean, results))
+    process.start()
+    outcome = results.get()
+    process.join()
+    return outcome
+
+
+def main(data_path='data/countTimeSeries.csv'):
+    print(f"Feature pipeline peak memory ({data_path if isinstance(data_path, str) else ' '.join(data_path)})")
+    print(f"  {'mode':<8} {'rows':>7} {'import MB':>10} {'peak MB':>9} {'data MB':>9} {'time s':>7}")
+
+    data_peaks = {}
+    for mode in MODES:
+        import_mb, peak_mb, seconds, rows = measure(data_path, lean=(mode == 'lean'))
+        data_peaks[mode] = peak_mb - import_mb
+        print(f"  {mode:<8} {rows:>7} {import_mb:>10.0f} {peak_mb:>9.0f} {data_peaks[mode]:>9.0f} {seconds:>7.1f}")
+
+    if data_peaks['default'] > 0:
+        saved = 1 - data_peaks['lean'] / data_peaks['default']
+        print(f"\nLean mode cuts the data peak by {saved:.0%}")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(args if len(args) > 1 else (args[0] if args else 'data/countTimeSeries.csv'))
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Read-only JSON API over the name data.
+
+Loads the .npz rank/count sidecars (see name_matrices.py) into memory once
+and answers GET requests on a small asyncio HTTP/1.1 server (stdlib only,
+keep-alive connections):
+
+- /names/{name}[?gender=Girl]        latest rank/count plus full series
+- /top?year=2024&gender=Girl[&n=20]  top n names by rank in a year
+- /rising?from=2020&to=2024&gender=Girl[&n=20][&within=1000]
+                                     names that climbed most places, among
+                                     those ranked within the top `within`
+                                     in the end year
+- /trajectory/{name}?gender=Boy      years, ranks and counts
+- /similar/{name}?gender=Boy[&basis=changes]
+                                     correlated names (name_correlations.py)
+- /clusters/{source}/{cluster}[?gender=Boy]
+                                     members of a cluster_{source} label
+- /health                            row counts of what is loaded
+
+Responses are built once per distinct URL and kept in an LRU cache. Each
+carries an ETag (hash of the body), and a request whose If-None-Match
+matches gets a bare 304.
+
+Usage:
+    python scripts/name_api.py [--port 8321] [--correlations data/name-correlations.json]
+        [--clusters analysis_output/name_features.csv] [data/boys.npz data/girls.npz]
+    python scripts/load_test_api.py --port 8321
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from name_correlations import BASES
+from name_matrices import MISSING, load_matrices
+
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+DEFAULT_PATHS = [DATA_DIR / 'boys.npz', DATA_DIR / 'girls.npz']
+
+HOST = '127.0.0.1'
+PORT = 8321
+CACHE_SIZE = 4096
+DEFAULT_N = 20
+MAX_N = 1000
+RISING_WITHIN = 1000
+
+GENDERS = {
+    'boy': 'Boy',
+    'boys': 'Boy',
+    'girl': 'Girl',
+    'girls': 'Girl',
+}
+
+REASONS = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error',
+}
+
+
+class ApiError(Exception):
+    """A request error answered as {'error': message} with the given status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _series(values):
+    return [None if v == MISSING else v for v in values.tolist()]
+
+
+class NameStore:
+    """The loaded matrices plus lookup indexes; every query method returns plain JSON data."""
+
+    def __init__(self, paths, correlations_path=None, clusters_path=None):
+        (self.names, self.genders, self.years, self.rank, self.count,
+         self.historic_years, self.historic) = load_matrices(paths)
+        self.rows = {}
+        for row, (name, gender) in enumerate(zip(self.names.tolist(), self.genders.tolist())):
+            self.rows.setdefault(name.lower(), []).append((gender, row))
+        self.year_column = {int(year): i for i, year in enumerate(self.years)}
+        self.gender_rows = {gender: np.flatnonzero(self.genders == gender) for gender in np.unique(self.genders)}
+
+        self.correlations = {}
+        if correlations_path:
+            with open(correlations_path, encoding='utf-8') as f:
+                self.correlations = json.load(f)
+
+        # {source: {(name, gender): cluster}}
+        self.clusters = {}
+        if clusters_path:
+            with open(clusters_path, newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                sources = [col for col in reader.fieldnames if col.startswith('cluster_')]
+                for record in reader:
+                    for col in sources:
+                        if record[col]:
+                            self.clusters.setdefault(col[len('cluster_'):], {})[
+                                (record['name'], record['gender'])] = int(float(record[col]))
+
+    def find(self, name, gender=None):
+        """Rows of a name (case-insensitive), optionally for one gender."""
+        matches = [(g, row) for g, row in self.rows.get(name.lower(), []) if gender in (None, g)]
+        if not matches:
+            raise ApiError(404, f'No name {name!r}' + (f' for {gender}' if gender else ''))
+        return matches
+
+    def rows_of(self, gender):
+        """Rows of one gender, if its sidecar is loaded."""
+        if gender not in self.gender_rows:
+            raise ApiError(404, f'No {gender} names loaded')
+        return self.gender_rows[gender]
+
+    def column(self, year):
+        if year not in self.year_column:
+            raise ApiError(400, f'Year must be {self.years[0]}-{self.years[-1]}')
+        return self.year_column[year]
+
+    def record(self, row):
+        return {
+            'name': str(self.names[row]),
+            'gender': str(self.genders[row]),
+            'rank': _series(self.rank[row, -1:])[0],
+            'count': _series(self.count[row, -1:])[0],
+            'rankFrom1996': _series(self.rank[row]),
+            'countFrom1996': _series(self.count[row]),
+            'rankHistoric': _series(self.historic[row]),
+        }
+
+    def lookup(self, name, gender=None):
+        return [self.record(row) for _, row in self.find(name, gender)]
+
+    def top(self, year, gender, n=DEFAULT_N):
+        rows = self.rows_of(gender)
+        ranks = self.rank[rows, self.column(year)]
+        ranked = np.flatnonzero(ranks != MISSING)
+        order = ranked[np.argsort(ranks[ranked], kind='stable')[:n]]
+        return [{'rank': int(ranks[i]), 'name': str(self.names[rows[i]]),
+                 'count': int(self.count[rows[i], self.column(year)])} for i in order]
+
+    def rising(self, start, end, gender, n=DEFAULT_N, within=RISING_WITHIN):
+        rows = self.rows_of(gender)
+        before = self.rank[rows, self.column(start)]
+        after = self.rank[rows, self.column(end)]
+        both = np.flatnonzero((before != MISSING) & (after != MISSING) & (after <= within))
+        gain = before[both] - after[both]
+        order = both[np.argsort(-gain, kind='stable')[:n]]
+        return [{'name': str(self.names[rows[i]]), 'from': int(before[i]), 'to': int(after[i]),
+                 'places': int(before[i] - after[i])} for i in order]
+
+    def trajectory(self, name, gender):
+        _, row = self.find(name, gender)[0]
+        return {'name': str(self.names[row]), 'gender': gender, 'years': self.years.tolist(),
+                'rank': _series(self.rank[row]), 'count': _series(self.count[row])}
+
+    def similar(self, name, gender, basis='changes'):
+        if basis not in BASES:
+            raise ApiError(400, f"basis must be one of {', '.join(BASES)}")
+        _, row = self.find(name, gender)[0]
+        entry = self.correlations.get(f'{self.names[row]}|{gender}', {})
+        return [{'name': n, 'gender': g, 'r': r} for n, g, r in entry.get(BASES[basis], [])]
+
+    def cluster_members(self, source, cluster, gender=None):
+        if source not in self.clusters:
+            raise ApiError(404, f'No cluster source {source!r}')
+        return sorted(name for (name, g), label in self.clusters[source].items()
+                      if label == cluster and gender in (None, g))
+
+    def health(self):
+        return {'names': len(self.names), 'years': [int(self.years[0]), int(self.years[-1])],
+                'correlations': len(self.correlations), 'clusterSources': sorted(self.clusters)}
+
+
+def _int_param(query, key, default=None, low=None, high=None):
+    value = query.get(key, [None])[0]
+    if value is None:
+        if default is None:
+            raise ApiError(400, f'Missing parameter {key!r}')
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ApiError(400, f'Parameter {key!r} must be an integer') from None
+    if (low is not None and number < low) or (high is not None and number > high):
+        raise ApiError(400, f'Parameter {key!r} out of range')
+    return number
+
+
+def _gender_param(query, required=True):
+    value = query.get('gender', [None])[0]
+    if value is None:
+        if required:
+            raise ApiError(400, "Missing parameter 'gender' (Boy or Girl)")
+        return None
+    if value.lower() not in GENDERS:
+        raise ApiError(400, "gender must be Boy or Girl")
+    return GENDERS[value.lower()]
+
+
+def route(store, target):
+    """Answer one request target ('/path?query') with a JSON payload, or raise ApiError."""
+    url = urlsplit(target)
+    parts = [unquote(part) for part in url.path.strip('/').split('/')]
+    query = parse_qs(url.query)
+    n = _int_param(query, 'n', DEFAULT_N, 1, MAX_N)
+
+    if parts == ['health']:
+        return store.health()
+    if parts[0] == 'names' and len(parts) == 2:
+        return store.lookup(parts[1], _gender_param(query, required=False))
+    if parts == ['top']:
+        return store.top(_int_param(query, 'year'), _gender_param(query), n)
+    if parts == ['rising']:
+        return store.rising(_int_param(query, 'from'), _int_param(query, 'to'), _gender_param(query), n,
+                            _int_param(query, 'within', RISING_WITHIN, 1))
+    if parts[0] == 'trajectory' and len(parts) == 2:
+        return store.trajectory(parts[1], _gender_param(query))
+    if parts[0] == 'similar' and len(parts) == 2:
+        return store.similar(parts[1], _gender_param(query), query.get('basis', ['changes'])[0])
+    if parts[0] == 'clusters' and len(parts) == 3:
+        try:
+            cluster = int(parts[2])
+        except ValueError:
+            raise ApiError(400, 'Cluster must be an integer') from None
+        return store.cluster_members(parts[1], cluster, _gender_param(query, required=False))
+    raise ApiError(404, f'No route for {url.path}')
+
+
+def make_responder(store, cache_size=CACHE_SIZE):
+    """
+    Return respond(target) -> (status, body bytes, etag), memoized per
+    target in an LRU cache (the store is read-only, so entries never go stale).
+    """
+    @lru_cache(maxsize=cache_size)
+    def respond(target):
+        try:
+            status, payload = 200, route(store, target)
+        except ApiError as e:
+            status, payload = e.status, {'error': str(e)}
+        except Exception as e:
+            # Answer instead of dropping the connection; the server keeps running
+            print(f"Error answering {target}: {e!r}", file=sys.stderr)
+            status, payload = 500, {'error': 'Internal server error'}
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return status, body, '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+    return respond
+
+
+def _response(status, body=b'', etag=None, keep_alive=True):
+    headers = [f'HTTP/1.1 {status} {REASONS[status]}',
+               'Content-Type: application/json; charset=utf-8',
+               f'Content-Length: {len(body)}',
+               'Cache-Control: no-cache']
+    if etag:
+        headers.append(f'ETag: {etag}')
+    if not keep_alive:
+        headers.append('Connection: close')
+    return ('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + body
+
+
+async def handle_connection(respond, reader, writer):
+    """Serve GET requests on one connection until the client closes it."""
+    try:
+        while True:
+            head = await reader.readuntil(b'\r\n\r\n')
+            lines = head.decode('latin-1').split('\r\n')
+            method, target, version = (lines[0].split(' ') + ['', ''])[:3]
+            headers = {}
+            for line in lines[1:]:
+                key, _, value = line.partition(':')
+                if key:
+                    headers[key.strip().lower()] = value.strip()
+            keep_alive = (headers.get('connection', '').lower() != 'close'
+                          and version != 'HTTP/1.0')
+
+            if method != 'GET':
+                writer.write(_response(405, b'{"error":"Only GET is supported"}', keep_alive=keep_alive))
+            else:
+                status, body, etag = respond(target)
+                if status == 200 and headers.get('if-none-match') == etag:
+                    writer.write(_response(304, etag=etag, keep_alive=keep_alive))
+                else:
+                    writer.write(_response(status, body, etag, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(store, host=HOST, port=PORT, cache_size=CACHE_SIZE):
+    respond = make_responder(store, cache_size)
+    server = await asyncio.start_server(lambda r, w: handle_connection(respond, r, w), host, port)
+    print(f"✓ Serving {len(store.names)} names on http://{host}:{port}/ (Ctrl+C to stop)")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Read-only JSON API over the name matrices.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help='LRU response cache entries')
+    parser.add_argument('--correlations', type=Path, default=None,
+                        help='name_correlations.py output for /similar (default: data/name-correlations.json if present)')
+    parser.add_argument('--clusters', type=Path, default=None,
+                        help='CSV with name, gender and cluster_* columns for /clusters')
+    parser.add_argument('paths', nargs='*', help='.npz sidecars (default: data/boys.npz data/girls.npz)')
+    args = parser.parse_args(argv)
+
+    correlations = args.correlations
+    if correlations is None and (DATA_DIR / 'name-correlations.json').exists():
+        correlations = DATA_DIR / 'name-correlations.json'
+
+    start = time.perf_counter()
+    store = NameStore(args.paths or DEFAULT_PATHS, correlations, args.clusters)
+    print(f"Loaded {len(store.names)} names in {time.perf_counter() - start:.2f}s")
+    try:
+        asyncio.run(serve(store, args.host, args.port, args.cache_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Find names whose yearly counts rose and fell together.
+
+Correlates every name's 29-year count series (countTimeSeries.csv or the
+.npz sidecars) against every other name on two bases:
+- changes: Pearson correlation of first differences of log counts (names
+  that moved in the same years)
+- levels:  Pearson correlation of log counts (names with the same overall
+  shape)
+
+Rows are z-normalized once so a correlation is a dot product. The top-k
+partners per name are then found in blocks of rows (block x N similarity
+matrix, float32) spread over a process pool, so memory stays bounded and no
+N x N matrix is ever built.
+
+Only names present in at least MIN_YEARS_PRESENT years take part; sparse
+series correlate spuriously through single spikes.
+
+Output: data/name-correlations.json, keyed by 'Name|Gender', with fields
+correlatedChanges and correlatedLevels as [name, gender, r] lists, ready to
+merge with `generate_names_json.py --merge`.
+
+Usage:
+    python scripts/name_correlations.py [top_k] [workers]
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from name_matrices import load_count_matrix
+
+
+OUTPUT_FILE = Path(__file__).parent.parent / 'data' / 'name-correlations.json'
+
+TOP_K = 10
+BLOCK_SIZE = 512
+MIN_YEARS_PRESENT = 10
+
+BASES = {
+    'changes': 'correlatedChanges',
+    'levels': 'correlatedLevels',
+}
+
+# Per-process copy of the normalized matrix, set by _init_worker
+_Z = None
+
+
+def zscore_rows(values):
+    """
+    Normalize rows so that row_i @ row_j is their Pearson correlation.
+
+    Rows with zero variance become all zeros (correlation 0 with everything).
+    """
+    values = values - values.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(values, axis=1, keepdims=True)
+    norms[norms == 0] = np.inf
+    return (values / norms).astype(np.float32)
+
+
+def prepare(counts):
+    """Return the normalized matrices for each basis."""
+    log_counts = np.log1p(counts)
+    return {
+        'changes': zscore_rows(np.diff(log_counts, axis=1)),
+        'levels': zscore_rows(log_counts),
+    }
+
+
+def _init_worker(z):
+    global _Z
+    _Z = z
+
+
+def top_k_block(start, stop, k=TOP_K):
+    """
+    Top-k partners for rows start:stop of the worker's matrix.
+
+    Returns (indices, scores), each (stop - start, k), best first.
+    """
+    similarity = _Z[start:stop] @ _Z.T
+    similarity[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+
+    k = min(k, similarity.shape[1] - 1)
+    partners = np.argpartition(-similarity, k, axis=1)[:, :k]
+    scores = np.take_along_axis(similarity, partners, axis=1)
+    order = np.argsort(-scores, axis=1)
+    return np.take_along_axis(partners, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+
+def top_k_correlations(z, k=TOP_K, block_size=BLOCK_SIZE, workers=None):
+    """Blocked top-k correlation search over all rows of z across a process pool."""
+    n = len(z)
+    indices = np.empty((n, min(k, n - 1)), dtype=np.int64)
+    scores = np.empty(indices.shape, dtype=np.float32)
+
+    blocks = [(start, min(start + block_size, n)) for start in range(0, n, block_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(z,)) as pool:
+        futures = [pool.submit(top_k_block, start, stop, k) for start, stop in blocks]
+        for (start, stop), future in zip(blocks, futures):
+            indices[start:stop], scores[start:stop] = future.result()
+
+    return indices, scores
+
+
+def build_neighbours(names, genders, results):
+    """Turn per-basis (indices, scores) into the extras mapping."""
+    neighbours = {}
+    for basis, (indices, scores) in results.items():
+        field = BASES[basis]
+        for i in range(len(names)):
+            partners = [
+                [str(names[j]), str(genders[j]), round(float(r), 3)]
+                for j, r in zip(indices[i], scores[i])
+                if r > 0
+            ]
+            neighbours.setdefault(f'{names[i]}|{genders[i]}', {})[field] = partners
+    return neighbours
+
+
+def main(k=TOP_K, workers=None, source=None, output_file=OUTPUT_FILE):
+    start = time.perf_counter()
+    print("Loading count matrix...")
+    names, genders, years, counts = load_count_matrix(source)
+
+    active = (counts > 0).sum(axis=1) >= MIN_YEARS_PRESENT
+    names, genders, counts = names[active], genders[active], counts[active]
+    print(f"  {active.sum()} names present in at least {MIN_YEARS_PRESENT} of {len(years)} years")
+
+    results = {}
+    for basis, z in prepare(counts).items():
+        basis_start = time.perf_counter()
+        results[basis] = top_k_correlations(z, k=k, workers=workers)
+        print(f"  Top {k} partners by {basis}: {time.perf_counter() - basis_start:.2f}s")
+
+    neighbours = build_neighbours(names, genders, results)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(neighbours, f, separators=(',', ':'), ensure_ascii=False)
+    print(f"✓ Saved {output_file} ({Path(output_file).stat().st_size / 1024 / 1024:.2f} MB)")
+
+    for key in ('Muhammad|Boy', 'Isla|Girl', 'Arthur|Boy'):
+        if key in neighbours:
+            partners = neighbours[key]['correlatedChanges'][:5]
+            print(f"  {key}: " + ', '.join(f"{n} ({g}) {r:.2f}" for n, g, r in partners))
+
+    print(f"\nDone in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    top_k = int(sys.argv[1]) if len(sys.argv) > 1 else TOP_K
+    pool_size = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    main(k=top_k, workers=pool_size)
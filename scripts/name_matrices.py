@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Typed rank/count matrices shared by the generators and the analysis scripts.
+
+The generators can write a NumPy .npz sidecar per gender next to boys.json /
+girls.json, holding:
+
+- names:    (N,) unicode array, in the same order as the JSON
+- years:    (29,) int array, 1996-2024
+- rank:     (N, 29) int32 matrix of yearly ranks
+- count:    (N, 29) int32 matrix of yearly counts
+- historic_years: (13,) int array, 1904-2024
+- historic: (N, 13) int32 matrix of historic top-100 ranks
+
+Missing values are stored as MISSING (-1). The loaders below turn the
+sidecars (or countTimeSeries.csv, when no sidecar exists) into the frames
+the analysis scripts already use, without re-parsing strings.
+
+Usage:
+    python scripts/name_matrices.py data/boys.npz data/girls.npz
+        Print the shape and coverage of each sidecar.
+"""
+
+import csv
+import sys
+from pathlib import Path
+
+import numpy as np
+
+
+MISSING = -1
+
+YEARS = np.arange(1996, 2025)
+HISTORIC_YEARS = np.arange(1904, 2025, 10)
+
+GENDER_LABELS = {
+    'boys': 'Boy',
+    'girls': 'Girl',
+}
+
+COUNT_CSV = Path(__file__).parent.parent / 'data' / 'countTimeSeries.csv'
+
+
+def _int_matrix(rows, width):
+    matrix = np.full((len(rows), width), MISSING, dtype=np.int32)
+    for i, row in enumerate(rows):
+        matrix[i] = [MISSING if v is None else v for v in row]
+    return matrix
+
+
+def records_to_matrices(records):
+    """Build the sidecar arrays from typed generator records (ints and None)."""
+    return {
+        'names': np.array([r['name'] for r in records], dtype=str),
+        'years': YEARS,
+        'rank': _int_matrix([r['rankFrom1996'] for r in records], len(YEARS)),
+        'count': _int_matrix([r['countFrom1996'] for r in records], len(YEARS)),
+        'historic_years': HISTORIC_YEARS,
+        'historic': _int_matrix([r['rankHistoric'] for r in records], len(HISTORIC_YEARS)),
+    }
+
+
+def write_npz(records, path):
+    """Write the sidecar for one gender (uncompressed, so loads are cheap)."""
+    np.savez(path, **records_to_matrices(records))
+
+
+def gender_from_path(path):
+    """Infer the 'Boy'/'Girl' label from a sidecar filename such as boys.npz."""
+    stem = Path(path).name.split('.')[0]
+    return GENDER_LABELS[stem.replace('-dev', '')]
+
+
+def load_npz(path):
+    """Load one sidecar as a dict of arrays."""
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def load_matrices(paths):
+    """
+    Load and stack several sidecars.
+
+    Returns (names, genders, years, rank, count, historic_years, historic);
+    the matrices keep MISSING for absent values.
+    """
+    parts = [(load_npz(p), gender_from_path(p)) for p in paths]
+    names = np.concatenate([d['names'] for d, _ in parts])
+    genders = np.concatenate([np.full(len(d['names']), g) for d, g in parts])
+    return (
+        names,
+        genders,
+        parts[0][0]['years'],
+        np.vstack([d['rank'] for d, _ in parts]),
+        np.vstack([d['count'] for d, _ in parts]),
+        parts[0][0]['historic_years'],
+        np.vstack([d['historic'] for d, _ in parts]),
+    )
+
+
+def _as_float(matrix, missing=np.nan):
+    values = matrix.astype(float)
+    values[matrix == MISSING] = missing
+    return values
+
+
+def read_count_csv(csv_path=COUNT_CSV):
+    """
+    Read countTimeSeries.csv with the csv module into typed arrays.
+
+    Returns (names, genders, years, counts) with counts as a float matrix
+    (the CSV already has 0 where the source had 'x').
+    """
+    names, genders, rows = [], [], []
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        for row in reader:
+            name, gender = row[0].split('|')
+            names.append(name)
+            genders.append(gender)
+            rows.append(row[1:])
+    years = np.array([int(y) for y in header[1:]])
+    counts = np.array(rows, dtype=float) if rows else np.zeros((0, len(years)))
+    return np.array(names, dtype=str), np.array(genders, dtype=str), years, counts
+
+
+def load_count_matrix(source=None, missing=0.0):
+    """
+    Load the yearly count matrix from .npz sidecars or countTimeSeries.csv.
+
+    source is a path or list of paths; .npz paths are stacked, anything else
+    is read as countTimeSeries.csv. Missing counts become `missing` (0 by
+    default, matching countTimeSeries.csv).
+
+    Returns (names, genders, years, counts).
+    """
+    if source is None:
+        source = COUNT_CSV
+    paths = [source] if isinstance(source, (str, Path)) else list(source)
+    if all(str(p).endswith('.npz') for p in paths):
+        names, genders, years, _, count, _, _ = load_matrices(paths)
+        return names, genders, years, _as_float(count, missing)
+    return read_count_csv(paths[0])
+
+
+def load_count_frame(source=None, missing=0.0):
+    """
+    Load counts as the frame analyze_name_features.load_data builds.
+
+    Returns (df, year_cols) where df has one column per year (as strings)
+    plus 'name' and 'gender'.
+    """
+    import pandas as pd
+
+    names, genders, years, counts = load_count_matrix(source, missing=missing)
+    year_cols = [str(y) for y in years]
+    df = pd.DataFrame(counts, columns=year_cols)
+    df['name'] = names
+    df['gender'] = genders
+    return df, year_cols
+
+
+def lean_frame(df, category_columns=('name', 'gender')):
+    """
+    Shrink a frame in place for the memory-lean analysis mode: float64
+    columns become float32 and label columns become categoricals.
+
+    Columns are converted one at a time, so the frame is never copied
+    whole. Returns df.
+    """
+    for col in df.columns:
+        if col in category_columns:
+            df[col] = df[col].astype('category')
+        elif df[col].dtype == np.float64:
+            df[col] = df[col].astype(np.float32)
+    return df
+
+
+def load_rank_frame(paths, with_gender=False):
+    """
+    Load ranks in the all_ranks.csv layout from .npz sidecars.
+
+    Columns are 'name', the historic decades 1904-1994 and the yearly ranks
+    1996-2024, with NaN where a name is unranked. with_gender=True adds a
+    'gender' column after 'name' (all_ranks.csv has none).
+    """
+    import pandas as pd
+
+    names, genders, years, rank, _, historic_years, historic = load_matrices(paths)
+    decade_mask = historic_years <= 1994
+    df = pd.DataFrame(
+        np.hstack([_as_float(historic[:, decade_mask]), _as_float(rank)]),
+        columns=[str(y) for y in historic_years[decade_mask]] + [str(y) for y in years],
+    )
+    df.insert(0, 'name', names)
+    if with_gender:
+        df.insert(1, 'gender', genders)
+    return df
+
+
+def main(paths):
+    for path in paths:
+        data = load_npz(path)
+        present = (data['count'] != MISSING).sum()
+        print(f"{path}: {len(data['names'])} names x {len(data['years'])} years, "
+              f"{present} counts present, "
+              f"{(data['historic'] != MISSING).any(axis=1).sum()} names with historic ranks")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or ['data/boys.npz', 'data/girls.npz'])
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+Spelling-variant grouping for names (Isla/Islah, Mohammed/Muhammad/Mohammad).
+
+Builds two indexes over every name:
+- a phonetic key index (a simplified metaphone key, with NYSIIS available
+  as an alternative) used to block names that sound alike
+- a BK-tree over bounded Levenshtein distance for ad-hoc "names spelled
+  like X" lookups (--similar)
+
+Names are grouped per gender: within each phonetic block, names are visited
+from most to least popular and each joins the first group leader within its
+edit budget, otherwise it starts a new group. Distances are measured on
+folded spellings (doubled letters collapsed, a final H after a vowel
+dropped). The budget is one edit per four letters of the shorter folded
+spelling (rounded), capped at MAX_DISTANCE, and none below SHORT_NAME
+letters, where one letter is often a different name: Isla/Islah and
+Mohammed/Muhammad group but Lee/Leo and Lila/Lily do not (MUST_GROUP and
+MUST_STAY_APART are checked on every run). The leader (the most popular spelling) labels the group, and
+leader-only comparison avoids chaining unrelated names together through
+intermediate spellings.
+
+Outputs:
+- data/variantGroups.csv: name|gender, group, key
+- data/countTimeSeries_variants.csv: combined count series per group, in
+  the countTimeSeries.csv layout so any analysis can run on it
+
+Usage:
+    python scripts/name_variants.py [max_distance] [--key nysiis]
+    python scripts/name_variants.py --similar Islah
+        Spellings within max_distance edits of a name, with their groups
+"""
+
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from name_matrices import load_count_matrix
+
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+GROUPS_FILE = DATA_DIR / 'variantGroups.csv'
+VARIANT_COUNTS_FILE = DATA_DIR / 'countTimeSeries_variants.csv'
+
+MAX_DISTANCE = 2
+SHORT_NAME = 5
+
+# Regression pairs, checked by main(): (name, other, gender)
+MUST_GROUP = [('Isla', 'Islah', 'Girl'), ('Mohammed', 'Muhammad', 'Boy'), ('Lily', 'Lilly', 'Girl'),
+              ('Sara', 'Sarah', 'Girl')]
+MUST_STAY_APART = [('Lee', 'Leo', 'Boy'), ('Lula', 'Lola', 'Girl'), ('Lela', 'Lola', 'Girl'),
+                   ('Jock', 'Jack', 'Boy'), ('Lila', 'Lily', 'Girl'), ('Eve', 'Evie', 'Girl'),
+                   ('Jack', 'Jake', 'Boy'), ('Lily', 'Lola', 'Girl')]
+
+VOWELS = set('AEIOU')
+
+
+def normalize(name):
+    """Uppercase ASCII letters only ('Zoë-Mae' -> 'ZOEMAE')."""
+    ascii_name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^A-Z]', '', ascii_name.upper())
+
+
+def phonetic_key(name):
+    """
+    Simplified metaphone key.
+
+    Keeps the leading vowel, maps consonant clusters to one sound
+    (PH->F, CK->K, SCH->SK, SH/CH->X, TH->0, soft C/G->S/J, Q->K, X->KS,
+    Z->S), drops other vowels, silent H/W/Y and repeated letters.
+    """
+    word = normalize(name)
+    if not word:
+        return ''
+
+    for prefix, replacement in (('KN', 'N'), ('GN', 'N'), ('PN', 'N'), ('WR', 'R'), ('PS', 'S')):
+        if word.startswith(prefix):
+            word = replacement + word[2:]
+            break
+    if word.startswith('X'):
+        word = 'S' + word[1:]
+
+    key = []
+    i = 0
+    while i < len(word):
+        char = word[i]
+        nxt = word[i + 1] if i + 1 < len(word) else ''
+        prev = word[i - 1] if i > 0 else ''
+        code = ''
+
+        if char in VOWELS:
+            code = char if i == 0 else ''
+        elif char == 'B':
+            code = '' if prev == 'M' and i == len(word) - 1 else 'B'
+        elif char == 'C':
+            if word[i:i + 3] == 'SCH':
+                code = 'K'
+                i += 2
+            elif nxt == 'H':
+                code = 'X'
+                i += 1
+            elif nxt in ('I', 'E', 'Y'):
+                code = 'S'
+            elif nxt == 'K':
+                code = 'K'
+                i += 1
+            else:
+                code = 'K'
+        elif char == 'D':
+            if nxt == 'G' and word[i + 2:i + 3] in ('E', 'I', 'Y'):
+                code = 'J'
+                i += 1
+            else:
+                code = 'T'
+        elif char == 'G':
+            if nxt == 'H' and word[i + 2:i + 3] not in VOWELS:
+                code = ''
+                i += 1
+            elif nxt == 'N' and i + 2 >= len(word):
+                code = ''
+            elif nxt in ('I', 'E', 'Y') and prev != 'G':
+                code = 'J'
+            else:
+                code = 'K'
+        elif char == 'H':
+            # Silent unless before a vowel and not after a modifying consonant
+            code = 'H' if nxt in VOWELS and prev not in set('CGPST') else ''
+        elif char == 'K':
+            code = '' if prev == 'C' else 'K'
+        elif char == 'P':
+            if nxt == 'H':
+                code = 'F'
+                i += 1
+            else:
+                code = 'P'
+        elif char == 'Q':
+            code = 'K'
+        elif char == 'S':
+            if nxt == 'H':
+                code = 'X'
+                i += 1
+            elif word[i:i + 3] in ('SIO', 'SIA'):
+                code = 'X'
+            else:
+                code = 'S'
+        elif char == 'T':
+            if nxt == 'H':
+                code = '0'
+                i += 1
+            elif word[i:i + 3] in ('TIO', 'TIA'):
+                code = 'X'
+            else:
+                code = 'T'
+        elif char == 'V':
+            code = 'F'
+        elif char in ('W', 'Y'):
+            code = char if nxt in VOWELS else ''
+        elif char == 'X':
+            code = 'KS'
+        elif char == 'Z':
+            code = 'S'
+        else:
+            code = char
+
+        if code and not (key and key[-1] == code):
+            key.append(code)
+        i += 1
+
+    return ''.join(key)
+
+
+def nysiis(name):
+    """NYSIIS phonetic code (New York State Identification and Intelligence System)."""
+    word = normalize(name)
+    if not word:
+        return ''
+
+    for prefix, replacement in (('MAC', 'MCC'), ('KN', 'NN'), ('K', 'C'), ('PH', 'FF'),
+                                ('PF', 'FF'), ('SCH', 'SSS')):
+        if word.startswith(prefix):
+            word = replacement + word[len(prefix):]
+            break
+    for suffix, replacement in (('EE', 'Y'), ('IE', 'Y'), ('DT', 'D'), ('RT', 'D'),
+                                ('RD', 'D'), ('NT', 'D'), ('ND', 'D')):
+        if word.endswith(suffix):
+            word = word[:-len(suffix)] + replacement
+            break
+
+    key = word[0]
+    chars = list(word)
+    i = 1
+    while i < len(chars):
+        char = chars[i]
+        if chars[i:i + 2] == ['E', 'V']:
+            chars[i:i + 2] = ['A', 'F']
+        elif char in VOWELS:
+            chars[i] = 'A'
+        elif char == 'Q':
+            chars[i] = 'G'
+        elif char == 'Z':
+            chars[i] = 'S'
+        elif char == 'M':
+            chars[i] = 'N'
+        elif chars[i:i + 2] == ['K', 'N']:
+            chars[i] = 'N'
+        elif char == 'K':
+            chars[i] = 'C'
+        elif chars[i:i + 3] == ['S', 'C', 'H']:
+            chars[i:i + 3] = ['S', 'S', 'S']
+        elif chars[i:i + 2] == ['P', 'H']:
+            chars[i:i + 2] = ['F', 'F']
+        elif char == 'H' and (chars[i - 1] not in VOWELS or i + 1 == len(chars) or chars[i + 1] not in VOWELS):
+            chars[i] = chars[i - 1]
+        elif char == 'W' and chars[i - 1] in VOWELS:
+            chars[i] = chars[i - 1]
+
+        if chars[i] != key[-1]:
+            key += chars[i]
+        i += 1
+
+    if len(key) > 1 and key.endswith('S'):
+        key = key[:-1]
+    if key.endswith('AY'):
+        key = key[:-2] + 'Y'
+    if len(key) > 1 and key.endswith('A'):
+        key = key[:-1]
+    return key
+
+
+KEY_FUNCS = {'metaphone': phonetic_key, 'nysiis': nysiis}
+
+
+def edit_distance(a, b, max_distance=None):
+    """
+    Levenshtein distance between two strings.
+
+    With max_distance set, returns max_distance + 1 as soon as the distance
+    is known to exceed it.
+    """
+    if a == b:
+        return 0
+    if max_distance is not None and abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class BKTree:
+    """Burkhard-Keller tree for bounded edit-distance lookups."""
+
+    def __init__(self, words=()):
+        self.root = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        if self.root is None:
+            self.root = (word, {})
+            return
+        node = self.root
+        while True:
+            distance = edit_distance(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                return
+            node = child
+
+    def search(self, word, max_distance=MAX_DISTANCE):
+        """Return [(distance, word)] within max_distance, nearest first."""
+        if self.root is None:
+            return []
+        matches = []
+        stack = [self.root]
+        while stack:
+            node_word, children = stack.pop()
+            distance = edit_distance(word, node_word)
+            if distance <= max_distance:
+                matches.append((distance, node_word))
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return sorted(matches)
+
+
+def fold(spelling):
+    """Normalized spelling with doubled letters collapsed and a final H after a vowel dropped ('ISLAH' -> 'ISLA')."""
+    folded = re.sub(r'(.)\1+', r'\1', spelling)
+    if len(folded) > 2 and folded[-1] == 'H' and folded[-2] in VOWELS:
+        folded = folded[:-1]
+    return folded
+
+
+def edit_budget(a, b, max_distance=MAX_DISTANCE):
+    """Edits allowed between two folded spellings: none below SHORT_NAME letters, then one per four (rounded)."""
+    shorter = min(len(a), len(b))
+    return 0 if shorter < SHORT_NAME else min(max_distance, (shorter + 1) // 4)
+
+
+def within_budget(a, b, max_distance=MAX_DISTANCE):
+    """Whether two normalized spellings are close enough to be variants."""
+    a, b = fold(a), fold(b)
+    budget = edit_budget(a, b, max_distance)
+    return edit_distance(a, b, budget) <= budget
+
+
+def same_group(a, b, max_distance=MAX_DISTANCE, key_func=phonetic_key):
+    """Whether build_groups would put two names of one gender in one group (as leader and variant)."""
+    return key_func(a) == key_func(b) and within_budget(normalize(a), normalize(b), max_distance)
+
+
+def check_pairs(max_distance=MAX_DISTANCE, key_func=phonetic_key):
+    """Regression pairs grouped the wrong way: [(name, other, gender, expected)]."""
+    failures = [(a, b, gender, 'group') for a, b, gender in MUST_GROUP
+                if not same_group(a, b, max_distance, key_func)]
+    return failures + [(a, b, gender, 'apart') for a, b, gender in MUST_STAY_APART
+                       if same_group(a, b, max_distance, key_func)]
+
+
+def build_groups(names, genders, totals, max_distance=MAX_DISTANCE, key_func=phonetic_key):
+    """
+    Assign every name to a variant group.
+
+    Returns (groups, keys): the group leader for each row and its phonetic
+    key. Leaders are the most popular spelling (by totals) in each group.
+    """
+    keys = [key_func(name) for name in names]
+    blocks = {}
+    for i in np.argsort(-np.asarray(totals), kind='stable'):
+        blocks.setdefault((genders[i], keys[i]), []).append(i)
+
+    groups = [None] * len(names)
+    for members in blocks.values():
+        leaders = []
+        for i in members:
+            spelling = normalize(names[i])
+            for leader in leaders:
+                if within_budget(spelling, normalize(names[leader]), max_distance):
+                    groups[i] = names[leader]
+                    break
+            else:
+                leaders.append(i)
+                groups[i] = names[i]
+    return groups, keys
+
+
+def combine_counts(genders, counts, groups):
+    """
+    Sum count series per (group, gender).
+
+    Returns (group_names, group_genders, combined_counts, sizes).
+    """
+    index = {}
+    rows = np.empty(len(groups), dtype=int)
+    for i, (group, gender) in enumerate(zip(groups, genders)):
+        rows[i] = index.setdefault((group, gender), len(index))
+
+    combined = np.zeros((len(index), counts.shape[1]), dtype=counts.dtype)
+    np.add.at(combined, rows, counts)
+    sizes = np.bincount(rows, minlength=len(index))
+    keys = list(index)
+    return [k[0] for k in keys], [k[1] for k in keys], combined, sizes
+
+
+def group_count_frame(df, year_cols, max_distance=MAX_DISTANCE):
+    """
+    Collapse a frame from analyze_name_features.load_data to variant groups.
+
+    The combined frame keeps the same layout, with the group leader as name
+    and a 'variants' column holding the number of spellings combined.
+    """
+    import pandas as pd
+
+    counts = df[year_cols].to_numpy(dtype=float, na_value=0.0)
+    groups, _ = build_groups(df['name'].tolist(), df['gender'].tolist(), counts.sum(axis=1), max_distance)
+    names, genders, combined, sizes = combine_counts(df['gender'].tolist(), counts, groups)
+
+    grouped = pd.DataFrame(combined, columns=year_cols)
+    grouped['name'] = names
+    grouped['gender'] = genders
+    grouped['variants'] = sizes
+    return grouped
+
+
+def similar_names(tree, name, max_distance=MAX_DISTANCE):
+    """Names within max_distance edits of name, using a BKTree built over normalized names."""
+    return tree.search(normalize(name), max_distance)
+
+
+def print_similar(name, names, genders, groups, max_distance=MAX_DISTANCE):
+    """Print the spellings within max_distance edits of name, with the group each belongs to."""
+    spellings = {}
+    for row, spelling in enumerate(normalize(n) for n in names):
+        spellings.setdefault(spelling, []).append(row)
+    tree = BKTree(spellings)
+    print(f"\nSpellings within {max_distance} edits of {name}:")
+    for distance, spelling in similar_names(tree, name, max_distance):
+        for row in spellings[spelling]:
+            print(f"  {distance}  {names[row]} ({genders[row]}) -> {groups[row]}")
+
+
+def write_groups(path, names, genders, groups, keys):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['name|gender', 'group', 'key'])
+        for name, gender, group, key in zip(names, genders, groups, keys):
+            writer.writerow([f'{name}|{gender}', group, key])
+
+
+def write_variant_counts(path, names, genders, combined, years):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['name|gender'] + [str(y) for y in years])
+        for name, gender, row in zip(names, genders, combined):
+            writer.writerow([f'{name}|{gender}'] + [int(v) for v in row])
+
+
+def main(max_distance=MAX_DISTANCE, source=None, key='metaphone', similar=None):
+    start = time.perf_counter()
+    key_func = KEY_FUNCS[key]
+    print("Loading count matrix...")
+    names, genders, years, counts = load_count_matrix(source)
+    names, genders = names.tolist(), genders.tolist()
+    print(f"  {len(names)} names")
+
+    print(f"Grouping spelling variants (max distance {max_distance}, {key} keys)...")
+    groups, keys = build_groups(names, genders, counts.sum(axis=1), max_distance, key_func)
+    group_names, group_genders, combined, sizes = combine_counts(genders, counts, groups)
+    print(f"  {len(group_names)} groups, {int((sizes > 1).sum())} with more than one spelling")
+
+    write_groups(GROUPS_FILE, names, genders, groups, keys)
+    write_variant_counts(VARIANT_COUNTS_FILE, group_names, group_genders, combined, years)
+    print(f"✓ Saved {GROUPS_FILE}")
+    print(f"✓ Saved {VARIANT_COUNTS_FILE}")
+
+    largest = np.argsort(-combined.sum(axis=1))[:10]
+    members = {}
+    for name, gender, group in zip(names, genders, groups):
+        members.setdefault((group, gender), []).append(name)
+    print("\nLargest groups:")
+    for i in largest:
+        spellings = members[(group_names[i], group_genders[i])]
+        print(f"  {group_names[i]} ({group_genders[i]}): {', '.join(spellings[:6])}"
+              f"{' ...' if len(spellings) > 6 else ''}")
+
+    failures = check_pairs(max_distance, key_func)
+    if failures:
+        print(f"\n⚠ {len(failures)} regression pair(s) grouped the wrong way:")
+        for a, b, gender, expected in failures:
+            print(f"  {a}/{b} ({gender}): expected {expected}")
+    else:
+        print(f"\n✓ {len(MUST_GROUP)} must-group and {len(MUST_STAY_APART)} must-stay-apart pairs OK")
+
+    if similar:
+        print_similar(similar, names, genders, groups, max_distance)
+
+    print(f"\nDone in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Group spelling variants and combine their counts.')
+    parser.add_argument('max_distance', nargs='?', type=int, default=MAX_DISTANCE)
+    parser.add_argument('--key', choices=sorted(KEY_FUNCS), default='metaphone', help='Phonetic key for blocking')
+    parser.add_argument('--similar', metavar='NAME', help='Also list the spellings within max_distance of NAME')
+    args = parser.parse_args()
+    main(max_distance=args.max_distance, key=args.key, similar=args.similar)
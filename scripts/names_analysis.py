@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+names-analysis: one command line entry point for the analysis scripts.
+
+Each subcommand imports its analysis module only when it runs, so
+`--help` and the light subcommands start without loading pandas,
+matplotlib, scikit-learn or hdbscan.
+
+Usage:
+    python scripts/names_analysis.py --help
+    python scripts/names_analysis.py features --min-avg-count 500 --output-dir analysis_output/popular_names_500
+    python scripts/names_analysis.py unpopular --max-avg-count 500
+    python scripts/names_analysis.py features --lean
+    python scripts/names_analysis.py memory-report
+    python scripts/names_analysis.py features-chunked --block-size 5000
+    python scripts/names_analysis.py stability --n-boot 200
+    python scripts/names_analysis.py select-k --k-min 2 --k-max 12
+    python scripts/names_analysis.py features --n-clusters auto
+    python scripts/names_analysis.py all-ranks [data/boys.npz data/girls.npz]
+    python scripts/names_analysis.py recent [data/boys.npz data/girls.npz]
+    python scripts/names_analysis.py historic
+    python scripts/names_analysis.py decades data/boys.npz data/girls.npz
+    python scripts/names_analysis.py historic --decade-stat mean data/rankDecadeAggregates.csv
+    python scripts/names_analysis.py dtw
+    python scripts/names_analysis.py gap-dtw --n-clusters 8 data/boys.npz data/girls.npz
+    python scripts/names_analysis.py all-ranks --shape-clusters 8 data/boys.npz data/girls.npz
+    python scripts/names_analysis.py variants
+    python scripts/names_analysis.py correlations --top-k 10
+    python scripts/names_analysis.py forecast --backtest
+    python scripts/names_analysis.py changepoints --penalty 10
+    python scripts/names_analysis.py cross-gender
+    python scripts/names_analysis.py totals
+    python scripts/names_analysis.py diversity
+    python scripts/names_analysis.py diff data/rankHistoricTimeSeries.csv
+    python scripts/names_analysis.py columnar analysis_output/all_ranks/features_with_clusters.csv
+    python scripts/names_analysis.py features --normalize share
+    python scripts/names_analysis.py features --unisex --n-clusters 4 --output-dir analysis_output/unisex
+    python scripts/names_analysis.py ranks data/boys.npz data/girls.npz
+    python scripts/names_analysis.py db --features analysis_output/name_features.csv
+    python scripts/names_analysis.py serve --port 8321
+    python scripts/names_analysis.py matrices data/boys.npz data/girls.npz
+    python scripts/names_analysis.py compare-formats data/boys.json data/girls.json
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+
+def cluster_count(value):
+    """argparse type for --n-clusters: an int or 'auto' (see select_k.py)."""
+    return value if value == 'auto' else int(value)
+
+
+def cmd_features(args):
+    from analyze_name_features import main
+    main(min_avg_count=args.min_avg_count, output_dir=args.output_dir,
+         data_path=args.data or 'data/countTimeSeries.csv', variant_groups=args.variant_groups,
+         n_clusters=args.n_clusters, lean=args.lean, unisex=args.unisex, normalize=args.normalize)
+
+
+def cmd_memory_report(args):
+    from memory_report import main
+    main(args.data or 'data/countTimeSeries.csv')
+
+
+def cmd_features_chunked(args):
+    from chunked_features import main
+    main(filepath=args.data, output_dir=args.output_dir, block_size=args.block_size,
+         n_clusters=args.n_clusters)
+
+
+def cmd_stability(args):
+    from cluster_stability import main
+    main(n_boot=args.n_boot, min_avg_count=args.min_avg_count, output_dir=args.output_dir,
+         data_path=args.data or 'data/countTimeSeries.csv', n_clusters=args.n_clusters,
+         workers=args.workers)
+
+
+def cmd_select_k(args):
+    from select_k import main
+    main(k_min=args.k_min, k_max=args.k_max, min_avg_count=args.min_avg_count,
+         data_path=args.data or 'data/countTimeSeries.csv')
+
+
+def cmd_unpopular(args):
+    from analyze_unpopular_names import main_unpopular
+    main_unpopular(max_avg_count=args.max_avg_count, output_dir=args.output_dir)
+
+
+def cmd_all_ranks(args):
+    from analyze_all_ranks import main
+    main(args.data, n_shape_clusters=args.shape_clusters, n_clusters=args.n_clusters, lean=args.lean)
+
+
+def cmd_recent(args):
+    from analyze_recent_5yr import main
+    main(args.data, n_clusters=args.n_clusters, lean=args.lean)
+
+
+def cmd_historic(args):
+    from analyze_historic_features import INPUT_FILE, main
+    main(input_file=args.data or INPUT_FILE, decade_stat=args.decade_stat,
+         n_shape_clusters=args.shape_clusters, n_clusters=args.n_clusters)
+
+
+def cmd_decades(args):
+    from decade_aggregates import main
+    main([f'--max-rank={args.max_rank}'] + args.paths)
+
+
+def cmd_dtw(args):
+    from timeseries_clustering import main
+    main(sample_size=args.sample_size, normalize=args.normalize)
+
+
+def cmd_gap_dtw(args):
+    from gap_dtw import main
+    main(n_clusters=args.n_clusters, sample_size=args.sample_size, data_paths=args.data)
+
+
+def cmd_variants(args):
+    from name_variants import main
+    main(max_distance=args.max_distance, key=args.key, similar=args.similar)
+
+
+def cmd_correlations(args):
+    from name_correlations import main
+    main(k=args.top_k, workers=args.workers, source=args.data or None)
+
+
+def cmd_forecast(args):
+    from forecast_names import main
+    main(source=args.data or None, run_backtest=args.backtest)
+
+
+def cmd_changepoints(args):
+    from changepoints import main
+    main(penalty=args.penalty, source=args.data or None)
+
+
+def cmd_cross_gender(args):
+    from cross_gender import main
+    main(source=args.data or None)
+
+
+def cmd_totals(args):
+    from normalize_counts import main
+    main(args.data if len(args.data) > 1 else (args.data[0] if args.data else None))
+
+
+def cmd_diversity(args):
+    from diversity_metrics import main
+    main((['--full'] if args.full else []) + args.data)
+
+
+def cmd_diff(args):
+    from run_diff import main
+    argv = args.paths + (['--label', args.label] if args.label else []) + (['--rank', args.rank] if args.rank else [])
+    main(argv + (['--align'] if args.align else []))
+
+
+def cmd_columnar(args):
+    from columnar_outputs import main
+    main((['--info'] if args.info else []) + args.paths)
+
+
+def cmd_ranks(args):
+    from rank_engine import main
+    main(args.paths)
+
+
+def cmd_db(args):
+    from build_names_db import main
+    argv = [f'--output={args.output}'] if args.output else []
+    if args.features:
+        argv.append(f'--features={args.features}')
+    main(argv + args.paths)
+
+
+def cmd_serve(args):
+    from name_api import main
+    argv = [f'--port={args.port}']
+    if args.correlations:
+        argv.append(f'--correlations={args.correlations}')
+    if args.clusters:
+        argv.append(f'--clusters={args.clusters}')
+    main(argv + args.paths)
+
+
+def cmd_matrices(args):
+    from name_matrices import main
+    main(args.paths)
+
+
+def cmd_compare_formats(args):
+    from compact_json import main
+    main(args.paths)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='names-analysis',
+        description='Run the baby name analysis stages.',
+    )
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+
+    p = subparsers.add_parser('features', help='Count-series feature clustering (analyze_name_features.py)')
+    p.add_argument('--min-avg-count', type=int, default=0, help='Only keep names with at least this average count')
+    p.add_argument('--output-dir', default='analysis_output')
+    p.add_argument('--n-clusters', type=cluster_count, default=8, help="k for k-means, or 'auto'")
+    p.add_argument('--variant-groups', action='store_true',
+                   help='Cluster spelling-variant groups (name_variants.py) instead of individual names')
+    p.add_argument('--lean', action='store_true', help='float32/categorical frames and fewer copies')
+    p.add_argument('--unisex', action='store_true',
+                   help='Only cluster names given to both genders with a high unisex score (cross_gender.py)')
+    p.add_argument('--normalize', choices=['raw', 'share', 'log_share'], default='raw',
+                   help='Use births per million (or its log1p) instead of raw counts (normalize_counts.py)')
+    p.add_argument('data', nargs='*', help='countTimeSeries.csv or .npz sidecars (default: data/countTimeSeries.csv)')
+    p.set_defaults(func=cmd_features)
+
+    p = subparsers.add_parser('memory-report', help='Peak RSS of the feature pipeline, default vs. lean (memory_report.py)')
+    p.add_argument('data', nargs='*', help='countTimeSeries.csv or .npz sidecars (default: data/countTimeSeries.csv)')
+    p.set_defaults(func=cmd_memory_report)
+
+    p = subparsers.add_parser('features-chunked', help='Out-of-core feature extraction and clustering (chunked_features.py)')
+    p.add_argument('--block-size', type=int, default=5000, help='Rows per block')
+    p.add_argument('--n-clusters', type=int, default=8)
+    p.add_argument('--output-dir', default='analysis_output/chunked')
+    p.add_argument('data', nargs='?', default='data/countTimeSeries.csv')
+    p.set_defaults(func=cmd_features_chunked)
+
+    p = subparsers.add_parser('stability', help='Bootstrap stability of the feature k-means clusters (cluster_stability.py)')
+    p.add_argument('--n-boot', type=int, default=200, help='Number of bootstrap resamples')
+    p.add_argument('--n-clusters', type=int, default=8)
+    p.add_argument('--min-avg-count', type=int, default=0)
+    p.add_argument('--workers', type=int, default=None)
+    p.add_argument('--output-dir', default='analysis_output')
+    p.add_argument('data', nargs='*', help='countTimeSeries.csv or .npz sidecars (default: data/countTimeSeries.csv)')
+    p.set_defaults(func=cmd_stability)
+
+    p = subparsers.add_parser('select-k', help='Score k for the feature k-means (select_k.py)')
+    p.add_argument('--k-min', type=int, default=2)
+    p.add_argument('--k-max', type=int, default=12)
+    p.add_argument('--min-avg-count', type=int, default=0)
+    p.add_argument('data', nargs='*', help='countTimeSeries.csv or .npz sidecars (default: data/countTimeSeries.csv)')
+    p.set_defaults(func=cmd_select_k)
+
+    p = subparsers.add_parser('unpopular', help='Feature clustering of names below an average count (analyze_unpopular_names.py)')
+    p.add_argument('--max-avg-count', type=int, default=500)
+    p.add_argument('--output-dir', default='analysis_output/unpopular_names')
+    p.set_defaults(func=cmd_unpopular)
+
+    p = subparsers.add_parser('all-ranks', help='Rank feature clustering over 1904-2024 (analyze_all_ranks.py)')
+    p.add_argument('--shape-clusters', type=int, default=0, metavar='K',
+                   help='Also add K gap-aware DTW shape clusters (gap_dtw.py)')
+    p.add_argument('--n-clusters', type=cluster_count, default=8, help="k for k-means, or 'auto'")
+    p.add_argument('--lean', action='store_true', help='float32/categorical frames and fewer copies')
+    p.add_argument('data', nargs='*', help='.npz sidecars to use instead of data/all_ranks.csv')
+    p.set_defaults(func=cmd_all_ranks)
+
+    p = subparsers.add_parser('recent', help='Rank feature clustering over 2020-2024 (analyze_recent_5yr.py)')
+    p.add_argument('--n-clusters', type=cluster_count, default=6, help="k for k-means, or 'auto'")
+    p.add_argument('--lean', action='store_true', help='float32/categorical frames and fewer copies')
+    p.add_argument('data', nargs='*', help='.npz sidecars to use instead of data/all_ranks.csv')
+    p.set_defaults(func=cmd_recent)
+
+    p = subparsers.add_parser('historic', help='Historic top-100 decade clustering (analyze_historic_features.py)')
+    p.add_argument('--n-clusters', type=cluster_count, default=6, help="k for k-means, or 'auto'")
+    p.add_argument('--decade-stat', choices=['mean', 'best', 'last'], default=None,
+                   help='Cluster this statistic from a decade aggregates CSV (decade_aggregates.py)')
+    p.add_argument('--shape-clusters', type=int, default=0, metavar='K',
+                   help='Also add K gap-aware DTW shape clusters (gap_dtw.py)')
+    p.add_argument('data', nargs='?', help='rankHistoricTimeSeries.csv or rankDecadeAggregates.csv')
+    p.set_defaults(func=cmd_historic)
+
+    p = subparsers.add_parser('decades', help='Decade mean/best/last ranks on one 13-point grid (decade_aggregates.py)')
+    p.add_argument('--max-rank', type=int, default=100, help='Treat worse ranks as unranked (0 keeps every rank)')
+    p.add_argument('paths', nargs='*', help='.npz sidecars (default: data/boys.npz data/girls.npz)')
+    p.set_defaults(func=cmd_decades)
+
+    p = subparsers.add_parser('dtw', help='DTW shape clustering of count series (timeseries_clustering.py)')
+    p.add_argument('--sample-size', type=int, default=8000)
+    p.add_argument('--normalize', choices=['raw', 'share', 'log_share'], default='raw',
+                   help='Use births per million (or its log1p) instead of raw counts (normalize_counts.py)')
+    p.set_defaults(func=cmd_dtw)
+
+    p = subparsers.add_parser('gap-dtw', help='Gap-aware DTW shape clustering of rank series (gap_dtw.py)')
+    p.add_argument('--n-clusters', type=int, default=8)
+    p.add_argument('--sample-size', type=int, default=2000)
+    p.add_argument('data', nargs='*', help='.npz sidecars to use instead of data/all_ranks.csv')
+    p.set_defaults(func=cmd_gap_dtw)
+
+    p = subparsers.add_parser('variants', help='Group spelling variants and combine their counts (name_variants.py)')
+    p.add_argument('--max-distance', type=int, default=2)
+    p.add_argument('--key', choices=['metaphone', 'nysiis'], default='metaphone', help='Phonetic key for blocking')
+    p.add_argument('--similar', metavar='NAME', help='Also list the spellings within max-distance of NAME')
+    p.set_defaults(func=cmd_variants)
+
+    p = subparsers.add_parser('correlations', help='Top-k correlated count series per name (name_correlations.py)')
+    p.add_argument('--top-k', type=int, default=10)
+    p.add_argument('--workers', type=int, default=None)
+    p.add_argument('data', nargs='*', help='countTimeSeries.csv or .npz sidecars (default: data/countTimeSeries.csv)')
+    p.set_defaults(func=cmd_correlations)
+
+    p = subparsers.add_parser('forecast', help='One-year-ahead count and rank forecasts (forecast_names.py)')
+    p.add_argument('--backtest', action='store_true', help='Also score the model on the last known year')
+    p.add_argument('data', nargs='*', help='countTimeSeries.csv or .npz sidecars (default: data/countTimeSeries.csv)')
+    p.set_defaults(func=cmd_forecast)
+
+    p = subparsers.add_parser('changepoints', help='Breakout/collapse years and one-off spikes (changepoints.py)')
+    p.add_argument('--penalty', type=float, default=10.0, help='Cost of each extra segment, in noise units')
+    p.add_argument('data', nargs='*', help='countTimeSeries.csv or .npz sidecars (default: data/countTimeSeries.csv)')
+    p.set_defaults(func=cmd_changepoints)
+
+    p = subparsers.add_parser('cross-gender', help='Girl share, crossover years and unisex scores (cross_gender.py)')
+    p.add_argument('data', nargs='*', help='countTimeSeries.csv or .npz sidecars (default: data/countTimeSeries.csv)')
+    p.set_defaults(func=cmd_cross_gender)
+
+    p = subparsers.add_parser('totals', help='Cached yearly totals behind the share normalization (normalize_counts.py)')
+    p.add_argument('data', nargs='*', help='countTimeSeries.csv or .npz sidecars (default: data/countTimeSeries.csv)')
+    p.set_defaults(func=cmd_totals)
+
+    p = subparsers.add_parser('diversity', help='Yearly entropy, Gini, top-k share and coverage (diversity_metrics.py)')
+    p.add_argument('--full', action='store_true', help='Recompute every year instead of only new ones')
+    p.add_argument('data', nargs='*', help='countTimeSeries.csv or .npz sidecars (default: data/countTimeSeries.csv)')
+    p.set_defaults(func=cmd_diversity)
+
+    p = subparsers.add_parser('diff', help='Label transitions, rank deltas and changed pages between two runs (run_diff.py)')
+    p.add_argument('--label', default=None, help='Label column (default: Archetype, cluster_kmeans, ...)')
+    p.add_argument('--rank', default=None, help='Rank column (default: rank, when present)')
+    p.add_argument('--align', action='store_true', help='Match integer cluster ids to the old run first')
+    p.add_argument('paths', nargs='+', help='OLD NEW, or one path to compare with its latest snapshot')
+    p.set_defaults(func=cmd_diff)
+
+    p = subparsers.add_parser('columnar', help='Parquet/Arrow copies of analysis CSVs with a size and read-time comparison (columnar_outputs.py)')
+    p.add_argument('--info', action='store_true', help='Print the run metadata of .parquet/.arrow files')
+    p.add_argument('paths', nargs='+', help='Analysis CSVs (or .parquet/.arrow files with --info)')
+    p.set_defaults(func=cmd_columnar)
+
+    p = subparsers.add_parser('ranks', help='Recompute ranks from counts and compare tie rules (rank_engine.py)')
+    p.add_argument('paths', nargs='*', help='.npz sidecars (default: data/countTimeSeries.csv, no source comparison)')
+    p.set_defaults(func=cmd_ranks)
+
+    p = subparsers.add_parser('db', help='Build the SQLite name database and time its queries (build_names_db.py)')
+    p.add_argument('--output', default=None, help='Database path (default: data/names.db)')
+    p.add_argument('--features', default=None, help='Features CSV with cluster_* columns to load as well')
+    p.add_argument('paths', nargs='*', help='.npz sidecars (default: data/boys.npz data/girls.npz)')
+    p.set_defaults(func=cmd_db)
+
+    p = subparsers.add_parser('serve', help='Read-only JSON API over the .npz matrices (name_api.py)')
+    p.add_argument('--port', type=int, default=8321)
+    p.add_argument('--correlations', default=None, help='name_correlations.py output for /similar')
+    p.add_argument('--clusters', default=None, help='CSV with name, gender and cluster_* columns for /clusters')
+    p.add_argument('paths', nargs='*', help='.npz sidecars (default: data/boys.npz data/girls.npz)')
+    p.set_defaults(func=cmd_serve)
+
+    p = subparsers.add_parser('matrices', help='Summarise .npz rank/count sidecars (name_matrices.py)')
+    p.add_argument('paths', nargs='+')
+    p.set_defaults(func=cmd_matrices)
+
+    p = subparsers.add_parser('compare-formats', help='Compare site JSON with the compact format (compact_json.py)')
+    p.add_argument('paths', nargs='+')
+    p.set_defaults(func=cmd_compare_formats)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Popularity-normalized count series.
+
+Raw counts make 500 births in 1996 look the same as 500 in 2024, although
+the number of babies named differs from year to year. This module sums the
+count matrix per year and gender once, caches those totals, and turns any
+count series into:
+
+- share:     births per million babies of the same gender that year
+- log_share: log1p of share, so steady names at different levels differ by
+             a constant and absent years stay 0
+
+Totals are the sum over the names in the data (the ONS tables list names
+with at least 3 births), so they slightly undercount all births.
+
+The totals are cached in CACHE_DIR as JSON keyed by the source files' path,
+size and modification time; an unchanged source is never summed twice.
+analyze_name_features.py and timeseries_clustering.py take a normalize
+option ('raw', 'share' or 'log_share') that applies normalize_frame to the
+frame they have already parsed.
+
+Usage:
+    python scripts/normalize_counts.py [data/countTimeSeries.csv | data/boys.npz data/girls.npz]
+"""
+
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from name_matrices import COUNT_CSV, load_count_matrix
+
+
+CACHE_DIR = Path(__file__).parent.parent / 'analysis_output' / '.totals_cache'
+
+NORMALIZATIONS = ['raw', 'share', 'log_share']
+PER_MILLION = 1_000_000
+
+
+def yearly_totals(genders, counts):
+    """{gender: (T,) array of the summed counts per year}."""
+    counts = np.nan_to_num(np.asarray(counts, dtype=float))
+    return {str(gender): counts[genders == gender].sum(axis=0) for gender in np.unique(genders)}
+
+
+def source_key(source):
+    """Hash of the source paths with their sizes and modification times."""
+    paths = [source] if isinstance(source, (str, Path)) else list(source)
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = Path(path).stat()
+        digest.update(f'{Path(path).resolve()}:{stat.st_size}:{stat.st_mtime_ns}'.encode())
+    return digest.hexdigest()[:16]
+
+
+def cached_totals(source=None):
+    """
+    Yearly totals per gender for a count source (countTimeSeries.csv or
+    .npz sidecars), computed once and then read from CACHE_DIR.
+
+    Returns (years, totals) with totals as in yearly_totals.
+    """
+    source = source or COUNT_CSV
+    cache_path = CACHE_DIR / f'{source_key(source)}.json'
+    if cache_path.exists():
+        with open(cache_path) as f:
+            cached = json.load(f)
+        return np.array(cached['years']), {g: np.array(v) for g, v in cached['totals'].items()}
+
+    _, genders, years, counts = load_count_matrix(source)
+    totals = yearly_totals(genders, counts)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(cache_path, 'w') as f:
+        json.dump({'years': years.tolist(), 'totals': {g: v.tolist() for g, v in totals.items()}}, f)
+    return years, totals
+
+
+def normalize(counts, genders, totals, mode='share'):
+    """
+    Normalize a (names x years) count matrix whose rows have the given
+    genders. mode is one of NORMALIZATIONS; 'raw' returns the counts.
+    """
+    if mode not in NORMALIZATIONS:
+        raise ValueError(f"Unknown normalization {mode!r} (expected one of {', '.join(NORMALIZATIONS)})")
+    counts = np.asarray(counts, dtype=float)
+    if mode == 'raw':
+        return counts
+
+    labels = sorted(totals)
+    table = np.vstack([totals[label] for label in labels])
+    denominators = table[np.searchsorted(labels, np.asarray(genders).astype(str))]
+    share = np.divide(counts * PER_MILLION, denominators, out=np.zeros_like(counts), where=denominators > 0)
+    return np.log1p(share) if mode == 'log_share' else share
+
+
+def normalize_frame(df, year_cols, mode='share', source=None):
+    """
+    Replace the year columns of a count frame (with a gender column) by
+    their normalized values, in place, and return df.
+
+    Totals come from the cache for source when given, so a frame that has
+    been filtered or sampled is still divided by the full-population totals;
+    otherwise they are summed from df itself.
+    """
+    if mode == 'raw':
+        return df
+    genders = df['gender'].astype(str).to_numpy()
+    counts = df[year_cols].to_numpy(dtype=float, na_value=np.nan)
+    if source is not None:
+        years, totals = cached_totals(source)
+        columns = [list(years.astype(str)).index(str(col)) for col in year_cols]
+        totals = {g: v[columns] for g, v in totals.items()}
+    else:
+        totals = yearly_totals(genders, counts)
+
+    values = normalize(counts, genders, totals, mode)
+    values[np.isnan(counts)] = np.nan
+    # Keep float32 frames (lean mode) float32; integer count columns become float64
+    dtype = np.float32 if (df[year_cols].dtypes == np.float32).all() else np.float64
+    df[year_cols] = values.astype(dtype)
+    return df
+
+
+def main(source=None):
+    years, totals = cached_totals(source)
+    print(f"Yearly totals ({source or COUNT_CSV}):")
+    genders = sorted(totals)
+    print(f"  {'year':<6}" + ''.join(f"{g:>10}" for g in genders))
+    for i, year in enumerate(years):
+        print(f"  {year:<6}" + ''.join(f"{totals[g][i]:>10,.0f}" for g in genders))
+    print(f"\n✓ Cached in {CACHE_DIR}")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(args if len(args) > 1 else (args[0] if args else None))
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Per-name content hashes for incremental site builds.
+
+Each name page renders a handful of fields from its record in boys.json /
+girls.json. This module hashes exactly those fields (PAGE_FIELDS, in the
+site format) for every name and stores the hashes in a manifest next to
+the JSON file:
+
+    data/boys.json  ->  data/boys.manifest.json
+
+A page also shows the count of each related name, so those counts are part
+of its hash: a related name's new count dirties the page that lists it.
+
+Comparing the new hashes with the previous manifest gives the dirty pages:
+names whose hash changed plus names that are new. They are written to
+data/changed-pages.json (the same file run_diff.py writes), and a build with
+CHANGED_PAGES=data/changed-pages.json renders only those pages. The
+comparison is one dict lookup per name. New dirty pages are merged into the
+pages already listed there, so a run over one gender keeps the other's
+pending pages; delete the file once a build has rendered them.
+
+This script is the only writer of the manifests. The JavaScript enrichment
+scripts (add-*.js, generate-unique-slugs.js) add most of PAGE_FIELDS, so run
+it on the final JSON files, just before building.
+
+Usage:
+    python scripts/page_manifest.py [--check] [data/boys.json data/girls.json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+
+MANIFEST_FORMAT = 'names-page-manifest/1'
+
+# Fields read by src/name-pages.njk
+PAGE_FIELDS = ['name', 'rank', 'count', 'rankFrom1996', 'countFrom1996', 'rankHistoric', 'uniqueSlug',
+               'bulletPoint', 'classifications', 'relatedNamesWithRank']
+
+
+def manifest_path(json_path):
+    """boys.json -> boys.manifest.json (boys-dev.json -> boys-dev.manifest.json)."""
+    json_path = Path(json_path)
+    return json_path.with_name(f"{json_path.name.split('.')[0]}.manifest.json")
+
+
+def count_lookup(records_by_gender):
+    """{(lowercase name, gender): count} over site-format records, as the build resolves related names."""
+    return {(record['name'].lower(), gender): record.get('count')
+            for gender, records in records_by_gender.items() for record in records}
+
+
+def page_hash(record, gender, counts):
+    """Short hash of the fields of a site-format record that render into its page."""
+    content = [record.get(field) for field in PAGE_FIELDS]
+    related = record.get('relatedNamesWithRank') or []
+    content.append([counts.get((item['name'].lower(), item.get('gender') or gender)) for item in related])
+    encoded = json.dumps(content, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.blake2b(encoded.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def build_manifest(records, gender, counts=None):
+    """Manifest for one gender's site-format records."""
+    counts = counts if counts is not None else count_lookup({gender: records})
+    return {
+        'format': MANIFEST_FORMAT,
+        'gender': gender,
+        'fields': PAGE_FIELDS,
+        'hashes': {record['name']: page_hash(record, gender, counts) for record in records},
+    }
+
+
+def load_manifest(path):
+    """A previous manifest, or None if there is none (or it hashed other fields)."""
+    if not Path(path).exists():
+        return None
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != MANIFEST_FORMAT or manifest.get('fields') != PAGE_FIELDS:
+        return None
+    return manifest
+
+
+def write_manifest(manifest, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, separators=(',', ':'), ensure_ascii=False)
+
+
+def dirty_pages(old, new):
+    """
+    Compare two manifests of one gender.
+
+    Returns (changed, added, removed) name lists. Without an old manifest
+    every name is added.
+    """
+    old_hashes = old['hashes'] if old else {}
+    new_hashes = new['hashes']
+    changed = [name for name, digest in new_hashes.items() if name in old_hashes and old_hashes[name] != digest]
+    added = [name for name in new_hashes if name not in old_hashes]
+    removed = [name for name in old_hashes if name not in new_hashes]
+    return changed, added, removed
+
+
+def update_manifests(records_by_gender, json_paths, check=False, pages_path=None):
+    """
+    Hash each gender's records, compare with the manifests next to
+    json_paths ({gender: path}) and write the new manifests (unless check)
+    and the changed-pages file (when pages_path is given).
+
+    Returns {gender: (changed, added, removed)}.
+    """
+    from run_diff import write_changed_pages
+
+    counts = count_lookup(records_by_gender)
+    dirty, keys, removed_keys = {}, [], []
+    for gender, records in records_by_gender.items():
+        path = manifest_path(json_paths[gender])
+        start = time.perf_counter()
+        manifest = build_manifest(records, gender, counts)
+        hashed = time.perf_counter()
+        changed, added, removed = dirty_pages(load_manifest(path), manifest)
+        compared = time.perf_counter()
+        print(f"  {gender}: {len(changed)} changed, {len(added)} new, {len(removed)} removed "
+              f"of {len(records)} pages (hashed in {(hashed - start) * 1000:.0f} ms, "
+              f"compared in {(compared - hashed) * 1000:.0f} ms)")
+        if not check:
+            write_manifest(manifest, path)
+        dirty[gender] = (changed, added, removed)
+        keys += [f'{name}|{gender}' for name in changed + added]
+        removed_keys += [f'{name}|{gender}' for name in removed]
+
+    if pages_path and not check:
+        write_changed_pages(sorted(keys), sorted(removed_keys), pages_path, source='page manifests', merge=True)
+        print(f"✓ Added {len(keys)} dirty page(s) to {pages_path}")
+    return dirty
+
+
+def main(argv=None):
+    from name_matrices import gender_from_path
+    from run_diff import PAGES_FILE
+
+    parser = argparse.ArgumentParser(description='Hash name pages and list the ones that changed.')
+    parser.add_argument('--check', action='store_true', help='Only report; keep the old manifests')
+    parser.add_argument('--pages', type=Path, default=PAGES_FILE, help='Changed-pages file for the site build')
+    parser.add_argument('paths', nargs='*', help='Site JSON files (default: data/boys.json data/girls.json)')
+    args = parser.parse_args(argv)
+
+    paths = [Path(p) for p in args.paths] or [DATA_DIR / 'boys.json', DATA_DIR / 'girls.json']
+    records_by_gender, json_paths = {}, {}
+    for path in paths:
+        gender = gender_from_path(path)
+        with open(path, encoding='utf-8') as f:
+            records_by_gender[gender] = json.load(f)
+        json_paths[gender] = path
+
+    print("Comparing page hashes with the previous manifests...")
+    update_manifests(records_by_gender, json_paths, check=args.check, pages_path=args.pages)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Recompute yearly ranks from the count matrix.
+
+The generators copy ranks verbatim from the ONS CSVs. Once counts change
+(spelling variants combined, a dataset filtered, a year added) those ranks
+are stale, so this module ranks the (names x years) count matrix directly.
+Each year column is ranked over all names with one sort and a searchsorted,
+optionally within groups (per gender) or across everything (combined).
+
+Tie rules:
+- competition: tied names share the best rank and the next rank is skipped
+  (1, 2, 2, 4)
+- dense:       tied names share a rank and no rank is skipped (1, 2, 2, 3)
+- ons:         competition ranking over names with at least ONS_MIN_COUNT
+  babies, matching the published ONS tables; rarer names are unranked
+
+Names with no count in a year are unranked (MISSING, as in name_matrices.py).
+
+Usage:
+    python scripts/rank_engine.py [data/boys.npz data/girls.npz]
+        Time each method and compare the recomputed ranks with the source
+        ranks (when .npz sidecars are given).
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from name_matrices import MISSING, load_count_matrix, load_matrices
+
+
+METHODS = ['competition', 'dense', 'ons']
+
+# ONS does not publish names given to fewer than 3 babies in a year
+ONS_MIN_COUNT = 3
+
+
+def rank_column(values, method='competition'):
+    """
+    Rank one column of counts (higher count = better rank).
+
+    values holds only rankable counts; returns an int64 rank per value.
+    """
+    if method == 'dense':
+        distinct = np.unique(values)
+        return 1 + len(distinct) - np.searchsorted(distinct, values, side='right')
+    ordered = np.sort(values)
+    return 1 + len(ordered) - np.searchsorted(ordered, values, side='right')
+
+
+def rank_counts(counts, method='competition', groups=None):
+    """
+    Rank every year column of a (names x years) count matrix.
+
+    Missing counts may be 0 or NaN. groups is an optional (names,) array
+    (e.g. genders); names are then ranked only against their own group.
+    Returns an int32 matrix with MISSING where a name is unranked.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown rank method {method!r} (expected one of {', '.join(METHODS)})")
+
+    counts = np.nan_to_num(np.asarray(counts, dtype=np.float64), nan=0.0)
+    min_count = ONS_MIN_COUNT if method == 'ons' else 1
+    column_method = 'dense' if method == 'dense' else 'competition'
+
+    ranks = np.full(counts.shape, MISSING, dtype=np.int32)
+    group_masks = [np.ones(len(counts), dtype=bool)] if groups is None else [
+        groups == group for group in np.unique(groups)
+    ]
+
+    for in_group in group_masks:
+        for t in range(counts.shape[1]):
+            rankable = in_group & (counts[:, t] >= min_count)
+            ranks[rankable, t] = rank_column(counts[rankable, t], column_method)
+
+    return ranks
+
+
+def recompute_record_ranks(records, method='competition'):
+    """
+    Replace rankFrom1996 and rank in typed generator records (one gender)
+    with ranks recomputed from countFrom1996.
+    """
+    counts = np.array([[c or 0 for c in r['countFrom1996']] for r in records], dtype=np.float64)
+    ranks = rank_counts(counts, method=method)
+
+    for record, row in zip(records, ranks.tolist()):
+        record['rankFrom1996'] = [None if v == MISSING else v for v in row]
+        record['rank'] = record['rankFrom1996'][-1]
+
+    return records
+
+
+def agreement(ranks, source_ranks):
+    """Share of cells where both are ranked and equal, over cells either ranks."""
+    either = (ranks != MISSING) | (source_ranks != MISSING)
+    return float((ranks == source_ranks)[either].mean()) if either.any() else 1.0
+
+
+def main(paths=None):
+    print("Loading count matrix...")
+    names, genders, years, counts = load_count_matrix(paths or None)
+    print(f"  {len(names)} names x {len(years)} years")
+
+    source_ranks = load_matrices(paths)[3] if paths else None
+
+    for method in METHODS:
+        start = time.perf_counter()
+        ranks = rank_counts(counts, method=method, groups=genders)
+        elapsed = (time.perf_counter() - start) * 1000
+        line = f"  {method:<12} per gender: {elapsed:7.1f} ms, {(ranks[:, -1] != MISSING).sum()} ranked in {years[-1]}"
+        if source_ranks is not None:
+            line += f", {agreement(ranks, source_ranks):.2%} agree with source"
+        print(line)
+
+    start = time.perf_counter()
+    combined = rank_counts(counts, method='competition')
+    print(f"  competition  combined:   {(time.perf_counter() - start) * 1000:7.1f} ms")
+    top = np.argsort(combined[:, -1] + (combined[:, -1] == MISSING) * len(names))[:5]
+    print("  Top 5 combined in {}: {}".format(
+        years[-1], ', '.join(f"{names[i]} ({genders[i]}) #{combined[i, -1]}" for i in top)))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
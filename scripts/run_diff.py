@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+What changed between two runs of a pipeline output.
+
+Compares an old and a new version of the same table, keyed on (name,
+gender). Both inputs may be:
+
+- a CSV with a 'name|gender' first column (rankHistoricTimeSeries.csv,
+  countTimeSeries_with_clusters.csv)
+- a CSV with name and gender columns (analysis_output/*/name_features.csv)
+- site or compact JSON (boys.json, girls.compact.json), gender taken from
+  the file name
+
+Both sides are sorted by key and joined with a single merge pass, which
+gives the matched, added and removed names. For the matched names it
+reports:
+
+- label transitions for a label column (Archetype, cluster_kmeans, ...),
+  and the old x new confusion matrix. --align first maps integer cluster ids
+  onto the old ones with the Hungarian algorithm, since k-means numbers its
+  clusters arbitrarily
+- rank deltas for a rank column (rank by default, when present)
+- every name where any shared column changed. Numeric columns count as
+  changed beyond a small tolerance (NUMERIC_RTOL), so '29' vs '29.0' or a
+  float32 (--lean) rounding is not a change; label columns and text are
+  compared as strings
+
+It writes a compact changelog (analysis_output/changelog/) and the keys of
+the names whose pages need rebuilding (data/changed-pages.json). An
+Eleventy build with CHANGED_PAGES=data/changed-pages.json renders only those
+name pages.
+
+Scripts that overwrite their outputs in place call snapshot() first, which
+keeps the previous version in analysis_output/runs/. Given one path, this
+script compares it with its latest snapshot.
+
+Usage:
+    python scripts/run_diff.py OLD NEW [--label Archetype] [--rank rank] [--align]
+    python scripts/run_diff.py data/rankHistoricTimeSeries.csv
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+
+ROOT = Path(__file__).parent.parent
+SNAPSHOT_DIR = ROOT / 'analysis_output' / 'runs'
+CHANGELOG_DIR = ROOT / 'analysis_output' / 'changelog'
+PAGES_FILE = ROOT / 'data' / 'changed-pages.json'
+
+CHANGELOG_FORMAT = 'names-changelog/1'
+PAGES_FORMAT = 'names-changed-pages/1'
+
+LABEL_COLUMNS = ['Archetype', 'archetype', 'cluster_kmeans', 'cluster', 'shape_cluster']
+RANK_COLUMNS = ['rank']
+
+# Relative and absolute tolerance for numeric columns
+NUMERIC_RTOL = 1e-6
+NUMERIC_ATOL = 1e-9
+KEEP_SNAPSHOTS = 5
+TOP_MOVERS = 10
+
+
+def snapshot(path, keep=KEEP_SNAPSHOTS):
+    """
+    Copy path into SNAPSHOT_DIR before it is overwritten, keeping the last
+    `keep` snapshots of each file. Returns the copy, or None if path does
+    not exist yet.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    copy = SNAPSHOT_DIR / f"{_snapshot_stem(path)}.{time.strftime('%Y%m%d-%H%M%S')}{path.suffix}"
+    shutil.copy2(path, copy)
+    for old in snapshots(path)[:-keep]:
+        old.unlink()
+    return copy
+
+
+def _snapshot_stem(path):
+    # The parent directory keeps e.g. every analysis_output/*/name_features.csv apart
+    return f'{path.resolve().parent.name}-{path.stem}'
+
+
+def snapshots(path):
+    """Snapshots of path, oldest first."""
+    path = Path(path)
+    return sorted(SNAPSHOT_DIR.glob(f'{_snapshot_stem(path)}.*{path.suffix}'))
+
+
+def load_run(path):
+    """
+    Load one run as a frame with string name and gender columns first,
+    whatever the input layout.
+    """
+    path = Path(path)
+    if path.suffix == '.json':
+        from compact_json import load_records
+        from name_matrices import gender_from_path
+
+        df = pd.DataFrame(load_records(path))
+        df.insert(1, 'gender', gender_from_path(path))
+    else:
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        if 'name|gender' in df.columns:
+            df[['name', 'gender']] = df['name|gender'].str.split('|', n=1, expand=True)
+            df = df.drop(columns='name|gender')
+        elif 'gender' not in df.columns:
+            df['gender'] = ''
+    columns = ['name', 'gender'] + [col for col in df.columns if col not in ('name', 'gender')]
+    return df[columns].astype({'name': str, 'gender': str})
+
+
+def merge_join(left_keys, right_keys):
+    """
+    Sorted-merge join of two key lists.
+
+    Returns (left_rows, right_rows, left_only, right_only) as index arrays
+    into the original lists; matched pairs come out in key order.
+    """
+    left_order = sorted(range(len(left_keys)), key=left_keys.__getitem__)
+    right_order = sorted(range(len(right_keys)), key=right_keys.__getitem__)
+    left_rows, right_rows, left_only, right_only = [], [], [], []
+
+    i = j = 0
+    while i < len(left_order) and j < len(right_order):
+        a, b = left_keys[left_order[i]], right_keys[right_order[j]]
+        if a == b:
+            left_rows.append(left_order[i])
+            right_rows.append(right_order[j])
+            i += 1
+            j += 1
+        elif a < b:
+            left_only.append(left_order[i])
+            i += 1
+        else:
+            right_only.append(right_order[j])
+            j += 1
+    left_only.extend(left_order[i:])
+    right_only.extend(right_order[j:])
+
+    return tuple(np.array(rows, dtype=np.int64) for rows in (left_rows, right_rows, left_only, right_only))
+
+
+def canonical(values):
+    """Column values as comparable strings (dicts as sorted JSON, missing as '')."""
+    def one(value):
+        if isinstance(value, dict):
+            return json.dumps(value, sort_keys=True)
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return ''
+        return str(value)
+    return np.array([one(value) for value in values], dtype=object)
+
+
+def as_numbers(values):
+    """Column values as floats (missing as NaN), or None if any value is not a number."""
+    try:
+        numbers = pd.to_numeric(pd.Series(values, dtype=object).replace('', np.nan), errors='raise')
+    except (TypeError, ValueError):
+        return None
+    return numbers.to_numpy(dtype=float) if numbers.dtype.kind in 'biuf' else None
+
+
+def column_differs(old_values, new_values, text=False):
+    """
+    Which matched values of a column changed: numerically within
+    NUMERIC_RTOL/NUMERIC_ATOL when both sides are numbers, as canonical
+    strings when either side is not (or text=True, for labels).
+    """
+    old_numbers = None if text else as_numbers(old_values)
+    new_numbers = None if old_numbers is None else as_numbers(new_values)
+    if new_numbers is None:
+        return canonical(old_values) != canonical(new_values)
+    return ~np.isclose(old_numbers, new_numbers, rtol=NUMERIC_RTOL, atol=NUMERIC_ATOL, equal_nan=True)
+
+
+def align_cluster_ids(old, new):
+    """Relabel integer cluster ids in new to best match old (ids below 0 are kept)."""
+    from cluster_stability import align_labels
+
+    old, new = np.asarray(old, dtype=np.int64), np.asarray(new, dtype=np.int64)
+    both = (old >= 0) & (new >= 0)
+    if not both.any():
+        return new
+    n_clusters = int(max(old.max(), new.max())) + 1
+    aligned, _ = align_labels(new[both], old[both], n_clusters)
+    # Read the id mapping off the matched names and apply it to every new id
+    mapping = np.arange(n_clusters)
+    mapping[new[both]] = aligned
+    result = new.copy()
+    result[new >= 0] = mapping[new[new >= 0]]
+    return result
+
+
+def pick_column(df_old, df_new, requested, candidates):
+    if requested:
+        return requested if requested in df_old.columns and requested in df_new.columns else None
+    return next((col for col in candidates if col in df_old.columns and col in df_new.columns), None)
+
+
+def diff_runs(old, new, label=None, rank=None, align=False):
+    """
+    Compare two loaded runs. Returns a dict with the join, changed rows,
+    label transitions, confusion matrix and rank deltas.
+    """
+    old_keys = list(zip(old['name'], old['gender']))
+    new_keys = list(zip(new['name'], new['gender']))
+    old_rows, new_rows, removed, added = merge_join(old_keys, new_keys)
+
+    result = {
+        'keys': [old_keys[i] for i in old_rows],
+        'added': [new_keys[i] for i in added],
+        'removed': [old_keys[i] for i in removed],
+        'label': label,
+        'rank': rank,
+    }
+
+    if label:
+        old_labels = canonical(old[label].to_numpy()[old_rows])
+        new_labels = canonical(new[label].to_numpy()[new_rows])
+        if align:
+            numeric = pd.to_numeric(pd.Series(np.concatenate([old_labels, new_labels])), errors='coerce')
+            if numeric.notna().all():
+                old_ids = numeric.to_numpy()[:len(old_labels)].astype(np.int64)
+                new_ids = align_cluster_ids(old_ids, numeric.to_numpy()[len(old_labels):].astype(np.int64))
+                new_labels = new_ids.astype(str).astype(object)
+                old_labels = old_ids.astype(str).astype(object)
+        result['old_labels'] = old_labels
+        result['new_labels'] = new_labels
+        result['confusion'] = pd.crosstab(pd.Series(old_labels, name='old'), pd.Series(new_labels, name='new'))
+
+    # A relabelled cluster is not a change: compare the (aligned) labels, not the raw ids
+    shared = [col for col in old.columns if col in new.columns and col not in ('name', 'gender')]
+    changed = np.zeros(len(old_rows), dtype=bool)
+    changed_columns = {}
+    for col in shared:
+        if col == label:
+            differs = old_labels != new_labels
+        else:
+            differs = column_differs(old[col].to_numpy()[old_rows], new[col].to_numpy()[new_rows],
+                                     text=col in LABEL_COLUMNS)
+        changed |= differs
+        if differs.any():
+            changed_columns[col] = int(differs.sum())
+    result['changed'] = changed
+    result['changed_columns'] = changed_columns
+
+    if rank:
+        old_rank = pd.to_numeric(pd.Series(old[rank].to_numpy()[old_rows]), errors='coerce').to_numpy()
+        new_rank = pd.to_numeric(pd.Series(new[rank].to_numpy()[new_rows]), errors='coerce').to_numpy()
+        result['old_rank'] = old_rank
+        result['new_rank'] = new_rank
+
+    return result
+
+
+def changelog(result, old_path, new_path):
+    """Compact changelog document for a diff_runs result."""
+    keys = result['keys']
+    doc = {
+        'format': CHANGELOG_FORMAT,
+        'old': str(old_path),
+        'new': str(new_path),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'summary': {
+            'matched': len(keys),
+            'added': len(result['added']),
+            'removed': len(result['removed']),
+            'changed': int(result['changed'].sum()),
+            'changedColumns': result['changed_columns'],
+        },
+        'added': [list(key) for key in result['added']],
+        'removed': [list(key) for key in result['removed']],
+    }
+
+    if result['label']:
+        moved = np.flatnonzero(result['old_labels'] != result['new_labels'])
+        doc['label'] = result['label']
+        doc['summary']['labelChanges'] = len(moved)
+        doc['labelChanges'] = [[*keys[i], result['old_labels'][i], result['new_labels'][i]] for i in moved]
+        confusion = result['confusion']
+        doc['confusion'] = {
+            'old': [str(v) for v in confusion.index],
+            'new': [str(v) for v in confusion.columns],
+            'counts': confusion.to_numpy().tolist(),
+        }
+
+    if result['rank']:
+        old_rank, new_rank = result['old_rank'], result['new_rank']
+        moved = np.flatnonzero(~np.isnan(old_rank) & ~np.isnan(new_rank) & (old_rank != new_rank)
+                               | (np.isnan(old_rank) != np.isnan(new_rank)))
+        doc['rank'] = result['rank']
+        doc['summary']['rankChanges'] = len(moved)
+        doc['rankChanges'] = [[*keys[i], None if np.isnan(old_rank[i]) else int(old_rank[i]),
+                               None if np.isnan(new_rank[i]) else int(new_rank[i])] for i in moved]
+    return doc
+
+
+def changed_page_keys(result):
+    """'Name|Gender' keys of names that are new or have any changed value."""
+    keys = [result['keys'][i] for i in np.flatnonzero(result['changed'])] + result['added']
+    return sorted(f'{name}|{gender}' for name, gender in keys)
+
+
+def write_changed_pages(keys, removed=(), path=PAGES_FILE, source='', merge=False):
+    """
+    Write the page list read by the Eleventy build (CHANGED_PAGES).
+
+    With merge=True the keys are added to those already listed in path, so
+    pages still waiting for a build (e.g. the other gender's) are kept; a
+    page listed again is no longer removed, and a removed one is no longer
+    rendered.
+    """
+    keys, removed = list(keys), list(removed)
+    if merge and Path(path).exists():
+        with open(path, encoding='utf-8') as f:
+            pending = json.load(f)
+        if pending.get('format') == PAGES_FORMAT:
+            keys = sorted((set(pending['keys']) - set(removed)) | set(keys))
+            removed = sorted((set(pending['removed']) - set(keys)) | set(removed))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'format': PAGES_FORMAT, 'source': source, 'keys': list(keys),
+                   'removed': list(removed)}, f, separators=(',', ':'), ensure_ascii=False)
+
+
+def print_report(doc, result):
+    summary = doc['summary']
+    print(f"  matched {summary['matched']}, added {summary['added']}, removed {summary['removed']}, "
+          f"changed {summary['changed']}")
+    for col, count in sorted(summary['changedColumns'].items(), key=lambda item: -item[1])[:10]:
+        print(f"    {col:<20} {count}")
+
+    if result['label']:
+        print(f"\n{result['label']}: {summary['labelChanges']} names changed label")
+        transitions = pd.Series([f'{old} -> {new}' for _, _, old, new in doc['labelChanges']]).value_counts()
+        for transition, count in transitions.head(TOP_MOVERS).items():
+            print(f"    {transition:<45} {count}")
+        print("\n  Confusion (rows old, columns new):")
+        print('    ' + result['confusion'].to_string().replace('\n', '\n    '))
+
+    if result['rank']:
+        moves = [(old - new, name, gender, old, new) for name, gender, old, new in doc['rankChanges']
+                 if old is not None and new is not None]
+        moves.sort()
+        print(f"\n{result['rank']}: {summary['rankChanges']} names changed")
+        rises = [move for move in moves[::-1] if move[0] > 0][:TOP_MOVERS]
+        falls = [move for move in moves if move[0] < 0][:TOP_MOVERS]
+        for label, chosen in (('Biggest rises', rises), ('Biggest falls', falls)):
+            print(f"  {label}: " + (', '.join(f"{name} ({gender}) {old}->{new}"
+                                             for _, name, gender, old, new in chosen) or '-'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two runs of a pipeline output.')
+    parser.add_argument('paths', nargs='+', help='OLD NEW, or one path to compare with its latest snapshot')
+    parser.add_argument('--label', default=None, help=f"Label column (default: first of {', '.join(LABEL_COLUMNS)})")
+    parser.add_argument('--rank', default=None, help='Rank column (default: rank, when present)')
+    parser.add_argument('--align', action='store_true', help='Match integer cluster ids to the old run first')
+    parser.add_argument('--changelog', type=Path, default=None,
+                        help='Changelog path (default: analysis_output/changelog/<new>-<time>.json)')
+    parser.add_argument('--pages', type=Path, default=PAGES_FILE, help='Changed-pages file for the site build')
+    args = parser.parse_args(argv)
+
+    if len(args.paths) == 1:
+        history = snapshots(args.paths[0])
+        if not history:
+            parser.error(f"No snapshot of {args.paths[0]} in {SNAPSHOT_DIR}")
+        old_path, new_path = history[-1], Path(args.paths[0])
+    else:
+        old_path, new_path = Path(args.paths[0]), Path(args.paths[1])
+
+    start = time.perf_counter()
+    old, new = load_run(old_path), load_run(new_path)
+    label = pick_column(old, new, args.label, LABEL_COLUMNS)
+    rank = pick_column(old, new, args.rank, RANK_COLUMNS)
+    result = diff_runs(old, new, label=label, rank=rank, align=args.align)
+    doc = changelog(result, old_path, new_path)
+    print(f"Compared {old_path} -> {new_path} in {time.perf_counter() - start:.2f}s")
+    print_report(doc, result)
+
+    changelog_path = args.changelog or CHANGELOG_DIR / f"{new_path.stem}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    changelog_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(changelog_path, 'w', encoding='utf-8') as f:
+        json.dump(doc, f, separators=(',', ':'), ensure_ascii=False)
+    keys = changed_page_keys(result)
+    write_changed_pages(keys, [f'{name}|{gender}' for name, gender in result['removed']], args.pages,
+                        source=str(new_path))
+    print(f"\n✓ Saved changelog to {changelog_path}")
+    print(f"✓ Saved {len(keys)} changed page(s) to {args.pages}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Stratified dev data: a small boys-dev.json / girls-dev.json that still
+covers every kind of name.
+
+create-dev-data.js keeps the top 500 names, so a dev build never renders a
+rare-name archetype or an unpopular-name cluster. This sampler draws the
+same number of names per gender, but chosen so that every stratum is
+represented:
+
+- popularity bands of the 2024 rank (BANDS, plus names unranked in 2024)
+- each classification in the records (classifications.five_year, .recent,
+  .historic)
+- each label in the analysis outputs: the archetype or cluster column of
+  name_features.csv and name_archetypes.csv in analysis_output/ and its
+  subdirectories, and of analysis_output/*/features_with_clusters.csv (or
+  the files given with --labels)
+
+The top HEAD names are always kept, so the home page and the most visited
+pages look as they do in production. Every stratum then gets up to
+MIN_PER_STRATUM names (drawn across popularity bands where it can), and the
+remaining places are shared out between the bands in proportion to their
+size. Draws use a fixed seed, so the files only change when the data does.
+Records keep production order (by rank).
+
+Usage:
+    python scripts/sample_dev_data.py [--size 500] [--seed 0] [--labels PATH ...] [data/boys.json data/girls.json]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from name_matrices import GENDER_LABELS, gender_from_path
+
+
+ROOT = Path(__file__).parent.parent
+DATA_DIR = ROOT / 'data'
+LABEL_GLOBS = ['analysis_output/name_features.csv', 'analysis_output/name_archetypes.csv',
+               'analysis_output/*/name_features.csv', 'analysis_output/*/name_archetypes.csv',
+               'analysis_output/*/features_with_clusters.csv']
+
+DEV_SIZE = 500
+HEAD = 100
+MIN_PER_STRATUM = 5
+SEED = 0
+
+# Upper bounds of the 2024 rank bands
+BANDS = [100, 500, 1000, 5000, 10000]
+UNRANKED = 'unranked'
+CLASSIFICATION_TYPES = ['five_year', 'recent', 'historic']
+
+
+def band_label(rank):
+    """Popularity band of a site-format rank ('12', 'x', None)."""
+    try:
+        rank = int(str(rank).replace(',', ''))
+    except ValueError:
+        return UNRANKED
+    lower = 1
+    for upper in BANDS:
+        if rank <= upper:
+            return f'{lower}-{upper}'
+        lower = upper + 1
+    return f'{lower}+'
+
+
+def load_labels(paths):
+    """
+    {(name, gender): [stratum, ...]} from analysis CSVs, with one stratum
+    per file, e.g. 'name_archetypes: Recent Entrant' or 'popular_names_500: 3'.
+    Files without a gender column (features_with_clusters.csv) label the
+    name for both genders.
+    """
+    from run_diff import LABEL_COLUMNS, load_run, pick_column
+
+    labels = defaultdict(list)
+    for path in paths:
+        df = load_run(path)
+        column = pick_column(df, df, None, LABEL_COLUMNS)
+        if column is None:
+            print(f"  Skipping {path}: no label column")
+            continue
+        # Top-level outputs are told apart by file, the others by directory
+        source = Path(path).stem if Path(path).parent.name == 'analysis_output' else Path(path).parent.name
+        for name, gender, label in zip(df['name'], df['gender'], df[column]):
+            if label == '':
+                continue
+            for key_gender in [gender] if gender else GENDER_LABELS.values():
+                labels[(name, key_gender)].append(f'{source}: {label}')
+        print(f"  {path}: {df[column].replace('', np.nan).nunique()} {column} labels")
+    return labels
+
+
+def strata(record, gender, labels):
+    """Every stratum a record belongs to, popularity band first."""
+    found = [f"band: {band_label(record.get('rank'))}"]
+    classifications = record.get('classifications') or {}
+    found += [f'{kind}: {classifications[kind]}' for kind in CLASSIFICATION_TYPES if classifications.get(kind)]
+    return found + labels.get((record['name'], gender), [])
+
+
+def sample(records, gender, labels, size=DEV_SIZE, head=HEAD, min_per_stratum=MIN_PER_STRATUM, seed=SEED):
+    """
+    Indices (in record order) of a stratified sample of size names.
+
+    Returns (indices, members) with members {stratum: [record index, ...]}
+    over all records, for the coverage report.
+    """
+    rng = np.random.default_rng(seed)
+    members = defaultdict(list)
+    bands = []
+    for i, record in enumerate(records):
+        found = strata(record, gender, labels)
+        bands.append(found[0])
+        for stratum in found:
+            members[stratum].append(i)
+
+    chosen = set(range(min(head, size, len(records))))
+
+    # Coverage: smallest strata first, so rare labels get their places before the budget runs out
+    for stratum in sorted(members, key=lambda s: len(members[s])):
+        have = sum(1 for i in members[stratum] if i in chosen)
+        if have >= min_per_stratum:
+            continue
+        # Shuffle, then interleave the bands so a label is seen at several popularity levels
+        candidates = [i for i in rng.permutation(members[stratum]) if i not in chosen]
+        by_band = defaultdict(list)
+        for i in candidates:
+            by_band[bands[i]].append(i)
+        spread = [i for group in zip_longest_all(by_band.values()) for i in group]
+        for i in spread[:min(min_per_stratum - have, size - len(chosen))]:
+            chosen.add(int(i))
+
+    # Fill: remaining places shared between bands in proportion to their size
+    remaining = size - len(chosen)
+    if remaining > 0:
+        band_names = sorted(set(bands))
+        sizes = np.array([len(members[b]) for b in band_names], dtype=float)
+        quotas = np.floor(remaining * sizes / sizes.sum()).astype(int)
+        quotas[np.argsort(-sizes)[:remaining - quotas.sum()]] += 1
+        for band, quota in zip(band_names, quotas):
+            candidates = [int(i) for i in rng.permutation(members[band]) if i not in chosen]
+            chosen.update(candidates[:quota])
+        # Bands too small for their quota leave places; top them up from everything left
+        spare = [int(i) for i in rng.permutation(len(records)) if i not in chosen]
+        chosen.update(spare[:size - len(chosen)])
+
+    return sorted(chosen), members
+
+
+def zip_longest_all(groups):
+    """Round-robin over lists: first of each, then second of each, ..."""
+    groups = [list(group) for group in groups]
+    for position in range(max((len(group) for group in groups), default=0)):
+        yield [group[position] for group in groups if position < len(group)]
+
+
+def dev_path(path):
+    """boys.json -> boys-dev.json."""
+    path = Path(path)
+    return path.with_name(path.name.replace('.json', '-dev.json'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write stratified *-dev.json files.')
+    parser.add_argument('--size', type=int, default=DEV_SIZE, help='Names per gender')
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--labels', action='append', default=None, metavar='PATH',
+                        help='Analysis CSV with name, gender and a label column (repeatable; '
+                             'default: the analysis_output files that exist)')
+    parser.add_argument('paths', nargs='*', help='Site JSON files (default: data/boys.json data/girls.json)')
+    args = parser.parse_args(argv)
+
+    label_paths = args.labels if args.labels is not None else sorted(
+        path for pattern in LABEL_GLOBS for path in glob.glob(str(ROOT / pattern)))
+    print(f"Loading labels from {len(label_paths)} analysis file(s)...")
+    labels = load_labels(label_paths)
+
+    for path in [Path(p) for p in args.paths] or [DATA_DIR / 'boys.json', DATA_DIR / 'girls.json']:
+        gender = gender_from_path(path)
+        with open(path, encoding='utf-8') as f:
+            records = json.load(f)
+
+        indices, members = sample(records, gender, labels, size=args.size, seed=args.seed)
+        dev_records = [records[i] for i in indices]
+        output_path = dev_path(path)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(dev_records, f, indent=2, ensure_ascii=False)
+
+        chosen = set(indices)
+        covered = sum(1 for rows in members.values() if any(i in chosen for i in rows))
+        print(f"\n✓ Created {output_path}")
+        print(f"  {len(dev_records)} of {len(records)} names "
+              f"({output_path.stat().st_size / 1024:.0f} KB), {covered}/{len(members)} strata covered")
+        for stratum in sorted(members):
+            in_sample = sum(1 for i in members[stratum] if i in chosen)
+            if stratum.startswith('band: ') or in_sample < MIN_PER_STRATUM:
+                print(f"    {stratum:<40} {in_sample:>4} of {len(members[stratum])}")
+
+
+if __name__ == '__main__':
+    main()
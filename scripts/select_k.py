@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Choose the number of k-means clusters for the feature pipelines.
+
+The feature scripts hardcode k=8 or k=6. This stage scores a range of k on
+the scaled feature matrix in one sweep:
+
+- inertia (for the elbow), with each k warm-started from the k-1 centroids
+  plus the point farthest from its centroid
+- silhouette on a fixed random sample of rows
+- Davies-Bouldin index
+- gap statistic against uniform reference sets drawn in the data's
+  principal-component bounding box (Tibshirani et al.), on the same sample
+
+The warm-started fits run in sequence (they are cheap); the silhouette,
+Davies-Bouldin and gap scoring for every k then runs in parallel. Scores are
+cached in CACHE_DIR by a hash of the feature matrix and settings, so re-runs
+on the same features are instant.
+
+pick_k chooses k by the elbow of the inertia curve (the default; on the
+name features it lands on the hand-picked k), the gap rule (the smallest k
+whose gap is within one standard error of the next k's), silhouette or
+Davies-Bouldin. The feature scripts call choose_k when given
+n_clusters='auto'.
+
+Usage:
+    python scripts/select_k.py [k_min] [k_max] [min_avg_count]
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.metrics import davies_bouldin_score, silhouette_score
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+
+CACHE_DIR = Path(__file__).parent.parent / 'analysis_output' / '.k_cache'
+
+K_RANGE = range(2, 13)
+SAMPLE_SIZE = 5000
+N_REFERENCES = 5
+RANDOM_STATE = 42
+CRITERIA = ['elbow', 'gap', 'silhouette', 'davies_bouldin']
+DEFAULT_CRITERION = 'elbow'
+
+# Per-process copy of the sample, set by _init_worker
+_SAMPLE = None
+
+
+def matrix_hash(X, **settings):
+    """Hash of the matrix contents and the sweep settings."""
+    digest = hashlib.sha1(np.ascontiguousarray(X, dtype=np.float64).tobytes())
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+def warm_start_sweep(X, k_values, random_state=RANDOM_STATE):
+    """
+    Fit k-means for each k, seeding k from the k-1 centroids.
+
+    The extra centroid is the point farthest from its current centroid.
+    Returns {k: (inertia, labels, centers)}.
+    """
+    results = {}
+    centers = None
+    for k in range(min(k_values), max(k_values) + 1):
+        if centers is None:
+            model = KMeans(n_clusters=k, random_state=random_state, n_init=10)
+        else:
+            labels = results[k - 1][1]
+            far = np.argmax(((X - centers[labels]) ** 2).sum(axis=1))
+            model = KMeans(n_clusters=k, init=np.vstack([centers, X[far]]), n_init=1)
+        model.fit(X)
+        centers = model.cluster_centers_
+        results[k] = (float(model.inertia_), model.labels_, centers)
+    return {k: results[k] for k in k_values}
+
+
+def log_dispersion(X, labels, centers):
+    """log W_k: log of the within-cluster sum of squares."""
+    return float(np.log(((X - centers[labels]) ** 2).sum()))
+
+
+def reference_sampler(X):
+    """
+    Return a function drawing uniform reference sets shaped like X in the
+    bounding box of its principal components.
+    """
+    mean = X.mean(axis=0)
+    _, _, vt = np.linalg.svd(X - mean, full_matrices=False)
+    rotated = (X - mean) @ vt.T
+    low, high = rotated.min(axis=0), rotated.max(axis=0)
+
+    def draw(rng):
+        return rng.uniform(low, high, size=rotated.shape) @ vt + mean
+
+    return draw
+
+
+def _init_worker(sample):
+    global _SAMPLE
+    _SAMPLE = sample
+
+
+def _score_task(k, sample_labels, sample_centers, n_references, seed):
+    """Silhouette, Davies-Bouldin and gap for one k on the shared sample."""
+    X = _SAMPLE
+    scores = {'k': k}
+    if len(np.unique(sample_labels)) > 1:
+        scores['silhouette'] = float(silhouette_score(X, sample_labels))
+        scores['davies_bouldin'] = float(davies_bouldin_score(X, sample_labels))
+    else:
+        scores['silhouette'] = float('nan')
+        scores['davies_bouldin'] = float('nan')
+
+    rng = np.random.default_rng(seed)
+    draw = reference_sampler(X)
+    reference_logs = []
+    for _ in range(n_references):
+        reference = draw(rng)
+        model = KMeans(n_clusters=k, n_init=1, random_state=int(rng.integers(2 ** 31 - 1))).fit(reference)
+        reference_logs.append(log_dispersion(reference, model.labels_, model.cluster_centers_))
+
+    reference_logs = np.array(reference_logs)
+    scores['gap'] = float(reference_logs.mean() - log_dispersion(X, sample_labels, sample_centers))
+    scores['gap_se'] = float(reference_logs.std() * np.sqrt(1 + 1 / n_references))
+    return scores
+
+
+def evaluate_k(X, k_values=K_RANGE, sample_size=SAMPLE_SIZE, n_references=N_REFERENCES,
+               random_state=RANDOM_STATE, workers=None, use_cache=True):
+    """
+    Score every k in k_values on the scaled feature matrix X.
+
+    Returns a list of dicts with k, inertia, silhouette, davies_bouldin, gap
+    and gap_se, in k order. Results are cached by matrix hash.
+    """
+    k_values = sorted(k_values)
+    key = matrix_hash(X, k_values=k_values, sample_size=sample_size,
+                      n_references=n_references, random_state=random_state)
+    cache_path = CACHE_DIR / f'{key}.json'
+    if use_cache and cache_path.exists():
+        print(f"  Using cached k scores ({cache_path.name})")
+        with open(cache_path) as f:
+            return json.load(f)
+
+    X = np.asarray(X, dtype=np.float64)
+    fits = warm_start_sweep(X, k_values, random_state)
+
+    rng = np.random.default_rng(random_state)
+    rows = np.sort(rng.choice(len(X), min(sample_size, len(X)), replace=False))
+    sample = X[rows]
+    seeds = rng.integers(2 ** 31 - 1, size=len(k_values))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(sample,)) as pool:
+        futures = [
+            pool.submit(_score_task, k, fits[k][1][rows], fits[k][2], n_references, int(seed))
+            for k, seed in zip(k_values, seeds)
+        ]
+        scores = [future.result() for future in futures]
+
+    for entry in scores:
+        entry['inertia'] = fits[entry['k']][0]
+
+    if use_cache:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump(scores, f, indent=2)
+    return scores
+
+
+def elbow(scores):
+    """k at the point of the inertia curve farthest from the chord joining its ends."""
+    ks = np.array([s['k'] for s in scores], dtype=float)
+    inertia = np.array([s['inertia'] for s in scores])
+    x = (ks - ks[0]) / max(ks[-1] - ks[0], 1)
+    y = (inertia - inertia[-1]) / max(inertia[0] - inertia[-1], 1e-12)
+    return int(ks[np.argmax(np.abs(1 - x - y))])
+
+
+def pick_k(scores, criterion=DEFAULT_CRITERION):
+    """Choose k from evaluate_k scores."""
+    if criterion == 'gap':
+        for current, following in zip(scores, scores[1:]):
+            if current['gap'] >= following['gap'] - following['gap_se']:
+                return current['k']
+        return scores[-1]['k']
+    if criterion == 'silhouette':
+        return max(scores, key=lambda s: s['silhouette'])['k']
+    if criterion == 'davies_bouldin':
+        return min(scores, key=lambda s: s['davies_bouldin'])['k']
+    if criterion == 'elbow':
+        return elbow(scores)
+    raise ValueError(f"Unknown criterion {criterion!r} (expected one of {', '.join(CRITERIA)})")
+
+
+def print_scores(scores, chosen=None):
+    print(f"  {'k':>3} {'inertia':>12} {'silhouette':>10} {'davies_b':>9} {'gap':>7} {'gap_se':>7}")
+    for s in scores:
+        marker = '  <' if s['k'] == chosen else ''
+        print(f"  {s['k']:>3} {s['inertia']:>12.0f} {s['silhouette']:>10.3f} {s['davies_bouldin']:>9.3f} "
+              f"{s['gap']:>7.3f} {s['gap_se']:>7.3f}{marker}")
+
+
+def choose_k(X, k_values=K_RANGE, criterion=DEFAULT_CRITERION, **kwargs):
+    """Evaluate k_values on X and return the chosen k (printing the scores)."""
+    print(f"Selecting k in {min(k_values)}-{max(k_values)} by {criterion}...")
+    scores = evaluate_k(X, k_values, **kwargs)
+    k = pick_k(scores, criterion)
+    print_scores(scores, chosen=k)
+    print(f"  Chosen k = {k}")
+    return k
+
+
+def main(k_min=2, k_max=12, min_avg_count=0, data_path='data/countTimeSeries.csv'):
+    """Score k for the analyze_name_features.py feature matrix."""
+    from sklearn.preprocessing import StandardScaler
+    from analyze_name_features import extract_features, load_data
+
+    df, year_cols = load_data(data_path)
+    if min_avg_count > 0:
+        df = df[df[year_cols].astype(float).mean(axis=1) >= min_avg_count].copy()
+    features_df = extract_features(df, year_cols)
+    X = features_df.drop(columns=['name', 'gender']).fillna(0)
+    X_scaled = StandardScaler().fit_transform(X)
+
+    start = time.perf_counter()
+    scores = evaluate_k(X_scaled, range(k_min, k_max + 1))
+    print(f"Scored {len(scores)} values of k for {len(X_scaled)} names in {time.perf_counter() - start:.1f}s")
+    print_scores(scores)
+    for criterion in CRITERIA:
+        print(f"  {criterion:<15} k = {pick_k(scores, criterion)}")
+
+
+if __name__ == '__main__':
+    low = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    high = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    min_avg = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    main(k_min=low, k_max=high, min_avg_count=min_avg)